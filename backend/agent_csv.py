@@ -9,9 +9,31 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import requests
 import os
+import re
 import json
+import hashlib
+import datetime
+import logging
+import threading
 import numpy as np
-from typing import Dict, Any, List, Optional
+from contextlib import contextmanager, ExitStack
+from urllib.parse import urlparse
+from typing import Dict, Any, List, Optional, Tuple
+
+from analise_incremental import AnalisadorIncremental
+from armazenamento import ArmazenamentoArtefatos
+from amostragem import amostrar_por_offsets, estatisticas_aproximadas, LINHAS_AMOSTRA
+from coalescencia import SingleFlight
+from correlacao import analisar_correlacoes
+from downloads import gerenciador_downloads, SUFIXO_META
+from esquema_csv import carregar_csv_tipado
+import estatisticas
+import graficos
+from instrumentacao import medir
+from resiliencia import CircuitoAberto, PrazoEsgotado, coletar_avisos, registrar_aviso, repassar_avisos
+from logs import configurar_logs
+
+logger = logging.getLogger(__name__)
 
 class NumpyEncoder(json.JSONEncoder):
     """ Custom encoder for numpy data types """
@@ -24,6 +46,17 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NumpyEncoder, self).default(obj)
 
+# Termos que pedem o modo prévia (amostra + estatísticas aproximadas)
+# Palavras inteiras ("amostra" fica de fora: casaria com consultas sobre datasets de amostras)
+TERMOS_PREVIA = ["prévia", "previa", "preview", "rápida", "rapida", "perfil rápido"]
+_PADRAO_PREVIA = re.compile(r"\b(?:" + "|".join(re.escape(termo) for termo in TERMOS_PREVIA) + r")\b")
+# No modo 'auto', DataFrames acima deste número de linhas usam os gráficos agregados
+LIMITE_LINHAS_GRAFICO_EXATO = 50_000
+# O pyplot usa estado global: no modo exato, um gráfico é desenhado por vez
+_lock_pyplot = threading.Lock()
+# No modo prévia, só as primeiras colunas recebem gráficos
+MAX_COLUNAS_GRAFICOS_PREVIA = 12
+
 class AgentCSV:
     """
     Agent Especialista em CSV - Análise de dados estruturados
@@ -36,43 +69,150 @@ class AgentCSV:
     """
     
     def __init__(self):
-        self.data_dir = "/home/ubuntu/data_csv"
-        os.makedirs(self.data_dir, exist_ok=True)
+        # Downloads em <data_dir>/datasets e gráficos por dataset e versão em
+        # <data_dir>/artefatos, com cota de disco (ARTEFATOS_DIR, ARTEFATOS_COTA_BYTES)
+        self.armazenamento = ArmazenamentoArtefatos()
+        self.downloader = gerenciador_downloads
+        # Segundos em que uma cópia local validada é usada sem consultar o servidor
+        # (o PrefetcherDatasets a mantém válida em segundo plano; 0 revalida sempre)
+        self.validade_local = float(os.getenv("CSV_VALIDADE_LOCAL_SEGUNDOS", "900"))
+        # Carregamento tipado (esquema inferido uma vez e reutilizado); ver esquema_csv
+        self.carregamento_tipado = os.getenv("CSV_CARREGAMENTO_TIPADO", "0") == "1"
+        # Threads usadas pelo motor de estatísticas (-1 = todos os núcleos)
+        self.n_jobs_estatisticas = int(os.getenv("CSV_ESTATISTICAS_N_JOBS", "1"))
+        # Estágio de análise entre colunas (correlações e informação mútua); ver correlacao
+        self.analise_correlacoes = os.getenv("CSV_CORRELACOES", "1") == "1"
+        # 'agregado' (agrega com NumPy e desenha só o agregado), 'exato' (seaborn sobre
+        # todos os pontos) ou 'auto' (agregado acima de LIMITE_LINHAS_GRAFICO_EXATO); ver graficos
+        self.modo_graficos = os.getenv("CSV_MODO_GRAFICOS", "auto")
+        # Análise incremental (só estatísticas, lendo apenas as linhas acrescentadas) por
+        # padrão; também ativada por dataset no catálogo. Ver analise_incremental
+        self.analise_incremental = os.getenv("CSV_ANALISE_INCREMENTAL", "0") == "1"
+        self.analisador_incremental = AnalisadorIncremental()
+        # Requisições simultâneas pelo mesmo dataset compartilham download/leitura e análise
+        self._downloads_em_voo = SingleFlight()
+        self._datasets_em_voo = SingleFlight()
+        self._analises_em_voo = SingleFlight()
+        self._previas_em_voo = SingleFlight()
+        self._incrementais_em_voo = SingleFlight()
+
+    @property
+    def data_dir(self) -> str:
+        return self.armazenamento.raiz
+
+    @data_dir.setter
+    def data_dir(self, diretorio: str):
+        self.armazenamento = ArmazenamentoArtefatos(diretorio, self.armazenamento.cota_bytes)
+
+    @contextmanager
+    def _em_uso(self, *caminhos: str):
+        """
+        Protege os caminhos da remoção por cota durante o bloco e, ao final,
+        aplica a cota (com eles ainda protegidos).
+        """
+        with ExitStack() as pilha:
+            for caminho in caminhos:
+                pilha.enter_context(self.armazenamento.fixar(caminho))
+            yield
+            self.armazenamento.aplicar_cota()
+
+    @staticmethod
+    def nome_arquivo_local(url: str) -> str:
+        """
+        Nome do arquivo local de uma URL: último segmento do caminho mais um hash
+        da URL, para que datasets de origens diferentes com o mesmo nome não
+        compartilhem o arquivo.
+        """
+        resumo = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+        raiz, extensao = os.path.splitext(os.path.basename(urlparse(url).path))
+        return f"{raiz}-{resumo}{extensao}" if raiz else f"{resumo}.csv"
+
+    def versao_dataset(self, url: str) -> str:
+        """
+        Identificador da versão da cópia local de um dataset (ETag/Last-Modified e
+        tamanho registrados no download); vazio se o dataset ainda não foi baixado.
+        """
+        filepath = self.armazenamento.caminho_dataset(self.nome_arquivo_local(url))
+        try:
+            with open(filepath + SUFIXO_META, encoding="utf-8") as f:
+                meta = json.load(f)
+            return f"{meta.get('etag')}|{meta.get('last_modified')}|{meta.get('tamanho')}"
+        except (OSError, ValueError):
+            return self.versao_arquivo(filepath)
 
-    def download_csv(self, url: str, filename: str) -> str:
+    @staticmethod
+    def versao_arquivo(filepath: str) -> str:
+        """
+        Identificador da versão de um arquivo local (data de modificação e tamanho).
+        """
+        try:
+            estado = os.stat(filepath)
+            return f"{estado.st_mtime_ns}|{estado.st_size}"
+        except OSError:
+            return ""
+
+    def download_csv(self, url: str, filename: str, max_idade: Optional[float] = None,
+                     permitir_desatualizado: bool = True) -> str:
         """
         Faz o download de um arquivo CSV de uma URL e o salva localmente.
         
         Args:
             url: URL do arquivo CSV.
             filename: Nome do arquivo para salvar localmente.
+            max_idade: Validade da cópia local em segundos (padrão: self.validade_local).
+            permitir_desatualizado: Se o download falhar (host fora do ar, disjuntor
+                aberto ou prazo da consulta esgotado) e houver uma cópia local do
+                mesmo URL, usa a cópia e registra um aviso de degradação.
             
         Returns:
             Caminho completo para o arquivo salvo.
         
         Raises:
             requests.exceptions.RequestException: Se houver um erro no download.
+            resiliencia.PrazoEsgotado, resiliencia.CircuitoAberto: Idem, sem cópia local.
         """
-        filepath = os.path.join(self.data_dir, filename)
-        print(f"Tentando baixar CSV de: {url} para {filepath}")
+        filepath = self.armazenamento.caminho_dataset(filename)
+        logger.info("Tentando baixar CSV de: %s para %s", url, filepath)
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status() # Levanta um HTTPError para requisições HTTP ruins (4xx ou 5xx)
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print(f"Download concluído: {filepath}")
+            # Sessão compartilhada; se o arquivo local ainda for válido, custa apenas um 304
+            # (ou nada, dentro da validade). Downloads simultâneos do mesmo arquivo são coalescidos.
+            max_idade = self.validade_local if max_idade is None else max_idade
+            with self.armazenamento.fixar(filepath):
+                resultado, _ = self._downloads_em_voo.executar(filepath, self.downloader.baixar, url, filepath, max_idade)
+            if resultado.modificado:
+                logger.info("Download concluído: %s (%d bytes)", filepath, resultado.bytes_transferidos)
             return filepath
-        except requests.exceptions.RequestException as e:
-            print(f"Erro ao baixar o arquivo CSV de {url}: {e}")
+        except (requests.exceptions.RequestException, CircuitoAberto, PrazoEsgotado) as e:
+            copia_local = self._copia_local(url, filepath)
+            if permitir_desatualizado and copia_local:
+                registrar_aviso(f"Dataset {url} indisponível ({e}); usando a cópia local validada em {copia_local}.")
+                return filepath
+            logger.error("Erro ao baixar o arquivo CSV de %s: %s", url, e)
             raise
 
-    def carregar_csv(self, filepath: str) -> pd.DataFrame:
+    @staticmethod
+    def _copia_local(url: str, filepath: str) -> Optional[str]:
+        """
+        Data da última validação da cópia local completa do URL (None se não houver).
+        """
+        try:
+            with open(filepath + SUFIXO_META, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not os.path.exists(filepath):
+            return None
+        return datetime.datetime.fromtimestamp(meta.get("validado_em", os.path.getmtime(filepath))).isoformat(timespec="seconds")
+
+    def carregar_csv(self, filepath: str, tipado: Optional[bool] = None, colunas: Optional[List[str]] = None) -> pd.DataFrame:
         """
         Carrega um arquivo CSV em um DataFrame do pandas.
         
         Args:
             filepath: Caminho para o arquivo CSV.
+            tipado: Usa o esquema inferido/persistido do dataset (categóricas, tipos
+                numéricos reduzidos, datas). Padrão: self.carregamento_tipado.
+            colunas: Subconjunto de colunas a carregar (opcional).
             
         Returns:
             DataFrame do pandas.
@@ -82,19 +222,24 @@ class AgentCSV:
             pd.errors.EmptyDataError: Se o arquivo CSV estiver vazio.
             pd.errors.ParserError: Se houver um erro de parsing no CSV.
         """
-        print(f"Carregando arquivo CSV: {filepath}")
+        logger.info("Carregando arquivo CSV: %s", filepath)
         try:
-            df = pd.read_csv(filepath)
-            print(f"CSV carregado com sucesso. Formato: {df.shape}")
+            tipado = self.carregamento_tipado if tipado is None else tipado
+            with medir("read_csv", arquivo=os.path.basename(filepath), tipado=tipado):
+                if tipado:
+                    df = carregar_csv_tipado(filepath, colunas)
+                else:
+                    df = pd.read_csv(filepath, usecols=colunas)
+            logger.info("CSV carregado com sucesso. Formato: %s", df.shape)
             return df
         except FileNotFoundError:
-            print(f"Erro: Arquivo não encontrado em {filepath}")
+            logger.error("Erro: Arquivo não encontrado em %s", filepath)
             raise
         except pd.errors.EmptyDataError:
-            print(f"Erro: Arquivo CSV vazio em {filepath}")
+            logger.error("Erro: Arquivo CSV vazio em %s", filepath)
             raise
         except pd.errors.ParserError as e:
-            print(f"Erro de parsing no arquivo CSV {filepath}: {e}")
+            logger.error("Erro de parsing no arquivo CSV %s: %s", filepath, e)
             raise
 
     def analisar_dados(self, df: pd.DataFrame) -> Dict[str, Any]:
@@ -107,18 +252,29 @@ class AgentCSV:
         Returns:
             Dicionário com os resultados da análise.
         """
-        print("Realizando análise de dados...")
-        analise = {
-            "colunas": df.columns.tolist(),
-            "tipos_dados": df.dtypes.astype(str).to_dict(),
-            "estatisticas_descritivas": df.describe(include='all').to_dict(),
-            "valores_ausentes": df.isnull().sum().to_dict(),
-            "linhas_duplicadas": df.duplicated().sum()
-        }
-        print("Análise de dados concluída.")
+        logger.debug("Realizando análise de dados...")
+        with medir("analisar_dados", linhas=len(df), colunas=len(df.columns)):
+            analise = estatisticas.analisar(df, n_jobs=self.n_jobs_estatisticas)
+        logger.debug("Análise de dados concluída.")
         return analise
 
-    def gerar_visualizacao(self, df: pd.DataFrame, column: str, plot_type: str = 'hist') -> str:
+    def analisar_correlacoes(self, df: pd.DataFrame, k: int = 10) -> Dict[str, Any]:
+        """
+        Analisa as relações entre colunas: matrizes de Pearson/Spearman, os k pares
+        mais correlacionados e o ranking de informação mútua das categóricas.
+        
+        Args:
+            df: DataFrame do pandas.
+            k: Número de pares nos rankings.
+            
+        Returns:
+            Dicionário com os resultados da análise entre colunas.
+        """
+        with medir("correlacoes", linhas=len(df), colunas=len(df.columns)):
+            return analisar_correlacoes(df, k=k)
+
+    def gerar_visualizacao(self, df: pd.DataFrame, column: str, plot_type: str = 'hist', prefixo: str = 'plot',
+                           coluna_y: Optional[str] = None, diretorio: Optional[str] = None) -> str:
         """
         Gera uma visualização para uma coluna específica e salva como imagem.
         
@@ -126,56 +282,79 @@ class AgentCSV:
             df: DataFrame do pandas.
             column: Nome da coluna para visualizar.
             plot_type: Tipo de plotagem ('hist', 'box', 'scatter').
+            prefixo: Prefixo do nome do arquivo (ex.: 'previa' para gráficos da amostra).
+            coluna_y: Segunda coluna para o 'scatter' (padrão: o índice).
+            diretorio: Onde salvar a imagem (padrão: self.data_dir); ver
+                ArmazenamentoArtefatos.diretorio_versao.
             
         Returns:
-            Caminho para o arquivo de imagem gerado.
+            Caminho para o arquivo de imagem gerado. Ao lado dele fica uma miniatura;
+            no modo agregado a imagem completa é desenhada sob demanda (ver graficos).
         
         Raises:
             ValueError: Se a coluna não existir ou o tipo de plotagem for inválido.
         """
-        if column not in df.columns:
-            raise ValueError(f"Coluna '{column}' não encontrada no DataFrame.")
-        
-        output_filename = os.path.join(self.data_dir, f"plot_{column}_{plot_type}.png")
-        plt.figure(figsize=(10, 6))
+        for coluna in (column, coluna_y):
+            if coluna is not None and coluna not in df.columns:
+                raise ValueError(f"Coluna '{coluna}' não encontrada no DataFrame.")
         
-        if plot_type == 'hist':
-            if pd.api.types.is_numeric_dtype(df[column]):
-                sns.histplot(df[column].dropna(), kde=True)
-                plt.title(f'Distribuição de {column}')
-                plt.xlabel(column)
-                plt.ylabel('Frequência')
-            else:
-                df[column].value_counts().plot(kind='bar')
-                plt.title(f'Contagem de {column}')
-                plt.xlabel(column)
-                plt.ylabel('Contagem')
-        elif plot_type == 'box':
-            if pd.api.types.is_numeric_dtype(df[column]):
-                sns.boxplot(y=df[column].dropna())
-                plt.title(f'Box Plot de {column}')
-                plt.ylabel(column)
-            else:
-                raise ValueError(f"Box plot não é adequado para coluna não numérica '{column}'.")
-        elif plot_type == 'scatter':
-            # Scatter plot requer duas colunas, aqui faremos um exemplo simples com índice
-            if pd.api.types.is_numeric_dtype(df[column]):
-                plt.scatter(df.index, df[column])
-                plt.title(f'Scatter Plot de {column}')
-                plt.xlabel('Índice')
-                plt.ylabel(column)
+        nome = f"{column}_{coluna_y}" if coluna_y else column
+        output_filename = os.path.join(diretorio or self.data_dir, f"{prefixo}_{nome}_{plot_type}.png")
+        if self.modo_graficos == "agregado" or (self.modo_graficos == "auto" and len(df) > LIMITE_LINHAS_GRAFICO_EXATO):
+            with medir("plot", coluna=column, tipo=plot_type, agregado=True):
+                graficos.salvar_graficos(graficos.especificar(df, column, plot_type, coluna_y), output_filename)
+            logger.debug("Visualização agregada gerada: %s", output_filename)
+            return output_filename
+
+        with medir("plot", coluna=column, tipo=plot_type), _lock_pyplot:
+            plt.figure(figsize=(10, 6))
+
+            if plot_type == 'hist':
+                if pd.api.types.is_numeric_dtype(df[column]):
+                    sns.histplot(df[column].dropna(), kde=True)
+                    plt.title(f'Distribuição de {column}')
+                    plt.xlabel(column)
+                    plt.ylabel('Frequência')
+                else:
+                    # Mesmo limite do modo agregado: top-k categorias e o restante em "Outros"
+                    barras = graficos.especificar_barras(df[column])
+                    posicoes = np.arange(len(barras["rotulos"]))
+                    plt.bar(posicoes, barras["contagens"])
+                    plt.xticks(posicoes, barras["rotulos"], rotation=90)
+                    plt.title(barras["titulo"])
+                    plt.xlabel(barras["rotulo_x"])
+                    plt.ylabel(barras["rotulo_y"])
+            elif plot_type == 'box':
+                if pd.api.types.is_numeric_dtype(df[column]):
+                    sns.boxplot(y=df[column].dropna())
+                    plt.title(f'Box Plot de {column}')
+                    plt.ylabel(column)
+                else:
+                    raise ValueError(f"Box plot não é adequado para coluna não numérica '{column}'.")
+            elif plot_type == 'scatter':
+                # Sem coluna_y, usa o índice no eixo x
+                if pd.api.types.is_numeric_dtype(df[column]) and (coluna_y is None or pd.api.types.is_numeric_dtype(df[coluna_y])):
+                    eixo_x = df.index if coluna_y is None else df[coluna_y]
+                    plt.scatter(eixo_x, df[column])
+                    plt.title(f'Scatter Plot de {column}' + (f' x {coluna_y}' if coluna_y else ''))
+                    plt.xlabel(coluna_y or 'Índice')
+                    plt.ylabel(column)
+                else:
+                    raise ValueError(f"Scatter plot não é adequado para coluna não numérica '{column}'.")
             else:
-                raise ValueError(f"Scatter plot não é adequado para coluna não numérica '{column}'.")
-        else:
-            raise ValueError(f"Tipo de plotagem '{plot_type}' inválido. Escolha entre 'hist', 'box', 'scatter'.")
+                raise ValueError(f"Tipo de plotagem '{plot_type}' inválido. Escolha entre 'hist', 'box', 'scatter'.")
 
-        plt.tight_layout()
-        plt.savefig(output_filename)
-        plt.close()
-        print(f"Visualização gerada: {output_filename}")
+            plt.tight_layout()
+            plt.savefig(output_filename)
+            if graficos.GERAR_SVG:
+                plt.savefig(graficos.caminho_svg(output_filename))
+            plt.close()
+            graficos.salvar_miniatura_de_imagem(output_filename)
+        logger.debug("Visualização gerada: %s", output_filename)
         return output_filename
 
-    def processar_consulta_csv(self, consulta_texto: str, csv_url: Optional[str] = None, csv_filepath: Optional[str] = None) -> Dict[str, Any]:
+    def processar_consulta_csv(self, consulta_texto: str, csv_url: Optional[str] = None, csv_filepath: Optional[str] = None,
+                               previa: Optional[bool] = None, incremental: Optional[bool] = None) -> Dict[str, Any]:
         """
         Processa uma consulta relacionada a dados CSV.
         
@@ -183,15 +362,32 @@ class AgentCSV:
             consulta_texto: A consulta do usuário.
             csv_url: URL do arquivo CSV para download (opcional).
             csv_filepath: Caminho local para o arquivo CSV (opcional).
+            previa: Analisa apenas uma amostra limitada de linhas, com estatísticas
+                aproximadas e intervalos de confiança. Padrão: ativado quando a
+                consulta menciona uma prévia (ver TERMOS_PREVIA).
+            incremental: Atualiza as estatísticas lendo apenas as linhas acrescentadas
+                desde a última análise (para CSVs que só crescem). Padrão:
+                self.analise_incremental.
             
         Returns:
             Dicionário com os resultados da análise e caminhos para visualizações.
         """
+        if previa is None:
+            previa = self.eh_consulta_previa(consulta_texto)
+        if previa:
+            return self.processar_previa_csv(consulta_texto, csv_url, csv_filepath)
+        if incremental is None:
+            incremental = self.analise_incremental
+        if incremental:
+            return self.processar_incremental_csv(consulta_texto, csv_url, csv_filepath)
+
         df = None
         if csv_url:
             try:
-                downloaded_path = self.download_csv(csv_url, os.path.basename(csv_url))
-                df = self.carregar_csv(downloaded_path)
+                (df, avisos), _ = self._datasets_em_voo.executar(csv_url, self._obter_dataframe_url, csv_url)
+                # Os avisos (ex.: cópia local desatualizada) da execução compartilhada valem
+                # para todas as chamadas coalescidas, e não só para a que a executou
+                repassar_avisos(avisos)
             except Exception as e:
                 return {"status": "erro", "mensagem": f"Falha ao processar CSV da URL: {e}"}
         elif csv_filepath:
@@ -205,34 +401,202 @@ class AgentCSV:
         if df is None:
             return {"status": "erro", "mensagem": "Não foi possível carregar o DataFrame."}
 
+        # A análise e os gráficos dependem apenas do dataset e da versão, que têm
+        # diretório próprio; execuções simultâneas sobre ele são coalescidas
+        # (e não sobrescrevem os mesmos PNGs)
+        if csv_url:
+            origem, versao = csv_url, self.versao_dataset(csv_url)
+        else:
+            origem = os.path.abspath(csv_filepath)
+            versao = self.versao_arquivo(origem)
+        diretorio = self.armazenamento.diretorio_versao(origem, versao)
+        with self._em_uso(diretorio):
+            (analise_resultados, visualizacoes), _ = self._analises_em_voo.executar(
+                diretorio, self._analisar_e_visualizar, df, diretorio=diretorio
+            )
+            visualizacoes_web = [graficos.descrever(v, self.data_dir) for v in visualizacoes]
+
+        return {
+            "status": "sucesso",
+            "consulta_original": consulta_texto,
+            "analise": analise_resultados,
+            "visualizacoes": visualizacoes,
+            "visualizacoes_web": visualizacoes_web,
+            "mensagem": "Análise CSV concluída com sucesso."
+        }
+
+    @staticmethod
+    def eh_consulta_previa(consulta_texto: str) -> bool:
+        texto = consulta_texto.lower()
+        return _PADRAO_PREVIA.search(texto) is not None
+
+    def processar_previa_csv(self, consulta_texto: str, csv_url: Optional[str] = None, csv_filepath: Optional[str] = None,
+                             linhas_amostra: int = LINHAS_AMOSTRA) -> Dict[str, Any]:
+        """
+        Modo prévia: perfil rápido do dataset a partir de uma amostra de linhas.
+
+        A amostra é lida por offsets de bytes aleatórios, então o tempo de leitura,
+        análise e gráficos depende de linhas_amostra e não do tamanho do CSV
+        (para URLs, o arquivo ainda precisa estar disponível localmente; depois do
+        primeiro download a revalidação custa um 304).
+
+        Args:
+            consulta_texto: A consulta do usuário.
+            csv_url: URL do arquivo CSV para download (opcional).
+            csv_filepath: Caminho local para o arquivo CSV (opcional).
+            linhas_amostra: Número de linhas da amostra.
+
+        Returns:
+            Dicionário no formato de processar_consulta_csv; 'analise' descreve a
+            amostra e traz em 'previa' as estimativas para o arquivo completo.
+        """
+        try:
+            if csv_url:
+                filepath = self.download_csv(csv_url, self.nome_arquivo_local(csv_url))
+            elif csv_filepath:
+                filepath = csv_filepath
+            else:
+                return {"status": "erro", "mensagem": "Nenhuma URL ou caminho de arquivo CSV fornecido."}
+            if csv_url:
+                origem, versao = csv_url, self.versao_dataset(csv_url)
+            else:
+                origem = os.path.abspath(filepath)
+                versao = self.versao_arquivo(origem)
+            diretorio = self.armazenamento.diretorio_versao(origem, versao)
+            with self._em_uso(filepath, diretorio):
+                (analise_resultados, visualizacoes), _ = self._previas_em_voo.executar(
+                    (diretorio, linhas_amostra), self._analisar_previa, filepath, linhas_amostra, diretorio
+                )
+                visualizacoes_web = [graficos.descrever(v, self.data_dir) for v in visualizacoes]
+        except Exception as e:
+            return {"status": "erro", "mensagem": f"Falha ao gerar prévia do CSV: {e}"}
+
+        return {
+            "status": "sucesso",
+            "consulta_original": consulta_texto,
+            "analise": analise_resultados,
+            "visualizacoes": visualizacoes,
+            "visualizacoes_web": visualizacoes_web,
+            "mensagem": "Prévia do CSV concluída (estatísticas aproximadas a partir de uma amostra)."
+        }
+
+    def processar_incremental_csv(self, consulta_texto: str, csv_url: Optional[str] = None,
+                                  csv_filepath: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Modo incremental: estatísticas descritivas do arquivo completo, combinando
+        os agregados salvos com as linhas acrescentadas desde a última análise.
+
+        O custo de uma reanálise é proporcional aos dados novos; se o arquivo
+        mudou de outra forma (cabeçalho, trecho já processado, tipos), o estado
+        é recalculado por completo. Não gera correlações nem gráficos.
+
+        Args:
+            consulta_texto: A consulta do usuário.
+            csv_url: URL do arquivo CSV para download (opcional).
+            csv_filepath: Caminho local para o arquivo CSV (opcional).
+
+        Returns:
+            Dicionário no formato de processar_consulta_csv, com 'incremental'
+            descrevendo o processamento (modo, linhas novas, bytes lidos, offset).
+        """
+        try:
+            if csv_url:
+                filepath = self.download_csv(csv_url, self.nome_arquivo_local(csv_url))
+            elif csv_filepath:
+                filepath = csv_filepath
+            else:
+                return {"status": "erro", "mensagem": "Nenhuma URL ou caminho de arquivo CSV fornecido."}
+            with medir("analise_incremental", arquivo=os.path.basename(filepath)):
+                (analise_resultados, info), _ = self._incrementais_em_voo.executar(
+                    os.path.abspath(filepath), self.analisador_incremental.analisar, filepath
+                )
+        except Exception as e:
+            return {"status": "erro", "mensagem": f"Falha na análise incremental do CSV: {e}"}
+        logger.info("Análise incremental de %s: %s", filepath, info)
+
+        return {
+            "status": "sucesso",
+            "consulta_original": consulta_texto,
+            "analise": analise_resultados,
+            "incremental": info,
+            "visualizacoes": [],
+            "visualizacoes_web": [],
+            "mensagem": "Análise incremental do CSV concluída."
+        }
+
+    def _analisar_previa(self, filepath: str, linhas_amostra: int,
+                         diretorio: Optional[str] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Amostra o arquivo, estima as estatísticas e gera os gráficos da amostra.
+        """
+        with medir("amostragem", arquivo=os.path.basename(filepath), linhas=linhas_amostra):
+            amostra = amostrar_por_offsets(filepath, linhas_amostra)
+        logger.info("Prévia de %s: %d linhas (%s) de ~%.0f", filepath, len(amostra.df), amostra.metodo, amostra.linhas_estimadas)
+
+        analise_resultados, visualizacoes = self._analisar_e_visualizar(
+            amostra.df, prefixo="previa", max_colunas=MAX_COLUNAS_GRAFICOS_PREVIA, diretorio=diretorio
+        )
+        analise_resultados["previa"] = {
+            "metodo": amostra.metodo,
+            "linhas_amostra": len(amostra.df),
+            "tamanho_bytes": amostra.tamanho_bytes,
+            "linhas_estimadas": {"valor": amostra.linhas_estimadas, "ic": list(amostra.ic_linhas)},
+            "confianca": 0.95,
+            "estatisticas_aproximadas": estatisticas_aproximadas(amostra),
+        }
+        return analise_resultados, visualizacoes
+
+    def _obter_dataframe_url(self, csv_url: str) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Baixa o CSV da URL e carrega o DataFrame.
+
+        Returns:
+            Tupla (DataFrame, avisos de degradação registrados no download).
+        """
+        with coletar_avisos() as avisos:
+            downloaded_path = self.download_csv(csv_url, self.nome_arquivo_local(csv_url))
+            df = self.carregar_csv(downloaded_path)
+        return df, avisos
+
+    def _analisar_e_visualizar(self, df: pd.DataFrame, prefixo: str = "plot", max_colunas: Optional[int] = None,
+                               diretorio: Optional[str] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Executa a análise estatística e gera as visualizações padrão do DataFrame.
+        """
         analise_resultados = self.analisar_dados(df)
         visualizacoes = []
+        if self.analise_correlacoes:
+            analise_resultados["correlacoes"] = self.analisar_correlacoes(df)
+            # Dispersão do par de colunas mais correlacionado
+            pares = analise_resultados["correlacoes"]["pares_mais_correlacionados"].get("pearson")
+            if pares:
+                try:
+                    visualizacoes.append(self.gerar_visualizacao(
+                        df, pares[0]["coluna_a"], 'scatter', prefixo, coluna_y=pares[0]["coluna_b"], diretorio=diretorio
+                    ))
+                except ValueError as e:
+                    logger.warning("Não foi possível gerar a dispersão do par mais correlacionado: %s", e)
 
         # Tentar gerar visualizações para colunas numéricas ou categóricas
-        for col in df.columns:
+        for col in df.columns[:max_colunas]:
             if pd.api.types.is_numeric_dtype(df[col]):
                 try:
-                    visualizacoes.append(self.gerar_visualizacao(df, col, 'hist'))
-                    visualizacoes.append(self.gerar_visualizacao(df, col, 'box'))
+                    visualizacoes.append(self.gerar_visualizacao(df, col, 'hist', prefixo, diretorio=diretorio))
+                    visualizacoes.append(self.gerar_visualizacao(df, col, 'box', prefixo, diretorio=diretorio))
                 except ValueError as e:
-                    print(f"Não foi possível gerar visualização para {col}: {e}")
-            elif pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_categorical_dtype(df[col]):
+                    logger.warning("Não foi possível gerar visualização para %s: %s", col, e)
+            elif pd.api.types.is_string_dtype(df[col]) or isinstance(df[col].dtype, pd.CategoricalDtype):
                 # Para colunas categóricas, podemos gerar um histograma de contagem
                 try:
-                    visualizacoes.append(self.gerar_visualizacao(df, col, 'hist'))
+                    visualizacoes.append(self.gerar_visualizacao(df, col, 'hist', prefixo, diretorio=diretorio))
                 except ValueError as e:
-                    print(f"Não foi possível gerar visualização para {col}: {e}")
+                    logger.warning("Não foi possível gerar visualização para %s: %s", col, e)
 
-        return {
-            "status": "sucesso",
-            "consulta_original": consulta_texto,
-            "analise": analise_resultados,
-            "visualizacoes": visualizacoes,
-            "mensagem": "Análise CSV concluída com sucesso."
-        }
+        return analise_resultados, visualizacoes
 
 # Exemplo de uso (para teste local)
 if __name__ == "__main__":
+    configurar_logs(formato="texto")
     agent_csv = AgentCSV()
     
     # Exemplo de URL de CSV do GitHub (SB_publication_PMC.csv)
@@ -263,6 +627,13 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Erro no teste do CSV local: {e}")
 
+    print("\n--- Testando prévia do CSV local ---")
+    resultado_previa = agent_csv.processar_consulta_csv(
+        consulta_texto="Prévia rápida do CSV de dados simulados",
+        csv_filepath=dummy_csv_path
+    )
+    print(json.dumps(resultado_previa["analise"].get("previa"), indent=2, cls=NumpyEncoder))
+
     # Limpar arquivos gerados (opcional)
     # import shutil
     # shutil.rmtree(agent_csv.data_dir)
@@ -5,21 +5,38 @@ Coordenador e interface principal do sistema multi-agente
 """
 
 import json
+import logging
+import os
 import re
 import datetime
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-from enum import Enum
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, replace
 
 # Importar os agentes especializados
 from agent_csv import AgentCSV, NumpyEncoder
 from agent_literatura import AgentLiteratura
 from agent_missoes import AgentMissoes
+from cache_respostas import CacheRespostas, chave_consulta
+from catalogo_datasets import catalogo_padrao, ID_PADRAO
+from coalescencia import SingleFlight
+from facetas import NOMES_FACETAS
+from grafo_conhecimento import grafo_padrao
+from instrumentacao import iniciar_trace, medir
+from logs import configurar_logs
+from resiliencia import PRAZO_CONSULTA_PADRAO, definir_prazo
+from registro_agentes import (
+    AgentType, ResultadoAgente, RegistroAgentes,
+    AgenteCSVRegistrado, AgenteLiteraturaRegistrado, AgenteMissoesRegistrado
+)
 
-class AgentType(Enum):
-    CSV = "csv"
-    LITERATURA = "literatura"
-    MISSOES = "missoes"
+logger = logging.getLogger(__name__)
+
+# Últimos resultados bem-sucedidos de cada agente, exibidos (como seção degradada)
+# quando uma nova execução falha ou não termina dentro do prazo da consulta
+CAPACIDADE_RESULTADOS_ANTERIORES = int(os.getenv("RESULTADOS_ANTERIORES_CAPACIDADE", "256"))
+VALIDADE_RESULTADOS_ANTERIORES = float(os.getenv("RESULTADOS_ANTERIORES_TTL_SEGUNDOS", "3600"))
 
 @dataclass
 class ConsultaUsuario:
@@ -28,18 +45,6 @@ class ConsultaUsuario:
     timestamp: str
     id_consulta: str
 
-@dataclass
-class ResultadoAgente:
-    """
-    Representa o resultado de um agente especializado
-    O campo 'dados' pode conter um dicionário com os resultados da análise,
-    incluindo caminhos para visualizações geradas.
-    """
-    agente_tipo: AgentType
-    dados: Dict[str, Any]
-    sucesso: bool
-    mensagem: str
-
 class AgentGeral:
     """
     Agent Geral - Coordenador principal do sistema multi-agente
@@ -53,19 +58,40 @@ class AgentGeral:
     
     def __init__(self):
         self.historico_consultas: List[ConsultaUsuario] = []
-        self.agentes_disponiveis = {
-            AgentType.CSV: "Agent Especialista em CSV (Data Analyst)",
-            AgentType.LITERATURA: "Agent Especialista em Literatura (Research Analyst)",
-            AgentType.MISSOES: "Agent Especialista em Missões (Mission Planner)"
-        }
         # Instanciar agentes especializados
         self.agent_csv = AgentCSV()
         self.agent_literatura = AgentLiteratura()
         self.agent_missoes = AgentMissoes()
+        # Catálogo dos CSVs que o Agent CSV pode analisar; cada consulta usa o mais relevante
+        self.catalogo = catalogo_padrao()
+        # Agentes disponíveis para o roteamento, cada um com sua política de execução;
+        # novos agentes são acrescentados com self.registro.registrar(...)
+        self.registro = RegistroAgentes()
+        self.registro.registrar(AgenteCSVRegistrado(self.agent_csv, self.catalogo))
+        self.registro.registrar(AgenteLiteraturaRegistrado(self.agent_literatura))
+        self.registro.registrar(AgenteMissoesRegistrado(self.agent_missoes))
+        # Consultas idênticas simultâneas compartilham uma única execução do pipeline
+        self._consultas_em_voo = SingleFlight()
+        # Painéis já gerados, por consulta normalizada e agentes roteados (LRU + TTL)
+        self.cache_respostas = CacheRespostas()
+        # Prazo de cada consulta (segundos), propagado a todos os agentes e downloads
+        self.prazo_consulta = PRAZO_CONSULTA_PADRAO
+        self.resultados_anteriores = CacheRespostas(CAPACIDADE_RESULTADOS_ANTERIORES, VALIDADE_RESULTADOS_ANTERIORES)
+        # Grafo de conhecimento ligando publicações, temas, hipóteses, missões e datasets
+        self.grafo = grafo_padrao()
+        self.grafo.registrar_datasets(self.catalogo.listar())
+        self.grafo.indexar_publicacoes(self.agent_literatura.publications_df, ID_PADRAO,
+                                       temas=self.agent_literatura.topicos.atribuicoes)
+
+    @property
+    def agentes_disponiveis(self) -> Dict[str, str]:
+        """Nome de cada agente registrado, por tipo."""
+        return {agente.tipo: agente.nome for agente in self.registro.agentes()}
         
-    def analisar_intencao(self, consulta: str) -> List[AgentType]:
+    def analisar_intencao(self, consulta: str) -> List[str]:
         """
         Analisa a intenção do usuário e determina quais agentes devem ser acionados
+        (os de pontuação positiva no registro; se nenhum, todos)
         
         Args:
             consulta: Texto da consulta do usuário
@@ -73,49 +99,9 @@ class AgentGeral:
         Returns:
             Lista de tipos de agentes que devem processar a consulta
         """
-        consulta_lower = consulta.lower()
-        agentes_necessarios = []
-        
-        # Palavras-chave para Agent CSV (Data Analyst)
-        palavras_csv = [
-            'dados', 'csv', 'estatística', 'análise', 'gráfico', 'tabela',
-            'tendência', 'padrão', 'números', 'dataset', 'planilha',
-            'visualização', 'correlação', 'média', 'distribuição'
-        ]
-        
-        # Palavras-chave para Agent Literatura (Research Analyst)
-        palavras_literatura = [
-            'artigo', 'pesquisa', 'literatura', 'paper', 'estudo',
-            'publicação', 'abstract', 'conclusão', 'hipótese',
-            'consenso', 'lacuna', 'conhecimento', 'científico',
-            'revista', 'autor', 'citação'
-        ]
-        
-        # Palavras-chave para Agent Missões (Mission Planner)
-        palavras_missoes = [
-            'missão', 'planejamento', 'risco', 'oportunidade',
-            'investimento', 'tecnologia', 'lunar', 'marciano',
-            'espacial', 'nasa', 'exploração', 'foguete',
-            'satélite', 'astronauta', 'rover'
-        ]
-        
-        # Verificar presença de palavras-chave
-        if any(palavra in consulta_lower for palavra in palavras_csv):
-            agentes_necessarios.append(AgentType.CSV)
-            
-        if any(palavra in consulta_lower for palavra in palavras_literatura):
-            agentes_necessarios.append(AgentType.LITERATURA)
-            
-        if any(palavra in consulta_lower for palavra in palavras_missoes):
-            agentes_necessarios.append(AgentType.MISSOES)
-        
-        # Se nenhum agente específico foi identificado, usar todos
-        if not agentes_necessarios:
-            agentes_necessarios = list(AgentType)
-            
-        return agentes_necessarios
+        return self.registro.rotear(consulta)
     
-    def rotear_consulta(self, consulta: ConsultaUsuario) -> Dict[AgentType, str]:
+    def rotear_consulta(self, consulta: ConsultaUsuario) -> Dict[str, str]:
         """
         Roteia a consulta para os agentes apropriados
         
@@ -137,7 +123,7 @@ class AgentGeral:
             
         return roteamento
     
-    def _adaptar_consulta_para_agente(self, consulta: str, agente_tipo: AgentType) -> str:
+    def _adaptar_consulta_para_agente(self, consulta: str, agente_tipo: str) -> str:
         """
         Adapta a consulta original para o contexto específico de cada agente
         
@@ -148,20 +134,57 @@ class AgentGeral:
         Returns:
             Consulta adaptada para o agente específico
         """
-        prefixos = {
-            AgentType.CSV: "Analise os dados CSV relacionados a: ",
-            AgentType.LITERATURA: "Busque na literatura científica informações sobre: ",
-            AgentType.MISSOES: "Forneça insights de planejamento de missões para: "
-        }
-        
-        return prefixos[agente_tipo] + consulta
+        return self.registro.obter(agente_tipo).adaptar_consulta(consulta)
     
-    def sintetizar_resultados(self, resultados: List[ResultadoAgente]) -> Dict[str, Any]:
+    def _executar_agente(self, agente_tipo: str, consulta_adaptada: str,
+                         registrar_uso: bool = True) -> ResultadoAgente:
+        """
+        Aciona um agente especializado, conforme a política de execução dele
+        no registro, e encapsula o resultado (ou o erro).
+
+        Args:
+            agente_tipo: Tipo do agente a ser acionado
+            consulta_adaptada: Consulta já adaptada para o agente
+            registrar_uso: Conta a execução nas estatísticas de uso dos dados
+                (False nas consultas de aquecimento)
+
+        Returns:
+            ResultadoAgente com os dados, o resultado anterior (degradado) ou a mensagem de erro
+        """
+        resultado = self.registro.executar(agente_tipo, consulta_adaptada, registrar_uso=registrar_uso)
+        return self._com_resultado_anterior(agente_tipo, consulta_adaptada, resultado)
+
+    def _com_resultado_anterior(self, agente_tipo: str, consulta_adaptada: str,
+                                resultado: ResultadoAgente) -> ResultadoAgente:
+        """
+        Guarda o resultado bem-sucedido do agente; se a execução falhou (erro,
+        tempo limite ou prazo da consulta), devolve o último resultado guardado
+        para a mesma tarefa, marcado como degradado, em vez de perder a seção.
+        """
+        if not self.registro.politica(agente_tipo).cache:
+            return resultado
+        chave = self._chave_lote(agente_tipo, consulta_adaptada)
+        if resultado.sucesso:
+            if not resultado.degradado:
+                obtido_em = datetime.datetime.now().isoformat(timespec="seconds")
+                self.resultados_anteriores.guardar(chave, (resultado, obtido_em))
+            return resultado
+        anterior = self.resultados_anteriores.obter(chave)
+        if anterior is None:
+            return resultado
+        resultado_anterior, obtido_em = anterior
+        logger.warning("%s Usando o resultado anterior de %s.", resultado.mensagem, obtido_em)
+        return replace(resultado_anterior, avisos=resultado_anterior.avisos + [
+            f"{resultado.mensagem} Exibindo o resultado anterior, obtido em {obtido_em}."
+        ])
+
+    def sintetizar_resultados(self, resultados: List[ResultadoAgente], consulta_texto: Optional[str] = None) -> Dict[str, Any]:
         """
         Combina e sintetiza os resultados dos agentes especializados
         
         Args:
             resultados: Lista de resultados dos agentes
+            consulta_texto: Consulta original, usada nas conexões do grafo de conhecimento
             
         Returns:
             Resultado sintetizado e formatado
@@ -171,22 +194,29 @@ class AgentGeral:
             "resultados_por_agente": {},
             "insights_combinados": [],
             "recomendacoes": [],
-            "dados_suporte": {}
+            "dados_suporte": {},
+            "conexoes_grafo": []
         }
         
         # Processar resultados de cada agente
         for resultado in resultados:
             if resultado.sucesso:
-                sintese["resultados_por_agente"][resultado.agente_tipo.value] = {
+                sintese["resultados_por_agente"][str(resultado.agente_tipo)] = {
                     "dados": resultado.dados,
-                    "status": "sucesso"
+                    "status": "degradado" if resultado.degradado else "sucesso",
+                    "avisos": resultado.avisos
                 }
             else:
-                sintese["resultados_por_agente"][resultado.agente_tipo.value] = {
+                sintese["resultados_por_agente"][str(resultado.agente_tipo)] = {
                     "erro": resultado.mensagem,
                     "status": "erro"
                 }
         
+        # Publicações ligadas às missões e temas da consulta, por percurso no grafo
+        if consulta_texto:
+            with medir("grafo_conexoes"):
+                sintese["conexoes_grafo"] = self.grafo.conexoes(consulta_texto)
+
         # Gerar insights combinados
         sintese["insights_combinados"] = self._gerar_insights_combinados(resultados)
         
@@ -250,11 +280,14 @@ class AgentGeral:
         """
         agentes_executados = len(resultados)
         agentes_sucesso = len([r for r in resultados if r.sucesso])
+        agentes_degradados = len([r for r in resultados if r.sucesso and r.degradado])
         
         resumo = f"Análise executada por {agentes_executados} agentes especializados. "
         resumo += f"{agentes_sucesso} agentes retornaram resultados com sucesso. "
+        if agentes_degradados:
+            resumo += f"{agentes_degradados} deles com resultados degradados (ver avisos). "
         
-        if agentes_sucesso == agentes_executados:
+        if agentes_sucesso == agentes_executados and not agentes_degradados:
             resumo += "Análise completa realizada com êxito."
         elif agentes_sucesso > 0:
             resumo += "Análise parcial realizada com alguns resultados disponíveis."
@@ -284,21 +317,52 @@ class AgentGeral:
 '''
         
         for agente, resultado in sintese["resultados_por_agente"].items():
-            status_icon = "✅" if resultado["status"] == "sucesso" else "❌"
+            status_icon = {"sucesso": "✅", "degradado": "⚠️"}.get(resultado["status"], "❌")
             painel += f"- **{agente.upper()}** {status_icon}\n"
-            if "visualizacoes" in resultado["dados"] and resultado["dados"]["visualizacoes"]:
+            if resultado["status"] == "erro":
+                painel += f"  Erro: {resultado['erro']}\n"
+                continue
+            for aviso in resultado.get("avisos", []):
+                painel += f"  ⚠️ Seção degradada: {aviso}\n"
+            dados = resultado["dados"]
+            if dados.get("dataset"):
+                painel += f"  Dataset: {dados['dataset']['nome']}\n"
+            if dados.get("incremental"):
+                info = dados["incremental"]
+                painel += f"  Estatísticas incrementais: {info['linhas_novas']} linhas novas, {info['linhas_total']} no total"
+                painel += " (recálculo completo)\n" if info["modo"] == "completo" else "\n"
+            if dados.get("visualizacoes_web"):
+                # Miniatura (ou data URI) com link para a imagem completa servida pela API
+                painel += "  Visualizações geradas:\n"
+                for viz in dados["visualizacoes_web"]:
+                    painel += f"  - [![{viz['nome']}]({viz.get('inline', viz['miniatura'])})]({viz['completo']})\n"
+            elif "visualizacoes" in dados and dados["visualizacoes"]:
                 painel += "  Visualizações geradas:\n"
-                for viz_path in resultado["dados"]["visualizacoes"]:
+                for viz_path in dados["visualizacoes"]:
                     painel += f"  - ![]({viz_path})\n"
             
+            # Adicionar os pares de colunas mais correlacionados, se disponíveis
+            if agente == AgentType.CSV.value and dados.get("analise", {}).get("correlacoes"):
+                pares = dados["analise"]["correlacoes"]["pares_mais_correlacionados"].get("pearson", [])
+                if pares:
+                    painel += "  Colunas mais correlacionadas (Pearson):\n"
+                    for par in pares[:5]:
+                        painel += f"  - {par['coluna_a']} x {par['coluna_b']}: {par['correlacao']:.2f}\n"
+
             # Adicionar detalhes da análise de literatura, se disponível
-            if agente == AgentType.LITERATURA.value and "analise_literatura" in resultado["dados"]:
-                lit_analise = resultado["dados"]["analise_literatura"]
+            if agente == AgentType.LITERATURA.value and "analise_literatura" in dados:
+                lit_analise = dados["analise_literatura"]
                 painel += "  Análise de Literatura:\n"
                 if lit_analise.get("temas_principais"):
                     painel += "    Temas Principais:\n"
                     for tema, count in lit_analise["temas_principais"].items():
                         painel += "      - {} ({} artigos)\n".format(tema.replace("_", " ").title(), count)
+                if dados.get("publicacoes_encontradas"):
+                    painel += "    Publicações do Corpus por Faceta ({} encontradas):\n".format(dados["publicacoes_encontradas"])
+                    for faceta, contagens in dados["facetas"].items():
+                        if contagens:
+                            valores = ", ".join(f"{valor} ({count})" for valor, count in list(contagens.items())[:5])
+                            painel += f"      - {NOMES_FACETAS.get(faceta, faceta)}: {valores}\n"
                 if lit_analise.get("lacunas_potenciais"):
                     painel += "    Lacunas Potenciais:\n"
                     for lacuna in lit_analise["lacunas_potenciais"]:
@@ -313,8 +377,8 @@ class AgentGeral:
                         painel += f"      - {hip}\n"
             
             # Adicionar detalhes da análise de missões, se disponível
-            if agente == AgentType.MISSOES.value and "analise_riscos_oportunidades" in resultado["dados"]:
-                missoes_analise = resultado["dados"]
+            if agente == AgentType.MISSOES.value and "analise_riscos_oportunidades" in dados:
+                missoes_analise = dados
                 painel += "  Análise de Missões:\n"
                 painel += "    Riscos:\n"
                 for risco in missoes_analise["analise_riscos_oportunidades"]["riscos"]:
@@ -338,6 +402,15 @@ class AgentGeral:
                 for rec_nec in missoes_analise["plano_missao"]["recursos_necessarios"]:
                     painel += f"      - {rec_nec}\n"
 
+        conexoes = [c for c in sintese.get("conexoes_grafo", []) if c["publicacoes"]]
+        if conexoes:
+            painel += "\n## 🔗 Conexões do Grafo de Conhecimento\n"
+            for conexao in conexoes:
+                tema = conexao["tema"].replace("_", " ") if conexao["tema"] else "todos os temas"
+                painel += f"- **{conexao['missao'].title()}** ({tema}): {len(conexao['publicacoes'])} publicações relevantes\n"
+                for publicacao in conexao["publicacoes"][:5]:
+                    painel += f"  - [{publicacao['titulo']}]({publicacao['link']})\n"
+
         painel += f'''
 
 ## 💡 Insights Combinados
@@ -366,90 +439,189 @@ class AgentGeral:
         Returns:
             Resultado formatado da análise
         """
-        
-        # Criar objeto de consulta
-        consulta = ConsultaUsuario(
-            texto=texto_consulta,
-            timestamp=datetime.datetime.now().isoformat(),
-            id_consulta=f"consulta_{len(self.historico_consultas) + 1}"
-        )
-        
-        # Adicionar ao histórico
-        self.historico_consultas.append(consulta)
-        
+        with iniciar_trace("processar_consulta"), definir_prazo(self.prazo_consulta):
+            # Criar objeto de consulta
+            consulta = ConsultaUsuario(
+                texto=texto_consulta,
+                timestamp=datetime.datetime.now().isoformat(),
+                id_consulta=f"consulta_{len(self.historico_consultas) + 1}"
+            )
+            
+            # Adicionar ao histórico
+            self.historico_consultas.append(consulta)
+
+            chave, versao = self._chave_cache(texto_consulta)
+            painel = self.cache_respostas.obter(chave, versao)
+            if painel is not None:
+                logger.debug("Consulta %s respondida pelo cache.", consulta.id_consulta)
+                return painel
+
+            # Consultas idênticas em andamento são coalescidas em uma só execução
+            painel, compartilhado = self._consultas_em_voo.executar(
+                self.normalizar_consulta(texto_consulta), self._executar_consulta, consulta
+            )
+            if compartilhado:
+                logger.debug("Consulta %s coalescida com execução em andamento.", consulta.id_consulta)
+            return painel
+
+    @staticmethod
+    def normalizar_consulta(texto_consulta: str) -> str:
+        """
+        Normaliza o texto da consulta (caixa e espaços) para identificar consultas idênticas.
+        """
+        return " ".join(texto_consulta.lower().split())
+
+    def _executar_consulta(self, consulta: ConsultaUsuario) -> str:
+        """
+        Executa o pipeline completo (roteamento, agentes, síntese e painel)
+        para uma consulta, dentro do trace aberto por processar_consulta.
+        """
         # Rotear consulta
-        roteamento = self.rotear_consulta(consulta)
-        
-        resultados_agentes = []
-        github_csv_url = "https://raw.githubusercontent.com/jgalazka/SB_publications/main/SB_publication_PMC.csv"
-
-        for agente_tipo, consulta_adaptada in roteamento.items():
-            if agente_tipo == AgentType.CSV:
-                print(f"Agent Geral: Acionando Agent CSV com consulta: {consulta_adaptada}")
-                try:
-                    # Para o Agent CSV, usaremos o CSV do GitHub como exemplo
-                    csv_result = self.agent_csv.processar_consulta_csv(
-                        consulta_texto=consulta_adaptada,
-                        csv_url=github_csv_url
-                    )
-                    resultados_agentes.append(ResultadoAgente(
-                        agente_tipo=AgentType.CSV,
-                        dados=csv_result,
-                        sucesso=True,
-                        mensagem="Análise CSV concluída."
-                    ))
-                except Exception as e:
-                    resultados_agentes.append(ResultadoAgente(
-                        agente_tipo=AgentType.CSV,
-                        dados={},
-                        sucesso=False,
-                        mensagem=f"Erro ao executar Agent CSV: {e}"
-                    ))
-            elif agente_tipo == AgentType.LITERATURA:
-                print(f"Agent Geral: Acionando Agent Literatura com consulta: {consulta_adaptada}")
-                try:
-                    lit_result = self.agent_literatura.processar_consulta_literatura(consulta_adaptada)
-                    resultados_agentes.append(ResultadoAgente(
-                        agente_tipo=AgentType.LITERATURA,
-                        dados=lit_result,
-                        sucesso=True,
-                        mensagem="Pesquisa de literatura concluída."
-                    ))
-                except Exception as e:
-                    resultados_agentes.append(ResultadoAgente(
-                        agente_tipo=AgentType.LITERATURA,
-                        dados={},
-                        sucesso=False,
-                        mensagem=f"Erro ao executar Agent Literatura: {e}"
-                    ))
-            elif agente_tipo == AgentType.MISSOES:
-                print(f"Agent Geral: Acionando Agent Missões com consulta: {consulta_adaptada}")
-                try:
-                    missoes_result = self.agent_missoes.processar_consulta_missoes(consulta_adaptada)
-                    resultados_agentes.append(ResultadoAgente(
-                        agente_tipo=AgentType.MISSOES,
-                        dados=missoes_result,
-                        sucesso=True,
-                        mensagem="Planejamento de missões concluído."
-                    ))
-                except Exception as e:
-                    resultados_agentes.append(ResultadoAgente(
-                        agente_tipo=AgentType.MISSOES,
-                        dados={},
-                        sucesso=False,
-                        mensagem=f"Erro ao executar Agent Missões: {e}"
-                    ))
+        with medir("roteamento"):
+            roteamento = self.rotear_consulta(consulta)
+        
+        # Agentes em paralelo, cada um limitado pelo prazo da consulta
+        pedidos = list(roteamento.items())
+        resultados_agentes = [
+            self._com_resultado_anterior(agente_tipo, consulta_adaptada, resultado)
+            for (agente_tipo, consulta_adaptada), resultado in zip(pedidos, self.registro.executar_varios(pedidos))
+        ]
+        with medir("grafo_registro"):
+            self._registrar_no_grafo(resultados_agentes)
         
         # Sintetizar resultados
-        sintese = self.sintetizar_resultados(resultados_agentes)
+        with medir("sintese"):
+            sintese = self.sintetizar_resultados(resultados_agentes, consulta.texto)
         
         # Gerar painel dinâmico
-        painel = self.gerar_painel_dinamico(sintese)
+        with medir("painel"):
+            painel = self.gerar_painel_dinamico(sintese)
+
+        # Só painéis completos e sem seções degradadas vão para o cache (uma falha de
+        # agente pode ser transitória), e apenas se a política de todos os agentes permitir
+        if all(r.sucesso and not r.degradado and self.registro.politica(r.agente_tipo).cache
+               for r in resultados_agentes):
+            chave, versao = self._chave_cache(consulta.texto)
+            self.cache_respostas.guardar(chave, painel, versao)
         
         return painel
 
+    def _registrar_no_grafo(self, resultados: List[ResultadoAgente]):
+        """
+        Acrescenta ao grafo de conhecimento as publicações, hipóteses e relações
+        tema-missão dos resultados bem-sucedidos.
+        """
+        for resultado in resultados:
+            if not resultado.sucesso:
+                continue
+            try:
+                if resultado.agente_tipo == AgentType.LITERATURA:
+                    self.grafo.registrar_literatura(resultado.dados)
+                elif resultado.agente_tipo == AgentType.MISSOES:
+                    self.grafo.registrar_missoes(resultado.dados)
+            except Exception as e:
+                logger.warning("Não foi possível registrar o resultado do agente %s no grafo: %s",
+                               resultado.agente_tipo, e)
+
+    def _chave_cache(self, texto_consulta: str) -> Tuple[Tuple, str]:
+        """
+        Chave do cache de respostas (texto normalizado e agentes roteados) e a
+        versão dos dados de que a resposta depende (ex.: o dataset CSV escolhido).
+        """
+        agentes = self.analisar_intencao(texto_consulta)
+        versao = "|".join(
+            v for v in (self.registro.obter(agente_tipo).versao_dados(texto_consulta) for agente_tipo in agentes) if v
+        )
+        return chave_consulta(texto_consulta, tuple(str(a) for a in agentes)), versao
+
+    def processar_lote(self, textos_consulta: List[str], max_workers: int = 8) -> List[Dict[str, str]]:
+        """
+        Processa várias consultas em uma única chamada.
+
+        As consultas são roteadas de uma vez e agrupadas por agente. Trabalho
+        equivalente é executado uma única vez para todo o lote (o dataset CSV é
+        baixado e analisado uma vez; consultas adaptadas idênticas são
+        deduplicadas) e os agentes rodam em paralelo.
+
+        Args:
+            textos_consulta: Lista de textos de consulta
+            max_workers: Número máximo de execuções de agentes em paralelo
+
+        Returns:
+            Lista, na ordem de entrada, com id, texto e painel de cada consulta
+        """
+        with iniciar_trace("processar_lote", tamanho=len(textos_consulta)), definir_prazo(self.prazo_consulta):
+            consultas = []
+            for texto_consulta in textos_consulta:
+                consulta = ConsultaUsuario(
+                    texto=texto_consulta,
+                    timestamp=datetime.datetime.now().isoformat(),
+                    id_consulta=f"consulta_{len(self.historico_consultas) + 1}"
+                )
+                self.historico_consultas.append(consulta)
+                consultas.append(consulta)
+
+            with medir("roteamento", tamanho=len(consultas)):
+                roteamentos = [self.rotear_consulta(consulta) for consulta in consultas]
+
+            # Agrupar por agente: cada tarefa distinta é executada uma única vez
+            tarefas: Dict[Tuple[str, str], str] = {}
+            for roteamento in roteamentos:
+                for agente_tipo, consulta_adaptada in roteamento.items():
+                    tarefas.setdefault(self._chave_lote(agente_tipo, consulta_adaptada), consulta_adaptada)
+            logger.info("Lote com %d consultas resultou em %d execuções de agentes.", len(consultas), len(tarefas))
+
+            resultados_unicos: Dict[Tuple[str, str], ResultadoAgente] = {}
+            if tarefas:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(tarefas))) as executor:
+                    futuros = {
+                        chave: executor.submit(contextvars.copy_context().run, self._executar_agente, chave[0], consulta_adaptada)
+                        for chave, consulta_adaptada in tarefas.items()
+                    }
+                    for chave, futuro in futuros.items():
+                        resultados_unicos[chave] = futuro.result()
+            with medir("grafo_registro"):
+                self._registrar_no_grafo(list(resultados_unicos.values()))
+
+            respostas = []
+            for consulta, roteamento in zip(consultas, roteamentos):
+                resultados_agentes = [
+                    self._resultado_para_consulta(
+                        resultados_unicos[self._chave_lote(agente_tipo, consulta_adaptada)], consulta_adaptada
+                    )
+                    for agente_tipo, consulta_adaptada in roteamento.items()
+                ]
+                with medir("sintese"):
+                    sintese = self.sintetizar_resultados(resultados_agentes, consulta.texto)
+                with medir("painel"):
+                    painel = self.gerar_painel_dinamico(sintese)
+                respostas.append({
+                    "id_consulta": consulta.id_consulta,
+                    "consulta": consulta.texto,
+                    "painel": painel
+                })
+            return respostas
+
+    def _chave_lote(self, agente_tipo: str, consulta_adaptada: str) -> Tuple[str, str]:
+        """
+        Chave de compartilhamento de trabalho dentro de um lote, definida por
+        cada agente (o Agent CSV, por exemplo, depende apenas do dataset
+        escolhido e do modo).
+        """
+        return (agente_tipo, self.registro.obter(agente_tipo).chave_lote(consulta_adaptada))
+
+    @staticmethod
+    def _resultado_para_consulta(resultado: ResultadoAgente, consulta_adaptada: str) -> ResultadoAgente:
+        """
+        Adapta um resultado compartilhado no lote para uma consulta específica.
+        """
+        if resultado.sucesso and resultado.dados.get("consulta_original") not in (None, consulta_adaptada):
+            return replace(resultado, dados={**resultado.dados, "consulta_original": consulta_adaptada})
+        return resultado
+
 # Exemplo de uso
 if __name__ == "__main__":
+    configurar_logs(formato="texto")
     agent = AgentGeral()
     
     # Teste com consulta exemplo
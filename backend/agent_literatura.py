@@ -11,6 +11,47 @@ import re
 from typing import Dict, Any, List, Optional
 import os
 import json
+import logging
+
+from busca_fragmentada import IndiceFragmentado, TOP_K_PADRAO
+from facetas import IndiceFacetas
+from logs import configurar_logs
+from topicos import topicos_do_corpus
+
+logger = logging.getLogger(__name__)
+
+# CSV de publicações do SB_publications (pode ser redirecionado, ex.: para um servidor local)
+GITHUB_CSV_URL = os.getenv(
+    "SB_PUBLICATIONS_CSV_URL",
+    "https://raw.githubusercontent.com/jgalazka/SB_publications/main/SB_publication_PMC.csv"
+)
+
+# Temas de referência e as palavras-chave (português e inglês, pois os títulos do
+# SB_publications são em inglês) que os indicam no título ou no abstract. As publicações do
+# corpus recebem temas pré-calculados (ver topicos); estes nomeiam os tópicos correspondentes
+# e classificam os artigos de fora do corpus
+TEMAS_LITERATURA = {
+    "exploracao_marte": ("marte", "mars"),
+    "microgravidade": ("microgravidade", "microgravity"),
+    "radiacao_espacial": ("radiação", "radiation"),
+    "biologia_espacial": ("biologia", "life sciences", "biology"),
+}
+
+
+def identificar_temas(texto: str) -> List[str]:
+    """
+    Temas de TEMAS_LITERATURA mencionados no texto.
+    """
+    texto = texto.lower()
+    return [tema for tema, palavras in TEMAS_LITERATURA.items() if any(p in texto for p in palavras)]
+
+
+def extrair_hipoteses(abstract: str) -> List[str]:
+    """
+    Hipóteses enunciadas no abstract ("Hipótese: ...").
+    """
+    return [hip.strip().capitalize() for hip in re.findall(r"hipótese:([^.]+)", abstract.lower())]
+
 
 class AgentLiteratura:
     """
@@ -24,9 +65,31 @@ class AgentLiteratura:
     """
     
     def __init__(self):
-        self.github_csv_url = "https://raw.githubusercontent.com/jgalazka/SB_publications/main/SB_publication_PMC.csv"
+        self.github_csv_url = GITHUB_CSV_URL
         self.nslsl_search_url = "https://extapps.ksc.nasa.gov/NSLSL/Search#"
-        self.publications_df = self._load_github_publications()
+        self.indice: Optional[IndiceFragmentado] = None
+        self.carregar_corpus(self._load_github_publications())
+
+    def carregar_corpus(self, publicacoes: pd.DataFrame):
+        """
+        Define o corpus de publicações e reconstrói o que é derivado dele:
+        índice de busca, temas e facetas. O índice anterior é fechado.
+
+        Args:
+            publicacoes: DataFrame com as colunas Title e Link (e, opcionalmente, Abstract).
+        """
+        textos = self._textos_publicacoes(publicacoes)
+        # Busca por termo no título (e no abstract, se o CSV tiver) das publicações;
+        # com LITERATURA_FRAGMENTOS > 0, dividida entre processos (ver busca_fragmentada)
+        indice = IndiceFragmentado(textos)
+        # Temas de cada publicação, calculados uma vez por corpus e salvos em disco
+        topicos = topicos_do_corpus(textos, TEMAS_LITERATURA)
+        # Ano, periódico, organismo e tema de cada publicação, para contar e filtrar resultados
+        facetas = IndiceFacetas.do_corpus(publicacoes, textos, topicos.atribuicoes)
+        anterior = self.indice
+        self.publications_df, self.indice, self.topicos, self.facetas = publicacoes, indice, topicos, facetas
+        if anterior is not None:
+            anterior.fechar()
 
     def _load_github_publications(self) -> pd.DataFrame:
         """
@@ -34,18 +97,61 @@ class AgentLiteratura:
         """
         try:
             df = pd.read_csv(self.github_csv_url)
-            print("CSV de publicações do GitHub carregado com sucesso.")
+            logger.info("CSV de publicações do GitHub carregado com sucesso.")
             return df
         except Exception as e:
-            print(f"Erro ao carregar CSV do GitHub: {e}")
+            logger.error("Erro ao carregar CSV do GitHub: %s", e)
             return pd.DataFrame(columns=["Title", "Link"])
 
-    def buscar_nslsl_simulado(self, termo_busca: str) -> List[Dict[str, str]]:
+    @staticmethod
+    def _textos_publicacoes(publicacoes: pd.DataFrame) -> List[str]:
+        """
+        Texto pesquisável de cada publicação, na ordem do DataFrame.
+        """
+        colunas = [c for c in ("Title", "Abstract") if c in publicacoes.columns]
+        if not colunas:
+            return [""] * len(publicacoes)
+        return publicacoes[colunas].fillna("").astype(str).agg(" ".join, axis=1).tolist()
+
+    def fechar(self):
+        self.indice.fechar()
+
+    def buscar_corpus(self, termo_busca: str, filtros: Optional[Dict[str, str]] = None) -> List[int]:
+        """
+        Posições em publications_df de todas as publicações que contêm o termo,
+        da mais à menos relevante, restritas aos valores de faceta pedidos.
+        """
+        indices = self.indice.buscar(termo_busca, k=0)
+        return self.facetas.filtrar(indices, filtros) if filtros else indices
+
+    def consultar_facetas(self, termo_busca: str = "", filtros: Optional[Dict[str, str]] = None,
+                          limite: int = 20) -> Dict[str, Any]:
+        """
+        Distribuição por faceta das publicações do GitHub que contêm o termo (todas,
+        se vazio) e têm os valores de faceta pedidos, com as mais relevantes.
+        """
+        indices = self.buscar_corpus(termo_busca, filtros)
+        publicacoes = self.publications_df.iloc[indices[:limite]]
+        return {
+            "total": len(indices),
+            "facetas": self.facetas.contar(indices),
+            "publicacoes": [
+                {"titulo": row["Title"], "link": row["Link"], "temas": self.topicos.atribuicoes[posicao]}
+                for posicao, (_, row) in zip(indices, publicacoes.iterrows())
+            ],
+        }
+
+    def buscar_nslsl_simulado(self, termo_busca: str, correspondencias: Optional[List[int]] = None) -> List[Dict[str, str]]:
         """
         Simula a busca na NSLSL. Em um ambiente real, isso envolveria web scraping ou API.
         Aqui, retornamos resultados baseados em palavras-chave.
+
+        Args:
+            termo_busca: Termo procurado.
+            correspondencias: Publicações do GitHub já encontradas (ver buscar_corpus);
+                sem elas, a busca é feita aqui. Só as TOP_K_PADRAO primeiras entram.
         """
-        print(f"Simulando busca na NSLSL para: {termo_busca}")
+        logger.debug("Simulando busca na NSLSL para: %s", termo_busca)
         resultados_simulados = []
         termo_lower = termo_busca.lower()
 
@@ -75,16 +181,20 @@ class AgentLiteratura:
                 "abstract": "Recentes descobertas e direções futuras na pesquisa de biologia espacial. Conclui-se que a pesquisa em genômica é fundamental. Hipótese: Organismos extremófilos podem sobreviver em Marte."
             })
         
-        # Filtrar publicações do GitHub que contenham o termo de busca no título
+        # Publicações do GitHub que contenham o termo de busca, das mais relevantes às menos (top-k)
         if not self.publications_df.empty:
-            github_matches = self.publications_df[self.publications_df["Title"].str.lower().str.contains(termo_lower, na=False)]
-            for index, row in github_matches.iterrows():
+            if correspondencias is None:
+                correspondencias = self.buscar_corpus(termo_lower)
+            indices = correspondencias[:TOP_K_PADRAO] if TOP_K_PADRAO else correspondencias
+            github_matches = self.publications_df.iloc[indices]
+            for posicao, (index, row) in zip(indices, github_matches.iterrows()):
                 # Adicionar um abstract simulado para as publicações do GitHub
                 simulated_abstract = "Abstract simulado para a publicação: {}. Este artigo aborda aspectos de biologia espacial e seus impactos. Conclui-se que mais estudos são necessários. Hipótese: Dados de microgravidade são cruciais.".format(row["Title"])
                 resultados_simulados.append({
                     "titulo": row["Title"],
                     "link": row["Link"],
-                    "abstract": simulated_abstract
+                    "abstract": simulated_abstract,
+                    "temas": self.topicos.atribuicoes[posicao]
                 })
 
         return resultados_simulados
@@ -93,7 +203,7 @@ class AgentLiteratura:
         """
         Analisa os resultados da busca, extraindo informações chave.
         """
-        print("Analisando literatura...")
+        logger.debug("Analisando literatura...")
         analise = {
             "total_artigos_encontrados": len(resultados_busca),
             "temas_principais": {},
@@ -106,24 +216,18 @@ class AgentLiteratura:
             abstract = artigo.get("abstract", "").lower()
             titulo = artigo.get("titulo", "").lower()
 
-            # Identificar temas principais (exemplo simples)
-            if "marte" in abstract or "marte" in titulo:
-                analise["temas_principais"]["exploracao_marte"] = analise["temas_principais"].get("exploracao_marte", 0) + 1
-            if "microgravidade" in abstract or "microgravidade" in titulo:
-                analise["temas_principais"]["microgravidade"] = analise["temas_principais"].get("microgravidade", 0) + 1
-            if "radiação" in abstract or "radiação" in titulo:
-                analise["temas_principais"]["radiacao_espacial"] = analise["temas_principais"].get("radiacao_espacial", 0) + 1
-            if "biologia" in abstract or "biologia" in titulo or "life sciences" in abstract or "life sciences" in titulo:
-                analise["temas_principais"]["biologia_espacial"] = analise["temas_principais"].get("biologia_espacial", 0) + 1
+            # Temas principais: pré-calculados para as publicações do corpus
+            temas = artigo["temas"] if "temas" in artigo else identificar_temas(titulo + " " + abstract)
+            for tema in temas:
+                analise["temas_principais"][tema] = analise["temas_principais"].get(tema, 0) + 1
 
             # Extrair conclusões e hipóteses (simulado com regex)
             conclusoes = re.findall(r"conclui-se que([^.]+)", abstract)
             for conc in conclusoes:
                 analise["conclusoes_extraidas"].append("Em '{}': {}. ".format(artigo['titulo'], conc.strip().capitalize()))
             
-            hipoteses = re.findall(r"hipótese:([^.]+)", abstract)
-            for hip in hipoteses:
-                analise["hipoteses_mencionadas"].append("Em '{}': {}. ".format(artigo['titulo'], hip.strip().capitalize()))
+            for hip in extrair_hipoteses(abstract):
+                analise["hipoteses_mencionadas"].append("Em '{}': {}. ".format(artigo['titulo'], hip))
 
         # Identificar lacunas potenciais (simulado)
         if not analise["temas_principais"].get("microgravidade"):
@@ -133,23 +237,27 @@ class AgentLiteratura:
         if not analise["temas_principais"].get("exploracao_marte"):
             analise["lacunas_potenciais"].append("Aprofundar estudos sobre a viabilidade de habitats em Marte.")
 
-        print("Análise de literatura concluída.")
+        logger.debug("Análise de literatura concluída.")
         return analise
 
-    def processar_consulta_literatura(self, consulta_texto: str) -> Dict[str, Any]:
+    def processar_consulta_literatura(self, consulta_texto: str, filtros: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         Processa uma consulta relacionada à literatura científica.
         
         Args:
             consulta_texto: A consulta do usuário.
+            filtros: Valores de faceta exigidos nas publicações do GitHub (ex.: {"organismo": "camundongo"}).
             
         Returns:
-            Dicionário com os resultados da análise da literatura.
+            Dicionário com os resultados da análise da literatura e, em 'facetas',
+            a distribuição de todas as publicações do GitHub encontradas por ano,
+            periódico, organismo e tema.
         """
-        print(f"Processando consulta de literatura: {consulta_texto}")
+        logger.info("Processando consulta de literatura: %s", consulta_texto)
         
         # 1. Buscar na NSLSL (simulado) e no GitHub
-        resultados_busca = self.buscar_nslsl_simulado(consulta_texto)
+        correspondencias = self.buscar_corpus(consulta_texto, filtros)
+        resultados_busca = self.buscar_nslsl_simulado(consulta_texto, correspondencias)
         
         # 2. Analisar os resultados
         analise_literatura = self.analisar_literatura(resultados_busca)
@@ -159,11 +267,14 @@ class AgentLiteratura:
             "consulta_original": consulta_texto,
             "resultados_busca": resultados_busca,
             "analise_literatura": analise_literatura,
+            "publicacoes_encontradas": len(correspondencias),
+            "facetas": self.facetas.contar(correspondencias),
             "mensagem": "Análise de literatura concluída com sucesso."
         }
 
 # Exemplo de uso (para teste local)
 if __name__ == "__main__":
+    configurar_logs(formato="texto")
     agent_literatura = AgentLiteratura()
     
     print("\n--- Testando com consulta sobre microgravidade ---")
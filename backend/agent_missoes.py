@@ -5,8 +5,13 @@ Insights acionáveis para planejamento
 """
 
 import json
+import logging
 from typing import Dict, Any, List, Optional
 
+from logs import configurar_logs
+
+logger = logging.getLogger(__name__)
+
 class AgentMissoes:
     """
     Agent Especialista em Missões - Insights acionáveis para planejamento
@@ -25,7 +30,7 @@ class AgentMissoes:
         """
         Simula a análise de riscos e oportunidades para missões espaciais.
         """
-        print(f"Analisando riscos e oportunidades para: {consulta}")
+        logger.debug("Analisando riscos e oportunidades para: %s", consulta)
         riscos = []
         oportunidades = []
         consulta_lower = consulta.lower()
@@ -52,7 +57,7 @@ class AgentMissoes:
         """
         Simula recomendações de investimento em tecnologias espaciais.
         """
-        print(f"Recomendando investimentos para: {consulta}")
+        logger.debug("Recomendando investimentos para: %s", consulta)
         recomendacoes = []
         consulta_lower = consulta.lower()
 
@@ -74,7 +79,7 @@ class AgentMissoes:
         """
         Simula a identificação de tecnologias promissoras.
         """
-        print(f"Identificando tecnologias promissoras para: {consulta}")
+        logger.debug("Identificando tecnologias promissoras para: %s", consulta)
         tecnologias = []
         consulta_lower = consulta.lower()
 
@@ -97,7 +102,7 @@ class AgentMissoes:
         """
         Simula o planejamento de uma missão lunar/marciana.
         """
-        print(f"Planejando missão para: {consulta}")
+        logger.debug("Planejando missão para: %s", consulta)
         plano = {"fases": [], "objetivos": [], "recursos_necessarios": []}
         consulta_lower = consulta.lower()
 
@@ -149,7 +154,7 @@ class AgentMissoes:
         Returns:
             Dicionário com os resultados da análise de missões.
         """
-        print(f"Processando consulta de missões: {consulta_texto}")
+        logger.info("Processando consulta de missões: %s", consulta_texto)
         
         riscos_oportunidades = self.analisar_riscos_oportunidades(consulta_texto)
         recomendacoes_investimento = self.recomendar_investimentos(consulta_texto)
@@ -168,6 +173,7 @@ class AgentMissoes:
 
 # Exemplo de uso (para teste local)
 if __name__ == "__main__":
+    configurar_logs(formato="texto")
     agent_missoes = AgentMissoes()
     
     print("\n--- Testando com consulta sobre missão a Marte ---")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Amostragem de CSVs para o modo prévia
+Lê uma amostra limitada de linhas (offsets de bytes aleatórios ou reservatório)
+e calcula estatísticas aproximadas com intervalos de confiança
+"""
+
+import io
+import logging
+import math
+import os
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LINHAS_AMOSTRA = int(os.getenv("PREVIA_LINHAS_AMOSTRA", "10000"))
+# Arquivos até este tamanho são lidos por inteiro (a "amostra" é o dataset todo)
+LIMITE_LEITURA_COMPLETA = int(os.getenv("PREVIA_LIMITE_LEITURA_COMPLETA", str(8 * 1024 * 1024)))
+# Linhas por bloco na amostragem por reservatório
+TAMANHO_BLOCO_RESERVATORIO = 100_000
+
+
+@dataclass
+class Amostra:
+    """Amostra de linhas de um CSV e o que se sabe sobre o arquivo completo"""
+    df: pd.DataFrame
+    metodo: str  # 'completo', 'offsets' ou 'reservatorio'
+    tamanho_bytes: int
+    linhas_estimadas: float
+    ic_linhas: Tuple[float, float]
+
+    @property
+    def exata(self) -> bool:
+        return self.metodo == "completo"
+
+
+def _ler_linhas_por_offsets(filepath: str, inicio_dados: int, tamanho: int, n_linhas: int,
+                            rng: np.random.Generator) -> List[bytes]:
+    """
+    Sorteia offsets uniformes na região de dados e, para cada um, lê a primeira
+    linha completa que começa depois dele. O custo é proporcional a n_linhas,
+    não ao tamanho do arquivo. A linha escolhida tem probabilidade proporcional
+    ao tamanho da linha anterior, o que é desprezível quando o tamanho das
+    linhas não depende dos valores.
+    """
+    offsets = np.sort(rng.integers(inicio_dados, tamanho, size=n_linhas))
+    linhas: Dict[int, bytes] = {}
+    with open(filepath, "rb") as f:
+        for offset in offsets:
+            # Recuar um byte permite sortear a primeira linha de dados
+            f.seek(int(offset) - 1)
+            f.readline()
+            posicao = f.tell()
+            if posicao >= tamanho or posicao in linhas:
+                continue
+            linha = f.readline()
+            if linha.strip():
+                linhas[posicao] = linha if linha.endswith(b"\n") else linha + b"\n"
+    return list(linhas.values())
+
+
+def amostrar_por_offsets(filepath: str, n_linhas: int = LINHAS_AMOSTRA, semente: Optional[int] = None) -> Amostra:
+    """
+    Amostra linhas de um CSV por offsets de bytes aleatórios, em tempo limitado.
+
+    Arquivos pequenos são lidos por inteiro. Se o CSV tiver campos com quebra de
+    linha entre aspas (o que torna os offsets ambíguos), cai para amostragem por
+    reservatório.
+
+    Args:
+        filepath: Caminho para o arquivo CSV.
+        n_linhas: Número de linhas desejado na amostra.
+        semente: Semente do gerador aleatório (opcional).
+
+    Returns:
+        Amostra com o DataFrame e a estimativa do total de linhas do arquivo.
+    """
+    tamanho = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        cabecalho = f.readline()
+        inicio_dados = f.tell()
+
+    if tamanho <= LIMITE_LEITURA_COMPLETA or tamanho <= inicio_dados:
+        df = pd.read_csv(filepath)
+        return Amostra(df, "completo", tamanho, float(len(df)), (float(len(df)), float(len(df))))
+
+    rng = np.random.default_rng(semente)
+    linhas = _ler_linhas_por_offsets(filepath, inicio_dados, tamanho, n_linhas, rng)
+    try:
+        df = pd.read_csv(io.BytesIO(cabecalho + b"".join(linhas)))
+    except pd.errors.ParserError:
+        df = None
+    if df is None or len(df) != len(linhas):
+        logger.info("Offsets de bytes não delimitam as linhas de %s; usando reservatório.", filepath)
+        return amostrar_por_reservatorio(filepath, n_linhas, semente)
+
+    # Total de linhas estimado a partir do tamanho médio das linhas amostradas
+    comprimentos = np.fromiter((len(linha) for linha in linhas), dtype=np.float64, count=len(linhas))
+    bytes_dados = tamanho - inicio_dados
+    media = comprimentos.mean()
+    erro = 1.96 * comprimentos.std(ddof=1) / math.sqrt(len(comprimentos)) if len(comprimentos) > 1 else 0.0
+    ic = (bytes_dados / (media + erro), bytes_dados / max(media - erro, 1.0))
+    return Amostra(df, "offsets", tamanho, bytes_dados / media, ic)
+
+
+def amostrar_por_reservatorio(filepath: str, n_linhas: int = LINHAS_AMOSTRA, semente: Optional[int] = None) -> Amostra:
+    """
+    Amostra aleatória simples de n_linhas lendo o CSV em blocos (bottom-k por
+    chave aleatória, equivalente a um reservatório). Lê o arquivo inteiro, mas
+    com memória limitada ao reservatório e a um bloco; o total de linhas é exato.
+    """
+    rng = np.random.default_rng(semente)
+    reservatorio: Optional[pd.DataFrame] = None
+    chaves = np.empty(0)
+    total = 0
+    for bloco in pd.read_csv(filepath, chunksize=TAMANHO_BLOCO_RESERVATORIO):
+        total += len(bloco)
+        novas = rng.random(len(bloco))
+        candidatos = bloco if reservatorio is None else pd.concat([reservatorio, bloco], ignore_index=True)
+        todas = np.concatenate([chaves, novas])
+        if len(todas) > n_linhas:
+            manter = np.argpartition(todas, n_linhas)[:n_linhas]
+            candidatos, todas = candidatos.iloc[manter].reset_index(drop=True), todas[manter]
+        reservatorio, chaves = candidatos, todas
+    if reservatorio is None:
+        reservatorio = pd.read_csv(filepath)
+    return Amostra(reservatorio, "reservatorio", os.path.getsize(filepath), float(total), (float(total), float(total)))
+
+
+def _intervalo_wilson(sucessos: int, n: int, z: float) -> Tuple[float, float]:
+    if n == 0:
+        return (0.0, 1.0)
+    p = sucessos / n
+    denominador = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denominador
+    margem = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominador
+    return (max(0.0, centro - margem), min(1.0, centro + margem))
+
+
+def _intervalo_quantil(ordenados: np.ndarray, q: float, z: float) -> Tuple[float, float]:
+    # Intervalo livre de distribuição via estatísticas de ordem (aproximação binomial)
+    n = len(ordenados)
+    margem = z * math.sqrt(n * q * (1 - q))
+    baixo = int(max(0, math.floor(n * q - margem)))
+    alto = int(min(n - 1, math.ceil(n * q + margem)))
+    return (float(ordenados[baixo]), float(ordenados[alto]))
+
+
+def estatisticas_aproximadas(amostra: Amostra, confianca: float = 0.95) -> Dict[str, Dict[str, Any]]:
+    """
+    Estima as estatísticas do arquivo completo a partir da amostra.
+
+    Cada estatística é {"valor": ..., "ic": [inferior, superior]}. Médias usam o
+    erro padrão com correção de população finita; percentis usam estatísticas de
+    ordem; proporções (ausentes, frequência do valor mais comum) usam Wilson.
+    Mínimo e máximo da amostra são apenas limites, sem intervalo. Se a amostra
+    for o arquivo inteiro, os intervalos colapsam no valor.
+
+    Args:
+        amostra: Amostra retornada por amostrar_por_offsets/amostrar_por_reservatorio.
+        confianca: Nível de confiança dos intervalos.
+
+    Returns:
+        Dicionário coluna -> estatísticas aproximadas.
+    """
+    df = amostra.df
+    n = len(df)
+    z = NormalDist().inv_cdf(0.5 + confianca / 2)
+    populacao = max(amostra.linhas_estimadas, n)
+    correcao = math.sqrt((populacao - n) / (populacao - 1)) if populacao > 1 else 0.0
+
+    def estimativa(valor, ic=None):
+        valor = valor.item() if isinstance(valor, np.generic) else valor
+        if ic is not None and amostra.exata:
+            ic = (valor, valor)
+        return {"valor": valor, "ic": list(ic) if ic is not None else None}
+
+    resultado = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        nulos = int(serie.isna().sum())
+        estat = {"fracao_ausentes": estimativa(nulos / n if n else 0.0, _intervalo_wilson(nulos, n, z))}
+        validos = serie.dropna()
+        m = len(validos)
+        if m and pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            valores = np.sort(validos.to_numpy(dtype=np.float64))
+            media = valores.mean()
+            desvio = valores.std(ddof=1) if m > 1 else float("nan")
+            erro = z * desvio / math.sqrt(m) * correcao if m > 1 else float("nan")
+            estat["mean"] = estimativa(media, (media - erro, media + erro))
+            estat["std"] = estimativa(desvio)
+            estat["min"] = estimativa(valores[0])
+            for q, rotulo in ((0.25, "25%"), (0.5, "50%"), (0.75, "75%")):
+                estat[rotulo] = estimativa(float(np.quantile(valores, q)), _intervalo_quantil(valores, q, z))
+            estat["max"] = estimativa(valores[-1])
+        elif m:
+            frequencias = validos.value_counts()
+            estat["top"] = estimativa(frequencias.index[0])
+            estat["freq_relativa"] = estimativa(frequencias.iloc[0] / m, _intervalo_wilson(int(frequencias.iloc[0]), m, z))
+            # Distintos na amostra: limite inferior dos distintos no arquivo
+            estat["unique_minimo"] = estimativa(int(len(frequencias)))
+        resultado[coluna] = estat
+    return resultado
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Análise incremental de CSVs que só crescem
+Guarda agregados combináveis por coluna e o offset de bytes já processado;
+na reanálise lê apenas as linhas acrescentadas e combina com o estado salvo
+"""
+
+import copy
+import hashlib
+import io
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from estatisticas import (ESTATISTICAS_CATEGORICAS, ESTATISTICAS_NUMERICAS, PERCENTIS, ROTULOS_PERCENTIS,
+                          _eh_numerica, _escalar, _ordem_estatisticas)
+
+logger = logging.getLogger(__name__)
+
+SUFIXO_ESTADO = ".incremental.pkl"
+# Bytes antes do offset cujo hash confirma que o arquivo só recebeu linhas no final
+BYTES_ASSINATURA = 4096
+# Linhas por bloco ao processar a parte nova
+TAMANHO_BLOCO = 200_000
+
+
+class ArquivoNaoIncremental(Exception):
+    """O arquivo mudou de um jeito que não é acréscimo de linhas (ou de tipos); exige recálculo completo"""
+
+
+@dataclass
+class AgregadoNumerico:
+    """
+    Contagem, média e M2 (combinados pela fórmula de Chan), nulos e os valores
+    ordenados (mínimo, máximo e percentis exatos; a parte nova é intercalada
+    por searchsorted, sem reordenar o que já estava ordenado).
+    """
+    inteiro: bool
+    n: int = 0
+    nulos: int = 0
+    media: float = 0.0
+    m2: float = 0.0
+    ordenados: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    def acrescentar(self, serie: pd.Series):
+        valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+        validos = np.sort(valores[~np.isnan(valores)])
+        self.nulos += len(valores) - len(validos)
+        self.inteiro = self.inteiro and pd.api.types.is_integer_dtype(serie)
+        k = len(validos)
+        if k == 0:
+            return
+        media_nova = validos.mean()
+        m2_novo = ((validos - media_nova) ** 2).sum()
+        total = self.n + k
+        delta = media_nova - self.media
+        self.media += delta * k / total
+        self.m2 += m2_novo + delta * delta * self.n * k / total
+        self.n = total
+        self.ordenados = np.insert(self.ordenados, np.searchsorted(self.ordenados, validos), validos)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        if self.n == 0:
+            return dict({nome: np.nan for nome in ESTATISTICAS_NUMERICAS}, count=0.0)
+        estat = {
+            "count": float(self.n),
+            "mean": float(self.media),
+            "std": float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan,
+            "min": float(self.ordenados[0]),
+        }
+        # Mesma interpolação linear do describe()
+        for q, rotulo in zip(PERCENTIS, ROTULOS_PERCENTIS):
+            posicao = q * (self.n - 1)
+            baixo, alto = int(np.floor(posicao)), int(np.ceil(posicao))
+            inferior, superior = self.ordenados[baixo], self.ordenados[alto]
+            estat[rotulo] = float(inferior + (superior - inferior) * (posicao - baixo))
+        estat["max"] = float(self.ordenados[-1])
+        return estat
+
+    @property
+    def tipo(self) -> str:
+        return "int64" if self.inteiro else "float64"
+
+
+@dataclass
+class AgregadoCategorico:
+    """
+    Frequência de cada valor (na ordem da primeira aparição, o mesmo desempate
+    do describe()) e nulos.
+    """
+    tipo: str
+    nulos: int = 0
+    frequencias: Dict[Any, int] = field(default_factory=dict)
+
+    def acrescentar(self, serie: pd.Series):
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        validos = codigos[codigos >= 0]
+        self.nulos += len(codigos) - len(validos)
+        for valor, contagem in zip(unicos, np.bincount(validos, minlength=len(unicos))):
+            valor = _escalar(valor)
+            self.frequencias[valor] = self.frequencias.get(valor, 0) + int(contagem)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        if not self.frequencias:
+            return {"count": 0, "unique": 0, "top": np.nan, "freq": np.nan}
+        top, freq = max(self.frequencias.items(), key=lambda item: item[1])
+        return {"count": sum(self.frequencias.values()), "unique": len(self.frequencias), "top": top, "freq": freq}
+
+
+@dataclass
+class EstadoIncremental:
+    """Agregados de um arquivo até o offset e o que identifica esse trecho"""
+    colunas: List[str]
+    cabecalho: bytes
+    offset: int
+    assinatura: str
+    linhas: int
+    agregados: Dict[str, Any]
+    # Hashes distintos das linhas (ordenados), para contar duplicadas
+    hashes: np.ndarray
+
+
+def _assinatura(filepath: str, inicio_dados: int, offset: int) -> str:
+    inicio = max(inicio_dados, offset - BYTES_ASSINATURA)
+    with open(filepath, "rb") as f:
+        f.seek(inicio)
+        return hashlib.sha1(f.read(offset - inicio)).hexdigest()
+
+
+def _hashes_linhas(df: pd.DataFrame, numericas: List[str]) -> np.ndarray:
+    # Numéricas como float64: 1 e 1.0 são iguais para o duplicated() e devem ter o mesmo hash
+    normalizado = df.astype({c: np.float64 for c in numericas})
+    normalizado = normalizado.astype({c: object for c in df.columns if c not in numericas})
+    return pd.util.hash_pandas_object(normalizado, index=False).to_numpy()
+
+
+def _acrescentar(estado: EstadoIncremental, df: pd.DataFrame):
+    numericas = [c for c, agregado in estado.agregados.items() if isinstance(agregado, AgregadoNumerico)]
+    for coluna, agregado in estado.agregados.items():
+        agregado.acrescentar(df[coluna])
+    estado.linhas += len(df)
+    novos = np.unique(_hashes_linhas(df, numericas))
+    posicoes = np.searchsorted(estado.hashes, novos)
+    existentes = np.zeros(len(novos), dtype=bool)
+    dentro = posicoes < len(estado.hashes)
+    existentes[dentro] = estado.hashes[posicoes[dentro]] == novos[dentro]
+    estado.hashes = np.insert(estado.hashes, posicoes[~existentes], novos[~existentes])
+
+
+def _ler_desde(filepath: str, inicio: int) -> Tuple[bytes, bytes]:
+    """
+    Bytes do arquivo a partir de inicio, separados em linhas completas e a
+    última linha sem quebra de linha (vazia se o arquivo terminar em quebra).
+    """
+    with open(filepath, "rb") as f:
+        f.seek(inicio)
+        dados = f.read()
+    fim = dados.rfind(b"\n") + 1
+    return dados[:fim], dados[fim:]
+
+
+def construir_estado(filepath: str) -> EstadoIncremental:
+    """
+    Lê o arquivo inteiro (até a última linha completa) e monta o estado.
+    """
+    with open(filepath, "rb") as f:
+        cabecalho = f.readline()
+    dados, linha_final = _ler_desde(filepath, len(cabecalho))
+    df = pd.read_csv(io.BytesIO(cabecalho + dados))
+    # Sem nenhuma linha completa, os tipos vêm da última linha (senão toda coluna seria texto)
+    amostra = df if len(df) or not linha_final.strip() else pd.read_csv(io.BytesIO(cabecalho + linha_final))
+    agregados: Dict[str, Any] = {}
+    for coluna in amostra.columns:
+        serie = amostra[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            raise ArquivoNaoIncremental(f"coluna de datas '{coluna}' não suportada")
+        if _eh_numerica(serie):
+            agregados[coluna] = AgregadoNumerico(inteiro=True)
+        else:
+            agregados[coluna] = AgregadoCategorico(tipo=str(serie.dtype))
+    offset = len(cabecalho) + len(dados)
+    estado = EstadoIncremental(
+        colunas=df.columns.tolist(), cabecalho=cabecalho, offset=offset,
+        assinatura=_assinatura(filepath, len(cabecalho), offset), linhas=0,
+        agregados=agregados, hashes=np.empty(0, dtype=np.uint64),
+    )
+    if len(df):
+        _acrescentar(estado, df)
+    return estado
+
+
+def _acrescentar_dados(estado: EstadoIncremental, dados: bytes):
+    """
+    Acrescenta ao estado as linhas CSV de dados (sem o cabeçalho).
+
+    Raises:
+        ArquivoNaoIncremental: Se as linhas não tiverem as mesmas colunas e tipos.
+    """
+    # Colunas de texto continuam texto, mesmo que a parte nova só tenha números
+    tipos = {c: str for c, a in estado.agregados.items() if isinstance(a, AgregadoCategorico) and a.tipo in ("object", "str")}
+    try:
+        blocos = pd.read_csv(io.BytesIO(estado.cabecalho + dados), dtype=tipos, chunksize=TAMANHO_BLOCO)
+        for bloco in blocos:
+            if bloco.columns.tolist() != estado.colunas:
+                raise ArquivoNaoIncremental("as colunas mudaram")
+            for coluna, agregado in estado.agregados.items():
+                numerica = _eh_numerica(bloco[coluna])
+                if isinstance(agregado, AgregadoNumerico) and not numerica and bloco[coluna].notna().any():
+                    raise ArquivoNaoIncremental(f"a coluna '{coluna}' deixou de ser numérica")
+                if isinstance(agregado, AgregadoCategorico) and agregado.tipo == "bool" and str(bloco[coluna].dtype) != "bool":
+                    raise ArquivoNaoIncremental(f"a coluna '{coluna}' deixou de ser booleana")
+            _acrescentar(estado, bloco)
+    except (pd.errors.ParserError, ValueError) as e:
+        raise ArquivoNaoIncremental(f"parte nova ilegível: {e}")
+
+
+def atualizar_estado(filepath: str, estado: EstadoIncremental) -> int:
+    """
+    Processa as linhas acrescentadas depois de estado.offset.
+
+    Returns:
+        Número de bytes novos lidos.
+
+    Raises:
+        ArquivoNaoIncremental: Se o arquivo encolheu, o cabeçalho ou o trecho já
+            processado mudou, ou a parte nova não tem os mesmos tipos.
+    """
+    tamanho = os.path.getsize(filepath)
+    if tamanho < estado.offset:
+        raise ArquivoNaoIncremental("o arquivo encolheu")
+    with open(filepath, "rb") as f:
+        if f.readline() != estado.cabecalho:
+            raise ArquivoNaoIncremental("o cabeçalho mudou")
+    if _assinatura(filepath, len(estado.cabecalho), estado.offset) != estado.assinatura:
+        raise ArquivoNaoIncremental("o trecho já processado mudou")
+
+    # Uma última linha sem quebra (talvez ainda sendo escrita) não entra no estado salvo
+    dados, _ = _ler_desde(filepath, estado.offset)
+    if not dados:
+        return 0
+    _acrescentar_dados(estado, dados)
+    estado.offset += len(dados)
+    estado.assinatura = _assinatura(filepath, len(estado.cabecalho), estado.offset)
+    return len(dados)
+
+
+def com_linha_final(filepath: str, estado: EstadoIncremental) -> Optional[EstadoIncremental]:
+    """
+    Cópia do estado com o que há no arquivo depois de estado.offset: a última
+    linha, se ela não terminar em quebra de linha (None se não houver nada).
+
+    A linha entra no resultado (um CSV estático sem quebra final também tem a
+    última linha contada), mas não no estado salvo: o offset continua na
+    última quebra e ela é relida na próxima análise, já que pode estar
+    sendo escrita.
+
+    Raises:
+        ArquivoNaoIncremental: Se a linha não tiver as mesmas colunas e tipos.
+    """
+    with open(filepath, "rb") as f:
+        f.seek(estado.offset)
+        restante = f.read()
+    if not restante.strip():
+        return None
+    relatorio = copy.deepcopy(estado)
+    _acrescentar_dados(relatorio, restante)
+    return relatorio
+
+
+def resultado_analise(estado: EstadoIncremental) -> Dict[str, Any]:
+    """
+    Dicionário no mesmo formato de estatisticas.analisar / AgentCSV.analisar_dados.
+    """
+    por_coluna = {}
+    for coluna, agregado in estado.agregados.items():
+        nomes = ESTATISTICAS_NUMERICAS if isinstance(agregado, AgregadoNumerico) else ESTATISTICAS_CATEGORICAS
+        por_coluna[coluna] = (nomes, agregado.estatisticas())
+    nomes = _ordem_estatisticas([por_coluna[c][0] for c in estado.colunas])
+    return {
+        "colunas": list(estado.colunas),
+        "tipos_dados": {c: estado.agregados[c].tipo for c in estado.colunas},
+        "estatisticas_descritivas": {
+            c: {nome: por_coluna[c][1].get(nome, np.nan) for nome in nomes} for c in estado.colunas
+        },
+        "valores_ausentes": {c: estado.agregados[c].nulos for c in estado.colunas},
+        "linhas_duplicadas": int(estado.linhas - len(estado.hashes)),
+    }
+
+
+def ler_estado(filepath: str) -> Optional[EstadoIncremental]:
+    try:
+        with open(filepath + SUFIXO_ESTADO, "rb") as f:
+            estado = pickle.load(f)
+        return estado if isinstance(estado, EstadoIncremental) else None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def salvar_estado(filepath: str, estado: EstadoIncremental):
+    # Escrita atômica: leitores nunca veem um estado parcial
+    temporario = f"{filepath}{SUFIXO_ESTADO}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "wb") as f:
+        pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, filepath + SUFIXO_ESTADO)
+
+
+class AnalisadorIncremental:
+    """
+    Mantém o estado incremental de cada arquivo (em memória e em disco, ao lado
+    do CSV). Reanalisar um arquivo que recebeu linhas no final custa o tamanho
+    da parte nova; qualquer outra mudança leva a um recálculo completo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks_arquivo: Dict[str, threading.Lock] = {}
+        self._estados: Dict[str, EstadoIncremental] = {}
+
+    def _lock_arquivo(self, filepath: str) -> threading.Lock:
+        with self._lock:
+            return self._locks_arquivo.setdefault(filepath, threading.Lock())
+
+    def analisar(self, filepath: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Estatísticas do arquivo, atualizadas a partir do último offset processado.
+
+        Args:
+            filepath: Caminho do CSV.
+
+        Returns:
+            Tupla (análise no formato de AgentCSV.analisar_dados, informações do
+            processamento: modo 'incremental' ou 'completo', linhas novas, bytes
+            lidos, offset, total de linhas e se a última linha, sem quebra de
+            linha, foi incluída).
+        """
+        filepath = os.path.abspath(filepath)
+        with self._lock_arquivo(filepath):
+            estado = self._estados.get(filepath) or ler_estado(filepath)
+            linhas_antes = estado.linhas if estado else 0
+            modo = "incremental"
+            try:
+                if estado is None:
+                    raise ArquivoNaoIncremental("sem estado anterior")
+                bytes_lidos = atualizar_estado(filepath, estado)
+            except ArquivoNaoIncremental as e:
+                logger.info("Recalculando %s por completo: %s", filepath, e)
+                estado = construir_estado(filepath)
+                modo, linhas_antes, bytes_lidos = "completo", 0, estado.offset
+            if bytes_lidos:
+                salvar_estado(filepath, estado)
+            self._estados[filepath] = estado
+            try:
+                relatorio = com_linha_final(filepath, estado)
+            except ArquivoNaoIncremental as e:
+                logger.info("Última linha de %s sem quebra ignorada: %s", filepath, e)
+                relatorio = None
+            incluida = relatorio is not None
+            relatorio = relatorio or estado
+            info = {
+                "modo": modo,
+                # A última linha sem quebra só conta como nova quando for completada
+                "linhas_novas": estado.linhas - linhas_antes,
+                "bytes_lidos": bytes_lidos,
+                "offset": estado.offset,
+                "linhas_total": relatorio.linhas,
+                "linha_final_sem_quebra": incluida,
+            }
+            return resultado_analise(relatorio), info
@@ -1,7 +1,358 @@
-from fastapi import FastAPI
+#!/usr/bin/env python3
+"""
+API FastAPI do Sistema Multi-Agente NASA
+Endpoints assíncronos sobre o AgentGeral: o trabalho bloqueante dos agentes
+roda em um pool de threads, e um único event loop atende muitas consultas
+simultâneas
+
+Executar a partir de backend/:  uvicorn app.main:app  (ou python -m app.main)
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from agent_geral import AgentGeral
+from catalogo_datasets import PrefetcherDatasets
+import graficos
+from instrumentacao import iniciar_trace, medir, metricas
+from logs import configurar_logs
+from prontidao import AquecedorAgentes
+from resiliencia import estatisticas_disjuntores
+
+configurar_logs()
+logger = logging.getLogger(__name__)
+
+# Número máximo de consultas aceitas por chamada de /api/processar-lote
+TAMANHO_MAXIMO_LOTE = 100
+# Cache-Control das visualizações (como em servidor_api.py)
+MAX_AGE_VISUALIZACOES = int(os.getenv("VISUALIZACOES_MAX_AGE", "300"))
+# Threads para o trabalho bloqueante dos agentes (download, pandas, matplotlib)
+MAX_WORKERS = int(os.getenv("API_MAX_WORKERS", "16"))
+
+
+class ConsultaRequest(BaseModel):
+    consulta: str = Field(min_length=1, description="Consulta em linguagem natural")
+
+    @field_validator("consulta")
+    @classmethod
+    def _sem_espacos(cls, valor: str) -> str:
+        valor = valor.strip()
+        if not valor:
+            raise ValueError("Consulta vazia")
+        return valor
+
+
+class LoteRequest(BaseModel):
+    consultas: List[str] = Field(min_length=1, max_length=TAMANHO_MAXIMO_LOTE)
+
+    @field_validator("consultas")
+    @classmethod
+    def _consultas_validas(cls, valores: List[str]) -> List[str]:
+        consultas = [c.strip() for c in valores if c.strip()]
+        if not consultas:
+            raise ValueError("Lote sem consultas válidas")
+        return consultas
+
+
+class ResultadoLote(BaseModel):
+    id_consulta: str
+    consulta: str
+    painel: str
+
+
+class LoteResposta(BaseModel):
+    resultados: List[ResultadoLote]
+    total: int
+
+
+class StatusResposta(BaseModel):
+    status: str
+    versao: str
+    agentes_disponiveis: int
+    historico_consultas: int
+    cache_respostas: Dict[str, Any]
+    armazenamento: Dict[str, Any]
+    disjuntores: Dict[str, Dict[str, Any]]
+
+
+class AgenteInfo(BaseModel):
+    tipo: str
+    nome: str
+    status: str
+
+
+class AgentesResposta(BaseModel):
+    agentes: List[AgenteInfo]
+    total: int
+
+
+class ConsultaHistorico(BaseModel):
+    id: str
+    texto: str
+    timestamp: str
+
+
+class HistoricoResposta(BaseModel):
+    historico: List[ConsultaHistorico]
+    total: int
+
+
+class DatasetsResposta(BaseModel):
+    datasets: List[Dict[str, Any]]
+    total: int
+
+
+def caminho_seguro(raiz: str, nome: str) -> Optional[str]:
+    """
+    Caminho de nome dentro de raiz, ou None se ele sair de raiz (ex.: '..' ou
+    caminho absoluto, inclusive via links simbólicos).
+    """
+    if "\0" in nome:
+        return None
+    caminho = os.path.normpath(os.path.join(raiz, nome))
+    # A verificação usa os caminhos resolvidos; o retornado mantém a raiz como
+    # recebida (é a chave usada pelo armazenamento)
+    raiz_real, caminho_real = os.path.realpath(raiz), os.path.realpath(caminho)
+    if caminho_real == raiz_real or os.path.commonpath([raiz_real, caminho_real]) != raiz_real:
+        return None
+    return caminho
+
+
+async def executar_bloqueante(funcao: Callable, *args) -> Any:
+    """
+    Executa uma função bloqueante no pool de threads da API, preservando o
+    contexto (trace e spans) de quem chamou.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.executor, contextvars.copy_context().run, funcao, *args)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cria o AgentGeral (carrega as publicações e indexa o grafo) antes de aceitar
+    requisições e inicia o aquecimento em segundo plano: datasets populares,
+    matplotlib e consultas de aquecimento. /api/ready responde 503 até terminar.
+    """
+    app.state.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="api-agentes")
+    with medir("api_inicializacao"):
+        app.state.agent_geral = await executar_bloqueante(AgentGeral)
+    app.state.prefetcher = None
+    if os.getenv("PREFETCH_DATASETS", "1") == "1":
+        app.state.prefetcher = PrefetcherDatasets(app.state.agent_geral.catalogo, app.state.agent_geral.agent_csv)
+    # O aquecedor inicia o prefetcher ao final da primeira carga
+    app.state.aquecedor = AquecedorAgentes(app.state.agent_geral, app.state.prefetcher).iniciar()
+    try:
+        yield
+    finally:
+        app.state.aquecedor.encerrar()
+        if app.state.prefetcher is not None:
+            app.state.prefetcher.encerrar()
+        app.state.agent_geral.grafo.fechar()
+        app.state.agent_geral.agent_literatura.fechar()
+        app.state.agent_geral.registro.fechar()
+        app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="API Sistema Multi-Agente NASA", version="1.0.0", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+@app.exception_handler(StarletteHTTPException)
+async def erro_http(request: Request, exc: StarletteHTTPException):
+    # Mesmo formato de erro da API Flask: {"erro": "..."}
+    return JSONResponse({"erro": exc.detail}, status_code=exc.status_code)
+
+
+@app.exception_handler(RequestValidationError)
+async def erro_validacao(request: Request, exc: RequestValidationError):
+    mensagens = "; ".join(str(erro.get("msg", "")) for erro in exc.errors())
+    return JSONResponse({"erro": f"Requisição inválida: {mensagens}"}, status_code=400)
+
+
+def obter_agente(request: Request) -> AgentGeral:
+    return request.app.state.agent_geral
 
-app = FastAPI()
 
 @app.get("/")
 def root():
     return {"message": "API funcionando!"}
+
+
+def _processar_consulta(agent_geral: AgentGeral, texto: str):
+    with iniciar_trace("api_processar_consulta") as trace_id:
+        return agent_geral.processar_consulta(texto), trace_id
+
+
+def _processar_lote(agent_geral: AgentGeral, consultas: List[str]):
+    with iniciar_trace("api_processar_lote") as trace_id:
+        return agent_geral.processar_lote(consultas), trace_id
+
+
+@app.post("/api/processar-consulta", response_class=PlainTextResponse)
+async def processar_consulta(corpo: ConsultaRequest, agent_geral: AgentGeral = Depends(obter_agente)):
+    """Processa uma consulta e retorna o painel em Markdown"""
+    try:
+        painel, trace_id = await executar_bloqueante(_processar_consulta, agent_geral, corpo.consulta)
+    except Exception as e:
+        logger.exception("Erro ao processar consulta: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {e}")
+    return PlainTextResponse(painel, headers={"X-Trace-Id": trace_id})
+
+
+@app.post("/api/processar-lote", response_model=LoteResposta)
+async def processar_lote(corpo: LoteRequest, agent_geral: AgentGeral = Depends(obter_agente)):
+    """Processa várias consultas em uma única chamada, compartilhando o trabalho entre elas"""
+    try:
+        resultados, trace_id = await executar_bloqueante(_processar_lote, agent_geral, corpo.consultas)
+    except Exception as e:
+        logger.exception("Erro ao processar lote: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {e}")
+    return JSONResponse(
+        LoteResposta(resultados=resultados, total=len(resultados)).model_dump(), headers={"X-Trace-Id": trace_id}
+    )
+
+
+@app.post("/api/processar-lote/stream")
+async def processar_lote_stream(corpo: LoteRequest, agent_geral: AgentGeral = Depends(obter_agente)):
+    """
+    Processa as consultas do lote em paralelo e envia cada painel assim que
+    fica pronto, como NDJSON (uma linha JSON por consulta, na ordem de conclusão).
+    """
+    async def processar(indice: int, texto: str) -> Dict[str, Any]:
+        try:
+            painel, trace_id = await executar_bloqueante(_processar_consulta, agent_geral, texto)
+            return {"indice": indice, "consulta": texto, "painel": painel, "trace_id": trace_id}
+        except Exception as e:
+            logger.exception("Erro ao processar consulta do lote: %s", e)
+            return {"indice": indice, "consulta": texto, "erro": f"Erro interno do servidor: {e}"}
+
+    async def gerar():
+        tarefas = [asyncio.create_task(processar(indice, texto)) for indice, texto in enumerate(corpo.consultas)]
+        try:
+            for concluida in asyncio.as_completed(tarefas):
+                yield json.dumps(await concluida, ensure_ascii=False) + "\n"
+        finally:
+            # Cliente desconectado: consultas ainda na fila do pool não são iniciadas
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+    return StreamingResponse(gerar(), media_type="application/x-ndjson")
+
+
+@app.get("/api/status", response_model=StatusResposta)
+async def status(agent_geral: AgentGeral = Depends(obter_agente)):
+    """Status da API e dos agentes"""
+    return StatusResposta(
+        status="online",
+        versao="1.0.0",
+        agentes_disponiveis=len(agent_geral.agentes_disponiveis),
+        historico_consultas=len(agent_geral.historico_consultas),
+        cache_respostas=agent_geral.cache_respostas.estatisticas(),
+        armazenamento=await executar_bloqueante(agent_geral.agent_csv.armazenamento.estatisticas),
+        disjuntores=estatisticas_disjuntores(),
+    )
+
+
+@app.get("/api/ready")
+async def prontidao(request: Request):
+    """Prontidão por agente e componente: 200 após o aquecimento, 503 antes disso"""
+    estado = request.app.state.aquecedor.estado()
+    return JSONResponse(estado, status_code=200 if estado["pronto"] else 503)
+
+
+@app.get("/api/cache")
+async def cache_respostas(agent_geral: AgentGeral = Depends(obter_agente)):
+    """Estatísticas do cache de respostas"""
+    return agent_geral.cache_respostas.estatisticas()
+
+
+@app.delete("/api/cache")
+async def limpar_cache_respostas(agent_geral: AgentGeral = Depends(obter_agente)):
+    """Esvazia o cache de respostas"""
+    return {"removidas": agent_geral.cache_respostas.limpar()}
+
+
+@app.get("/api/agentes", response_model=AgentesResposta)
+async def listar_agentes(agent_geral: AgentGeral = Depends(obter_agente)):
+    """Lista os agentes especializados disponíveis"""
+    agentes = [AgenteInfo(tipo=str(tipo), nome=descricao, status="ativo")
+               for tipo, descricao in agent_geral.agentes_disponiveis.items()]
+    return AgentesResposta(agentes=agentes, total=len(agentes))
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def exportar_metricas():
+    """Métricas no formato de texto do Prometheus"""
+    return PlainTextResponse(metricas.exportar_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/datasets", response_model=DatasetsResposta)
+async def listar_datasets(agent_geral: AgentGeral = Depends(obter_agente)):
+    """Catálogo de datasets"""
+    datasets = agent_geral.catalogo.listar()
+    return DatasetsResposta(datasets=datasets, total=len(datasets))
+
+
+@app.get("/api/grafo")
+async def consultar_grafo(consulta: Optional[str] = None, agent_geral: AgentGeral = Depends(obter_agente)):
+    """Tamanho do grafo de conhecimento e, com ?consulta=, as publicações ligadas às missões e temas citados"""
+    resposta = {"estatisticas": await executar_bloqueante(agent_geral.grafo.estatisticas)}
+    if consulta:
+        resposta["conexoes"] = await executar_bloqueante(agent_geral.grafo.conexoes, consulta)
+    return resposta
+
+
+@app.get("/api/facetas")
+async def consultar_facetas(request: Request, consulta: str = "", agent_geral: AgentGeral = Depends(obter_agente)):
+    """Contagens por faceta das publicações que contêm ?consulta=, filtradas pelos demais parâmetros (ex.: ?tema=...)"""
+    agent_literatura = agent_geral.agent_literatura
+    filtros = {f: v for f, v in request.query_params.items() if f in agent_literatura.facetas.facetas}
+    return await executar_bloqueante(agent_literatura.consultar_facetas, consulta, filtros)
+
+
+@app.get("/api/visualizacoes/{nome:path}")
+async def obter_visualizacao(nome: str, agent_geral: AgentGeral = Depends(obter_agente)):
+    """Imagens dos gráficos (miniatura, completa ou SVG), geradas sob demanda"""
+    armazenamento = agent_geral.agent_csv.armazenamento
+    caminho = caminho_seguro(armazenamento.raiz, nome)
+    if caminho is None or os.path.splitext(nome)[1] not in graficos.EXTENSOES_IMAGEM:
+        raise HTTPException(status_code=404, detail="Visualização não encontrada")
+    try:
+        # A imagem completa e o SVG são desenhados no primeiro pedido; a leitura
+        # conta como uso para a remoção por cota (ver armazenamento)
+        with armazenamento.fixar(caminho):
+            existe = await executar_bloqueante(graficos.garantir_arquivo, caminho)
+    except Exception as e:
+        logger.exception("Erro ao gerar visualização %s: %s", nome, e)
+        raise HTTPException(status_code=500, detail="Erro ao gerar visualização")
+    if not existe:
+        raise HTTPException(status_code=404, detail="Visualização não encontrada")
+    return FileResponse(caminho, headers={"Cache-Control": f"public, max-age={MAX_AGE_VISUALIZACOES}"})
+
+
+@app.get("/api/historico", response_model=HistoricoResposta)
+async def obter_historico(agent_geral: AgentGeral = Depends(obter_agente)):
+    """Últimas 10 consultas"""
+    historico = [ConsultaHistorico(id=c.id_consulta, texto=c.texto, timestamp=c.timestamp)
+                 for c in agent_geral.historico_consultas[-10:]]
+    return HistoricoResposta(historico=historico, total=len(agent_geral.historico_consultas))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORTA_API", "8000")))
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Armazenamento de artefatos
+Diretório configurável para downloads e gráficos do Agent CSV, com caminhos
+por dataset e versão (hash) e cota de disco com remoção LRU atômica
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_PADRAO = os.getenv("ARTEFATOS_DIR", "/home/ubuntu/data_csv")
+# Cota de disco do diretório inteiro (datasets + gráficos); 0 desativa
+COTA_BYTES_PADRAO = int(os.getenv("ARTEFATOS_COTA_BYTES", str(2 * 1024 ** 3)))
+# Ao estourar a cota, remove até ocupar esta fração dela (evita remoções a cada escrita)
+FRACAO_ALVO = 0.9
+
+SUBDIR_DATASETS = "datasets"
+SUBDIR_ARTEFATOS = "artefatos"
+SUBDIR_LIXO = ".lixo"
+# Arquivos auxiliares de um dataset baixado (download parcial, metadados, esquema, estado incremental)
+SUFIXOS_AUXILIARES = (".part", ".meta.json", ".esquema.json", ".incremental.pkl")
+
+
+def _slug(texto: str, tamanho: int = 40) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", texto)[:tamanho].strip("._") or "dataset"
+
+
+def _hash(texto: str, tamanho: int = 12) -> str:
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:tamanho]
+
+
+def _arquivo_principal(nome: str) -> str:
+    # 'x.csv.part.meta.json' -> 'x.csv'
+    encurtado = True
+    while encurtado:
+        encurtado = False
+        for sufixo in SUFIXOS_AUXILIARES:
+            if nome.endswith(sufixo) and len(nome) > len(sufixo):
+                nome, encurtado = nome[:-len(sufixo)], True
+    return nome
+
+
+def _tamanho(caminho: str) -> int:
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho)
+    total = 0
+    for pasta, _, arquivos in os.walk(caminho):
+        for arquivo in arquivos:
+            try:
+                total += os.path.getsize(os.path.join(pasta, arquivo))
+            except OSError:
+                pass
+    return total
+
+
+class ArmazenamentoArtefatos:
+    """
+    Organiza o diretório de dados em:
+
+        <raiz>/datasets/<arquivo>                     downloads e arquivos auxiliares
+        <raiz>/artefatos/<dataset>-<hash>/<versao>/   gráficos de uma versão de um dataset
+
+    A unidade de remoção é um dataset baixado (arquivo e auxiliares) ou o
+    diretório de uma versão de gráficos. Unidades em uso (ver fixar) nunca são
+    removidas; a remoção renomeia a unidade para <raiz>/.lixo antes de apagá-la,
+    então leitores veem a unidade inteira ou nada.
+    """
+
+    def __init__(self, raiz: str = DIRETORIO_PADRAO, cota_bytes: int = COTA_BYTES_PADRAO):
+        self.raiz = os.path.abspath(raiz)
+        self.cota_bytes = cota_bytes
+        self.diretorio_datasets = os.path.join(self.raiz, SUBDIR_DATASETS)
+        self.diretorio_artefatos = os.path.join(self.raiz, SUBDIR_ARTEFATOS)
+        self._lixo = os.path.join(self.raiz, SUBDIR_LIXO)
+        for diretorio in (self.diretorio_datasets, self.diretorio_artefatos, self._lixo):
+            os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fixados: Counter = Counter()
+        self._ultimo_uso: Dict[str, float] = {}
+        self._contadores = {"unidades_removidas": 0, "bytes_removidos": 0}
+        # Restos de remoções interrompidas
+        self._esvaziar_lixo()
+
+    def caminho_dataset(self, nome_arquivo: str) -> str:
+        return os.path.join(self.diretorio_datasets, os.path.basename(nome_arquivo))
+
+    def diretorio_versao(self, origem: str, versao: str) -> str:
+        """
+        Diretório dos gráficos de uma versão de um dataset (criado se preciso).
+        Versões diferentes do mesmo dataset, ou datasets com o mesmo nome de
+        arquivo, nunca compartilham diretório.
+        """
+        nome = os.path.splitext(os.path.basename(origem.rstrip("/")))[0]
+        diretorio = os.path.join(self.diretorio_artefatos, f"{_slug(nome)}-{_hash(origem, 10)}", _hash(versao))
+        os.makedirs(diretorio, exist_ok=True)
+        return diretorio
+
+    def _unidade(self, caminho: str) -> Optional[str]:
+        """Unidade de remoção que contém o caminho (ou None, se fora das áreas gerenciadas)."""
+        relativo = os.path.relpath(os.path.abspath(caminho), self.raiz).split(os.sep)
+        if len(relativo) >= 2 and relativo[0] == SUBDIR_DATASETS:
+            return os.path.join(self.diretorio_datasets, _arquivo_principal(relativo[1]))
+        if len(relativo) >= 3 and relativo[0] == SUBDIR_ARTEFATOS:
+            return os.path.join(self.diretorio_artefatos, relativo[1], relativo[2])
+        return None
+
+    def registrar_uso(self, caminho: str):
+        unidade = self._unidade(caminho)
+        if unidade is not None:
+            with self._lock:
+                self._ultimo_uso[unidade] = time.time()
+
+    @contextmanager
+    def fixar(self, caminho: str) -> Iterator[str]:
+        """
+        Protege da remoção a unidade do caminho enquanto o bloco executa
+        (download em andamento, análise escrevendo gráficos).
+        """
+        unidade = self._unidade(caminho) or caminho
+        with self._lock:
+            self._fixados[unidade] += 1
+            self._ultimo_uso[unidade] = time.time()
+        try:
+            yield caminho
+        finally:
+            with self._lock:
+                self._fixados[unidade] -= 1
+                if self._fixados[unidade] <= 0:
+                    del self._fixados[unidade]
+                self._ultimo_uso[unidade] = time.time()
+
+    def _listar_unidades(self) -> List[Tuple[str, List[str]]]:
+        """
+        Unidades e os caminhos que as compõem. Um dataset agrupa o arquivo e
+        seus auxiliares (.meta.json, .part, .esquema.json, .incremental.pkl).
+        """
+        unidades: Dict[str, List[str]] = {}
+        with os.scandir(self.diretorio_datasets) as entradas:
+            for entrada in entradas:
+                # Temporários de escritas atômicas em andamento não entram
+                if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                    unidade = os.path.join(self.diretorio_datasets, _arquivo_principal(entrada.name))
+                    unidades.setdefault(unidade, []).append(entrada.path)
+        with os.scandir(self.diretorio_artefatos) as datasets:
+            for dataset in datasets:
+                if not dataset.is_dir():
+                    continue
+                with os.scandir(dataset.path) as versoes:
+                    for versao in versoes:
+                        if versao.is_dir():
+                            unidades[versao.path] = [versao.path]
+        return list(unidades.items())
+
+    def _remover_unidade(self, unidade: str, caminhos: List[str]) -> int:
+        destino = os.path.join(self._lixo, uuid.uuid4().hex)
+        os.makedirs(destino)
+        removidos = 0
+        for caminho in caminhos:
+            try:
+                tamanho = _tamanho(caminho)
+                os.rename(caminho, os.path.join(destino, os.path.basename(caminho)))
+                removidos += tamanho
+            except OSError as e:
+                logger.warning("Não foi possível remover %s: %s", caminho, e)
+        shutil.rmtree(destino, ignore_errors=True)
+        # Diretório do dataset sem nenhuma versão restante
+        pai = os.path.dirname(unidade)
+        if os.path.dirname(pai) == self.diretorio_artefatos:
+            try:
+                os.rmdir(pai)
+            except OSError:
+                pass
+        return removidos
+
+    def _esvaziar_lixo(self):
+        with os.scandir(self._lixo) as entradas:
+            for entrada in entradas:
+                shutil.rmtree(entrada.path, ignore_errors=True)
+
+    def aplicar_cota(self) -> int:
+        """
+        Se o diretório passou da cota, remove as unidades usadas há mais tempo
+        (exceto as fixadas) até ocupar FRACAO_ALVO da cota.
+
+        Returns:
+            Bytes liberados.
+        """
+        if self.cota_bytes <= 0:
+            return 0
+        with self._lock:
+            unidades = []
+            total = 0
+            for unidade, caminhos in self._listar_unidades():
+                tamanho = sum(_tamanho(c) for c in caminhos)
+                total += tamanho
+                # Sem uso registrado neste processo, vale a data de modificação
+                uso = self._ultimo_uso.get(unidade) or max(os.path.getmtime(c) for c in caminhos)
+                unidades.append((uso, unidade, caminhos, tamanho))
+            if total <= self.cota_bytes:
+                return 0
+            alvo = self.cota_bytes * FRACAO_ALVO
+            liberados = 0
+            for uso, unidade, caminhos, tamanho in sorted(unidades, key=lambda u: u[0]):
+                if total - liberados <= alvo:
+                    break
+                if self._fixados.get(unidade):
+                    continue
+                liberados += self._remover_unidade(unidade, caminhos)
+                self._ultimo_uso.pop(unidade, None)
+                self._contadores["unidades_removidas"] += 1
+                logger.info("Cota de artefatos: removido %s (%d bytes)", unidade, tamanho)
+            self._contadores["bytes_removidos"] += liberados
+            return liberados
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            unidades = self._listar_unidades()
+            return {
+                "raiz": self.raiz,
+                "cota_bytes": self.cota_bytes,
+                "bytes_usados": sum(_tamanho(c) for _, caminhos in unidades for c in caminhos),
+                "unidades": len(unidades),
+                "unidades_fixadas": len(self._fixados),
+                **self._contadores,
+            }
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Benchmarks ponta a ponta do pipeline multi-agente
+Gera resultados em JSON comparáveis entre commits
+
+Uso:
+    python benchmark_agentes.py --saida bench.json
+    python benchmark_agentes.py --saida novo.json --comparar bench.json
+    python benchmark_agentes.py --escala completa   # inclui 1M linhas x 500 colunas
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+import matplotlib
+matplotlib.use("Agg")
+
+from stub_http import ServidorStub, gerar_publicacoes_sinteticas, gerar_dataframe_sintetico, escrever_csv
+
+NOME_CSV_PUBLICACOES = "SB_publication_PMC.csv"
+
+CONSULTAS_GERAL = {
+    "csv": "Mostre a distribuição e a média da tabela",
+    "literatura": "Quais artigos sobre microgravidade?",
+    "missoes": "Quais os riscos de uma missão para Marte?",
+    "todos": "Quero analisar dados de missões da NASA e encontrar artigos sobre exploração de Marte",
+}
+
+# (linhas, colunas) de cada escala para AgentCSV.analisar_dados
+FORMATOS_CSV = {
+    "rapida": [(10_000, 10), (10_000, 500)],
+    "padrao": [(10_000, 10), (10_000, 500), (1_000_000, 10)],
+    "completa": [(10_000, 10), (10_000, 500), (1_000_000, 10), (1_000_000, 500)],
+}
+
+CORPORA_LITERATURA = {
+    "rapida": [1_000],
+    "padrao": [1_000, 100_000],
+    "completa": [1_000, 100_000],
+}
+
+
+def cronometrar(funcao: Callable[[], Any], repeticoes: int, aquecimento: int = 1) -> Dict[str, Any]:
+    """
+    Executa a função algumas vezes e retorna estatísticas de tempo (em segundos).
+    """
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return {
+        "repeticoes": repeticoes,
+        "min": tempos[0],
+        "mediana": statistics.median(tempos),
+        "media": statistics.fmean(tempos),
+        "p95": tempos[min(len(tempos) - 1, int(round(0.95 * (len(tempos) - 1))))],
+        "max": tempos[-1],
+    }
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def executar_benchmarks(escala: str, repeticoes: int, titulos_stub: int, filtro: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Executa a suíte completa e retorna o documento de resultados.
+    """
+    resultados: Dict[str, Any] = {}
+
+    def registrar(nome: str, funcao: Callable[[], Any], reps: int = repeticoes, **meta):
+        if filtro and filtro not in nome:
+            return
+        print(f"[bench] {nome}...", file=sys.stderr)
+        estatisticas = cronometrar(funcao, reps)
+        estatisticas.update(meta)
+        resultados[nome] = estatisticas
+
+    with tempfile.TemporaryDirectory(prefix="bench_agentes_") as tmp:
+        dir_stub = os.path.join(tmp, "stub")
+        dir_dados = os.path.join(tmp, "data_csv")
+        os.makedirs(dir_stub)
+        os.makedirs(dir_dados)
+        escrever_csv(gerar_publicacoes_sinteticas(titulos_stub), dir_stub, NOME_CSV_PUBLICACOES)
+
+        with ServidorStub(dir_stub) as stub:
+            # Os agentes leem a URL do CSV de publicações e os diretórios de dados
+            # (downloads, gráficos, temas) na importação: tudo fica no diretório temporário
+            os.environ["SB_PUBLICATIONS_CSV_URL"] = stub.url(NOME_CSV_PUBLICACOES)
+            os.environ["ARTEFATOS_DIR"] = dir_dados
+            os.environ["TOPICOS_DIR"] = os.path.join(dir_dados, "topicos")
+            from agent_geral import AgentGeral, AgentType, ResultadoAgente
+
+            agent = AgentGeral()
+
+            # --- AgentGeral.processar_consulta por tipo de roteamento ---
+            esperados = {
+                "csv": [AgentType.CSV],
+                "literatura": [AgentType.LITERATURA],
+                "missoes": [AgentType.MISSOES],
+                "todos": list(AgentType),
+            }
+            # O caminho frio (cache de respostas vazio a cada repetição) e o acerto no
+            # cache são medidos separadamente: consultas repetidas seriam sempre acertos
+            def processar_sem_cache(consulta: str):
+                agent.cache_respostas.limpar()
+                return agent.processar_consulta(consulta)
+
+            for nome, consulta in CONSULTAS_GERAL.items():
+                roteados = agent.analisar_intencao(consulta)
+                assert roteados == esperados[nome], f"Roteamento inesperado para '{nome}': {roteados}"
+                registrar(f"geral.processar_consulta.{nome}",
+                          lambda c=consulta: processar_sem_cache(c),
+                          agentes=[str(a) for a in roteados], cache="frio")
+                if agent.cache_respostas.ativo:
+                    registrar(f"geral.processar_consulta_cache.{nome}",
+                              lambda c=consulta: agent.processar_consulta(c),
+                              reps=repeticoes * 20, agentes=[str(a) for a in roteados], cache="acerto")
+
+            # --- Síntese e renderização do painel ---
+            nomes = ["geral.sintetizar_resultados", "geral.gerar_painel_dinamico"]
+            if not filtro or any(filtro in nome for nome in nomes):
+                resultados_agentes = [
+                    ResultadoAgente(AgentType.CSV, agent.agent_csv.processar_consulta_csv(
+                        "bench", csv_url=stub.url(NOME_CSV_PUBLICACOES)), True, ""),
+                    ResultadoAgente(AgentType.LITERATURA, agent.agent_literatura.processar_consulta_literatura(
+                        "microgravity radiação marte"), True, ""),
+                    ResultadoAgente(AgentType.MISSOES, agent.agent_missoes.processar_consulta_missoes(
+                        "missão para Marte e base lunar"), True, ""),
+                ]
+                sintese = agent.sintetizar_resultados(resultados_agentes)
+                registrar(nomes[0], lambda: agent.sintetizar_resultados(resultados_agentes), reps=repeticoes * 20)
+                registrar(nomes[1], lambda: agent.gerar_painel_dinamico(sintese), reps=repeticoes * 20)
+
+            # --- AgentCSV: leitura e análise de CSVs sintéticos ---
+            for linhas, colunas in FORMATOS_CSV[escala]:
+                rotulo = f"{linhas}x{colunas}"
+                nomes = [f"csv.carregar_csv.{rotulo}", f"csv.analisar_dados.{rotulo}"]
+                if filtro and not any(filtro in nome for nome in nomes):
+                    continue
+                df = gerar_dataframe_sintetico(linhas, colunas)
+                caminho = escrever_csv(df, dir_dados, f"sintetico_{rotulo}.csv")
+                reps = repeticoes if linhas * colunas <= 10_000_000 else 1
+                registrar(nomes[0], lambda c=caminho: agent.agent_csv.carregar_csv(c),
+                          reps=reps, linhas=linhas, colunas=colunas, bytes=os.path.getsize(caminho))
+                registrar(nomes[1], lambda d=df: agent.agent_csv.analisar_dados(d),
+                          reps=reps, linhas=linhas, colunas=colunas)
+                del df
+                os.remove(caminho)
+
+            # --- AgentLiteratura: busca em corpora sintéticos ---
+            literatura = agent.agent_literatura
+            for n_titulos in CORPORA_LITERATURA[escala]:
+                nomes = [f"literatura.buscar.{n_titulos}", f"literatura.processar_consulta.{n_titulos}"]
+                if filtro and not any(filtro in nome for nome in nomes):
+                    continue
+                # Reconstrói índice, temas e facetas junto com o corpus (senão a busca usaria o corpus anterior)
+                literatura.carregar_corpus(gerar_publicacoes_sinteticas(n_titulos))
+                registrar(nomes[0], lambda: literatura.buscar_nslsl_simulado("microgravity"), titulos=n_titulos)
+                registrar(nomes[1], lambda: literatura.processar_consulta_literatura("radiation"), titulos=n_titulos)
+
+    return {
+        "meta": {
+            "commit": _commit_atual(),
+            "data": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "escala": escala,
+            "repeticoes": repeticoes,
+            "titulos_stub": titulos_stub,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(atual: Dict[str, Any], base: Dict[str, Any]) -> List[str]:
+    """
+    Compara as medianas de dois documentos de resultados.
+    Razão < 1 indica que o resultado atual é mais rápido.
+    """
+    linhas = [f"{'benchmark':<45} {'base (s)':>12} {'atual (s)':>12} {'razão':>8}"]
+    for nome, estat in sorted(atual["resultados"].items()):
+        anterior = base.get("resultados", {}).get(nome)
+        if not anterior:
+            linhas.append(f"{nome:<45} {'-':>12} {estat['mediana']:>12.6f} {'novo':>8}")
+            continue
+        razao = estat["mediana"] / anterior["mediana"] if anterior["mediana"] else float("inf")
+        linhas.append(f"{nome:<45} {anterior['mediana']:>12.6f} {estat['mediana']:>12.6f} {razao:>8.2f}")
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do sistema multi-agente NASA")
+    parser.add_argument("--escala", choices=sorted(FORMATOS_CSV), default="padrao")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--titulos-stub", type=int, default=200,
+                        help="Número de publicações servidas pelo stub HTTP no lugar do GitHub")
+    parser.add_argument("--filtro", help="Executa apenas benchmarks cujo nome contenha este texto")
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    documento = executar_benchmarks(args.escala, args.repeticoes, args.titulos_stub, args.filtro)
+
+    conteudo = json.dumps(documento, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+    else:
+        print(conteudo)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        print("\n".join(comparar(documento, base)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Busca fragmentada na literatura
+Índice do corpus de publicações em memória compartilhada, dividido em
+fragmentos pesquisados em paralelo por processos, com fusão dos top-k
+"""
+
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from processos import contexto_processos
+
+logger = logging.getLogger(__name__)
+
+# Processos de busca (um fragmento do corpus por processo); 0 busca no próprio
+# processo, -1 usa um processo por núcleo
+FRAGMENTOS_PADRAO = int(os.getenv("LITERATURA_FRAGMENTOS", "0"))
+# Documentos devolvidos por consulta, em ordem de relevância (0 = todos)
+TOP_K_PADRAO = int(os.getenv("LITERATURA_TOP_K", "100"))
+# Separa os documentos no buffer; como é removido dos textos e dos termos,
+# uma ocorrência nunca atravessa dois documentos
+SEPARADOR = b"\n"
+
+# (-ocorrências, posição da primeira ocorrência no documento, documento):
+# a ordem natural da tupla é a ordem de relevância
+Resultado = Tuple[int, int, int]
+
+
+def normalizar(texto: str) -> str:
+    return str(texto).lower().replace("\r", " ").replace("\n", " ")
+
+
+def buscar_intervalo(buffer, offsets: np.ndarray, inicio: int, fim: int, termo: bytes, k: int) -> List[Resultado]:
+    """
+    Documentos do intervalo [inicio, fim) que contêm o termo, do mais ao menos
+    relevante (mais ocorrências, depois ocorrência mais próxima do início).
+
+    A varredura é uma única busca da expressão sobre o trecho contíguo do
+    buffer (em C); só as ocorrências encontradas passam pelo NumPy.
+
+    Args:
+        buffer: Textos normalizados em UTF-8, terminados por SEPARADOR (bytes ou memória compartilhada).
+        offsets: Início de cada documento no buffer (n_documentos + 1 posições).
+        inicio: Primeiro documento do intervalo.
+        fim: Documento seguinte ao último do intervalo.
+        termo: Termo normalizado em UTF-8.
+        k: Máximo de resultados (0 = todos).
+
+    Returns:
+        Lista de Resultado ordenada.
+    """
+    if not termo:
+        # Termo vazio está contido em todos os documentos
+        return [(-1, 0, doc) for doc in range(inicio, min(fim, inicio + k) if k else fim)]
+    padrao = re.compile(re.escape(termo))
+    posicoes = np.fromiter(
+        (m.start() for m in padrao.finditer(buffer, int(offsets[inicio]), int(offsets[fim]))), dtype=np.int64
+    )
+    if not len(posicoes):
+        return []
+    documentos = np.searchsorted(offsets, posicoes, side="right") - 1
+    unicos, primeira, contagens = np.unique(documentos, return_index=True, return_counts=True)
+    relativas = posicoes[primeira] - offsets[unicos]
+    ordem = np.lexsort((unicos, relativas, -contagens))
+    if k:
+        ordem = ordem[:k]
+    return [(-int(contagens[i]), int(relativas[i]), int(unicos[i])) for i in ordem]
+
+
+# Memória compartilhada anexada em cada processo de busca: nome do bloco de textos ->
+# (bloco de textos, bloco de offsets, offsets como array)
+_anexados: Dict[str, Tuple[shared_memory.SharedMemory, shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+def _anexar(nome: str) -> shared_memory.SharedMemory:
+    # Os blocos pertencem ao processo principal; os processos de busca não os registram
+    # no resource tracker (senão seriam apagados quando um deles terminasse)
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=nome)
+
+
+def _anexar_indice(nome_textos: str, nome_offsets: str, n_documentos: int) -> None:
+    """
+    Initializer dos processos de busca: anexa o índice compartilhado (uma vez por processo).
+    """
+    if nome_textos not in _anexados:
+        textos, blocos_offsets = _anexar(nome_textos), _anexar(nome_offsets)
+        offsets = np.ndarray((n_documentos + 1,), dtype=np.int64, buffer=blocos_offsets.buf)
+        _anexados[nome_textos] = (textos, blocos_offsets, offsets)
+
+
+def _buscar_fragmento(nome_textos: str, nome_offsets: str, n_documentos: int,
+                      inicio: int, fim: int, termo: bytes, k: int) -> List[Resultado]:
+    """
+    Executada nos processos de busca: pesquisa um fragmento do índice compartilhado.
+    """
+    _anexar_indice(nome_textos, nome_offsets, n_documentos)
+    textos, _, offsets = _anexados[nome_textos]
+    return buscar_intervalo(textos.buf, offsets, inicio, fim, termo, k)
+
+
+class IndiceFragmentado:
+    """
+    Índice de busca por termo sobre os textos do corpus (título e, se houver,
+    abstract de cada publicação).
+
+    Com fragmentos > 0, os textos ficam em um bloco de memória compartilhada,
+    dividido em fragmentos de tamanho (em bytes) semelhante; cada consulta é
+    enviada a todos os fragmentos, pesquisados em paralelo por um pool de
+    processos, e os top-k de cada um são fundidos. Os processos anexam a
+    memória compartilhada uma vez, então o custo por consulta é a varredura e
+    não a cópia do corpus. Com fragmentos = 0 a mesma busca roda no processo
+    atual, sem pool.
+
+    Os processos são criados na construção do índice pelo contexto de
+    processos.contexto_processos (forkserver: não copiam as threads do
+    servidor), anexam a memória compartilhada no initializer e só executam a
+    varredura.
+    """
+
+    def __init__(self, textos: Sequence[str], fragmentos: int = FRAGMENTOS_PADRAO):
+        codificados = [normalizar(texto).encode("utf-8") for texto in textos]
+        self.n_documentos = len(codificados)
+        offsets = np.zeros(self.n_documentos + 1, dtype=np.int64)
+        np.cumsum([len(c) + len(SEPARADOR) for c in codificados], out=offsets[1:])
+        dados = SEPARADOR.join(codificados) + SEPARADOR if codificados else b""
+
+        self.n_processos = (os.cpu_count() or 1) if fragmentos < 0 else fragmentos
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._blocos: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+        if not self.n_processos or not self.n_documentos:
+            self.n_processos = 0
+            self._buffer, self._offsets = dados, offsets
+            self.fragmentos = [(0, self.n_documentos)]
+            return
+
+        textos_shm = shared_memory.SharedMemory(create=True, size=len(dados))
+        textos_shm.buf[:len(dados)] = dados
+        offsets_shm = shared_memory.SharedMemory(create=True, size=offsets.nbytes)
+        self._offsets = np.ndarray(offsets.shape, dtype=np.int64, buffer=offsets_shm.buf)
+        self._offsets[:] = offsets
+        self._blocos = [textos_shm, offsets_shm]
+        self._buffer = textos_shm.buf
+
+        # Limites dos fragmentos: documentos mais próximos de cortes com o mesmo número de bytes
+        cortes = np.searchsorted(offsets, np.linspace(0, offsets[-1], self.n_processos + 1))
+        cortes[0], cortes[-1] = 0, self.n_documentos
+        limites = sorted(set(int(c) for c in cortes))
+        self.fragmentos = list(zip(limites[:-1], limites[1:]))
+
+        self._executor = ProcessPoolExecutor(max_workers=self.n_processos, mp_context=contexto_processos(),
+                                             initializer=_anexar_indice,
+                                             initargs=(textos_shm.name, offsets_shm.name, self.n_documentos))
+        atexit.register(self.fechar)
+        # Cria os processos (que anexam a memória compartilhada) já na inicialização
+        for futuro in [self._submeter(0, 0, b"", 1) for _ in range(self.n_processos)]:
+            futuro.result()
+        logger.info("Índice da literatura: %d documentos em %d fragmentos (%d processos, %d bytes compartilhados)",
+                    self.n_documentos, len(self.fragmentos), self.n_processos, len(dados))
+
+    def _submeter(self, inicio: int, fim: int, termo: bytes, k: int):
+        return self._executor.submit(
+            _buscar_fragmento, self._blocos[0].name, self._blocos[1].name, self.n_documentos, inicio, fim, termo, k
+        )
+
+    def buscar(self, termo: str, k: int = TOP_K_PADRAO) -> List[int]:
+        """
+        Índices (na ordem dos textos do construtor) dos documentos que contêm o
+        termo, sem diferenciar maiúsculas, do mais ao menos relevante.
+
+        Args:
+            termo: Texto procurado (como substring).
+            k: Máximo de documentos (0 = todos).
+
+        Returns:
+            Lista de índices de documentos.
+        """
+        termo_codificado = normalizar(termo).encode("utf-8")
+        if not self.n_processos:
+            if not self.n_documentos:
+                return []
+            resultados = buscar_intervalo(self._buffer, self._offsets, 0, self.n_documentos, termo_codificado, k)
+        else:
+            with self._lock:
+                if self._executor is None:
+                    raise RuntimeError("Índice da literatura fechado.")
+                futuros = [self._submeter(inicio, fim, termo_codificado, k) for inicio, fim in self.fragmentos]
+            # Cada fragmento devolve seus k melhores já ordenados; a fusão mantém a ordem global
+            resultados = list(itertools.islice(heapq.merge(*(f.result() for f in futuros)), k or None))
+        return [documento for _, _, documento in resultados]
+
+    def fechar(self):
+        """
+        Encerra os processos de busca e libera a memória compartilhada.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=True, cancel_futures=True)
+        # As visões sobre os blocos precisam ser soltas antes de fechá-los
+        self._buffer, self._offsets = b"", np.zeros(1, dtype=np.int64)
+        for bloco in self._blocos:
+            bloco.close()
+            bloco.unlink()
+        self._blocos = []
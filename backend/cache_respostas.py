@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Cache de respostas
+Cache LRU com TTL dos painéis do AgentGeral, invalidado pela versão dos dados
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+CAPACIDADE_PADRAO = int(os.getenv("CACHE_RESPOSTAS_CAPACIDADE", "256"))
+TTL_PADRAO = float(os.getenv("CACHE_RESPOSTAS_TTL_SEGUNDOS", "300"))
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Forma canônica de uma consulta: minúsculas, sem acentos, sem pontuação e
+    com espaços colapsados ("Riscos de Marte?" e "riscos de  marte" coincidem).
+    """
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", sem_acentos).split())
+
+
+class _Entrada:
+    __slots__ = ("valor", "versao", "expira_em")
+
+    def __init__(self, valor: Any, versao: Hashable, expira_em: float):
+        self.valor = valor
+        self.versao = versao
+        self.expira_em = expira_em
+
+
+class CacheRespostas:
+    """
+    Cache LRU limitado por número de entradas e por tempo de vida.
+
+    Cada entrada guarda a versão dos dados de que depende (ex.: ETag do dataset
+    CSV); uma leitura com outra versão descarta a entrada, de modo que uma
+    mudança nos datasets invalida as respostas afetadas.
+    """
+
+    def __init__(self, capacidade: int = CAPACIDADE_PADRAO, ttl: float = TTL_PADRAO):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, _Entrada]" = OrderedDict()
+        self._contadores = {"acertos": 0, "falhas": 0, "expiradas": 0, "invalidadas": 0, "removidas_lru": 0}
+
+    @property
+    def ativo(self) -> bool:
+        return self.capacidade > 0 and self.ttl > 0
+
+    def obter(self, chave: Hashable, versao: Hashable = None) -> Optional[Any]:
+        """
+        Retorna o valor em cache para a chave, ou None se ausente, expirado ou
+        calculado sobre outra versão dos dados.
+        """
+        if not self.ativo:
+            return None
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._contadores["falhas"] += 1
+                return None
+            if entrada.expira_em <= time.monotonic():
+                del self._entradas[chave]
+                self._contadores["expiradas"] += 1
+                self._contadores["falhas"] += 1
+                return None
+            if entrada.versao != versao:
+                del self._entradas[chave]
+                self._contadores["invalidadas"] += 1
+                self._contadores["falhas"] += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self._contadores["acertos"] += 1
+            return entrada.valor
+
+    def guardar(self, chave: Hashable, valor: Any, versao: Hashable = None):
+        if not self.ativo:
+            return
+        with self._lock:
+            self._entradas[chave] = _Entrada(valor, versao, time.monotonic() + self.ttl)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self._contadores["removidas_lru"] += 1
+
+    def limpar(self) -> int:
+        """Remove todas as entradas e retorna quantas havia."""
+        with self._lock:
+            total = len(self._entradas)
+            self._entradas.clear()
+            self._contadores["invalidadas"] += total
+            return total
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self._contadores["acertos"] + self._contadores["falhas"]
+            return {
+                **self._contadores,
+                "taxa_acerto": self._contadores["acertos"] / consultas if consultas else 0.0,
+                "tamanho": len(self._entradas),
+                "capacidade": self.capacidade,
+                "ttl_segundos": self.ttl,
+            }
+
+
+def chave_consulta(texto: str, agentes: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
+    """Chave de cache: texto normalizado e o conjunto de agentes roteados."""
+    return (normalizar_texto(texto), tuple(sorted(agentes)))
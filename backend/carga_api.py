@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga para a API Flask do sistema multi-agente
+Mede throughput, latência (p50/p95/p99) e taxa de erro por endpoint
+
+Por padrão sobe um servidor stub local com o CSV de publicações (no lugar do
+GitHub) e uma instância do servidor_api apontando para ele.
+
+Uso:
+    python carga_api.py --concorrencia 1,4,16 --duracao 20
+    python carga_api.py --alvo http://localhost:5000 --mix csv=1,literatura=4,status=2
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+
+from stub_http import ServidorStub, gerar_publicacoes_sinteticas, escrever_csv
+
+NOME_CSV_PUBLICACOES = "SB_publication_PMC.csv"
+
+# Operações disponíveis no mix: nome -> (método, caminho, corpo JSON)
+OPERACOES: Dict[str, Tuple[str, str, Optional[Dict[str, Any]]]] = {
+    "csv": ("POST", "/api/processar-consulta", {"consulta": "Mostre a distribuição e a média da tabela"}),
+    "literatura": ("POST", "/api/processar-consulta", {"consulta": "Quais artigos sobre microgravidade?"}),
+    "missoes": ("POST", "/api/processar-consulta", {"consulta": "Quais os riscos de uma missão para Marte?"}),
+    "todos": ("POST", "/api/processar-consulta",
+              {"consulta": "Quero analisar dados de missões da NASA e encontrar artigos sobre exploração de Marte"}),
+    "status": ("GET", "/api/status", None),
+    "agentes": ("GET", "/api/agentes", None),
+    "historico": ("GET", "/api/historico", None),
+}
+
+MIX_PADRAO = "csv=1,literatura=3,missoes=3,todos=1,status=2"
+
+
+def interpretar_mix(texto: str) -> List[Tuple[str, float]]:
+    """
+    Converte 'csv=1,literatura=3' em [(operacao, peso), ...].
+    """
+    mix = []
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        nome = nome.strip()
+        if nome not in OPERACOES:
+            raise ValueError(f"Operação '{nome}' desconhecida. Use uma de: {', '.join(OPERACOES)}")
+        mix.append((nome, float(peso or 1)))
+    return mix
+
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, max(0, int(round(p / 100 * len(valores_ordenados))) - 1))
+    return valores_ordenados[indice]
+
+
+class GeradorCarga:
+    """
+    Gerador de carga em malha fechada: cada worker envia uma requisição,
+    espera a resposta e envia a próxima, até o fim da duração.
+    """
+
+    def __init__(self, url_base: str, mix: List[Tuple[str, float]], timeout: float = 120.0, semente: int = 42):
+        self.url_base = url_base.rstrip("/")
+        self.nomes = [nome for nome, _ in mix]
+        self.pesos = [peso for _, peso in mix]
+        self.timeout = timeout
+        self.semente = semente
+        self._local = threading.local()
+
+    def _sessao(self) -> requests.Session:
+        sessao = getattr(self._local, "sessao", None)
+        if sessao is None:
+            sessao = self._local.sessao = requests.Session()
+        return sessao
+
+    def _worker(self, indice: int, fim: float, amostras: List[Tuple[str, str, float, bool]]):
+        rng = random.Random(self.semente + indice)
+        sessao = self._sessao()
+        while time.perf_counter() < fim:
+            nome = rng.choices(self.nomes, weights=self.pesos)[0]
+            metodo, caminho, corpo = OPERACOES[nome]
+            inicio = time.perf_counter()
+            try:
+                resposta = sessao.request(metodo, self.url_base + caminho, json=corpo, timeout=self.timeout)
+                ok = resposta.status_code < 400
+            except requests.exceptions.RequestException:
+                ok = False
+            amostras.append((nome, f"{metodo} {caminho}", time.perf_counter() - inicio, ok))
+
+    def executar(self, concorrencia: int, duracao: float) -> Dict[str, Any]:
+        """
+        Executa um nível de concorrência e retorna o relatório agregado.
+        """
+        amostras: List[Tuple[str, str, float, bool]] = []
+        inicio = time.perf_counter()
+        fim = inicio + duracao
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            for i in range(concorrencia):
+                executor.submit(self._worker, i, fim, amostras)
+        decorrido = time.perf_counter() - inicio
+        return self._relatorio(amostras, concorrencia, decorrido)
+
+    @staticmethod
+    def _agregar(amostras: List[Tuple[str, str, float, bool]], decorrido: float) -> Dict[str, Any]:
+        latencias = sorted(a[2] for a in amostras)
+        erros = sum(1 for a in amostras if not a[3])
+        return {
+            "requisicoes": len(amostras),
+            "erros": erros,
+            "taxa_erro": erros / len(amostras) if amostras else 0.0,
+            "throughput_rps": len(amostras) / decorrido if decorrido else 0.0,
+            "p50_ms": percentil(latencias, 50) * 1000,
+            "p95_ms": percentil(latencias, 95) * 1000,
+            "p99_ms": percentil(latencias, 99) * 1000,
+            "max_ms": (latencias[-1] if latencias else 0.0) * 1000,
+        }
+
+    def _relatorio(self, amostras, concorrencia: int, decorrido: float) -> Dict[str, Any]:
+        por_endpoint = defaultdict(list)
+        por_operacao = defaultdict(list)
+        for amostra in amostras:
+            por_endpoint[amostra[1]].append(amostra)
+            por_operacao[amostra[0]].append(amostra)
+        return {
+            "concorrencia": concorrencia,
+            "duracao_s": decorrido,
+            "total": self._agregar(amostras, decorrido),
+            "por_endpoint": {k: self._agregar(v, decorrido) for k, v in sorted(por_endpoint.items())},
+            "por_operacao": {k: self._agregar(v, decorrido) for k, v in sorted(por_operacao.items())},
+        }
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor_api(url_publicacoes: str, porta: int, diretorio_dados: str, timeout: float = 300.0,
+                         cache_respostas: bool = False) -> subprocess.Popen:
+    """
+    Sobe o servidor_api em um subprocesso (servidor WSGI com threads, sem reloader)
+    apontando o CSV de publicações para o stub local, e espera até ele ficar
+    pronto (/api/ready com 200): a carga medida não se sobrepõe ao aquecimento.
+
+    Por padrão o cache de respostas fica desativado: o mix repete sempre as
+    mesmas consultas, e com o cache só a primeira de cada uma exercitaria os agentes.
+
+    Args:
+        diretorio_dados: Onde o servidor grava downloads, gráficos e temas
+            (ARTEFATOS_DIR e TOPICOS_DIR), em vez do diretório padrão.
+    """
+    env = dict(os.environ, SB_PUBLICATIONS_CSV_URL=url_publicacoes, MPLBACKEND="Agg",
+               LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"), ARTEFATOS_DIR=diretorio_dados,
+               TOPICOS_DIR=os.path.join(diretorio_dados, "topicos"))
+    if not cache_respostas:
+        env["CACHE_RESPOSTAS_CAPACIDADE"] = "0"
+    codigo = (
+        "import logging; from werkzeug.serving import run_simple; import servidor_api; "
+        "logging.getLogger('werkzeug').setLevel(logging.WARNING); "
+        f"run_simple('127.0.0.1', {porta}, servidor_api.app, threaded=True)"
+    )
+    processo = subprocess.Popen([sys.executable, "-c", codigo], env=env,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    limite = time.time() + timeout
+    estado = "sem resposta"
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor_api encerrou durante a inicialização.")
+        try:
+            resposta = requests.get(f"http://127.0.0.1:{porta}/api/ready", timeout=1)
+            if resposta.status_code == 200:
+                return processo
+            estado = resposta.text
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    processo.terminate()
+    raise RuntimeError(f"Tempo esgotado aguardando o servidor_api ficar pronto: {estado}")
+
+
+def imprimir_relatorio(relatorio: Dict[str, Any]):
+    print(f"\n=== Concorrência {relatorio['concorrencia']} ({relatorio['duracao_s']:.1f}s) ===", file=sys.stderr)
+    cabecalho = f"{'':<34} {'req':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erro %':>7}"
+    print(cabecalho, file=sys.stderr)
+    linhas = [("TOTAL", relatorio["total"])] + list(relatorio["por_endpoint"].items()) + \
+             [(f"  [{k}]", v) for k, v in relatorio["por_operacao"].items()]
+    for nome, r in linhas:
+        print(f"{nome:<34} {r['requisicoes']:>6} {r['throughput_rps']:>8.2f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['taxa_erro'] * 100:>7.2f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API do sistema multi-agente NASA")
+    parser.add_argument("--alvo", help="URL de um servidor já em execução (por padrão sobe um local com stub)")
+    parser.add_argument("--concorrencia", default="1,4,16",
+                        help="Níveis de concorrência separados por vírgula, executados em sequência")
+    parser.add_argument("--duracao", type=float, default=20.0, help="Duração de cada nível (segundos)")
+    parser.add_argument("--mix", default=MIX_PADRAO, help=f"Pesos das operações (padrão: {MIX_PADRAO})")
+    parser.add_argument("--titulos-stub", type=int, default=200)
+    parser.add_argument("--atraso-stub", type=float, default=0.0, help="Latência simulada do upstream (segundos)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout de cada requisição (segundos)")
+    parser.add_argument("--timeout-prontidao", type=float, default=300.0,
+                        help="Espera máxima pelo aquecimento do servidor local (segundos)")
+    parser.add_argument("--com-cache", action="store_true",
+                        help="Mantém o cache de respostas do servidor local (mede acertos no cache, não os agentes)")
+    parser.add_argument("--saida", help="Arquivo JSON com os relatórios")
+    args = parser.parse_args()
+
+    mix = interpretar_mix(args.mix)
+    niveis = [int(n) for n in args.concorrencia.split(",")]
+
+    processo = None
+    with tempfile.TemporaryDirectory(prefix="carga_api_") as tmp:
+        escrever_csv(gerar_publicacoes_sinteticas(args.titulos_stub), tmp, NOME_CSV_PUBLICACOES)
+        with ServidorStub(tmp, atraso=args.atraso_stub) as stub:
+            try:
+                if args.alvo:
+                    url_base = args.alvo
+                else:
+                    porta = _porta_livre()
+                    processo = iniciar_servidor_api(stub.url(NOME_CSV_PUBLICACOES), porta,
+                                                    os.path.join(tmp, "dados"), timeout=args.timeout_prontidao,
+                                                    cache_respostas=args.com_cache)
+                    url_base = f"http://127.0.0.1:{porta}"
+
+                gerador = GeradorCarga(url_base, mix, timeout=args.timeout)
+                relatorios = []
+                for nivel in niveis:
+                    relatorio = gerador.executar(nivel, args.duracao)
+                    imprimir_relatorio(relatorio)
+                    relatorios.append(relatorio)
+            finally:
+                if processo is not None:
+                    processo.terminate()
+                    processo.wait(timeout=10)
+
+    # Com --alvo, o cache é o do servidor remoto (não controlado aqui)
+    cache = "remoto" if args.alvo else ("ativo" if args.com_cache else "desativado")
+    documento = {"alvo": args.alvo or "local", "mix": dict(mix), "cache_respostas": cache, "niveis": relatorios}
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(documento, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Catálogo de datasets
+Registro das fontes CSV (NASA/OSDR) com metadados, seleção do dataset mais
+relevante para uma consulta e pré-carregamento em segundo plano
+"""
+
+import json
+import logging
+import os
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional
+
+from agent_literatura import GITHUB_CSV_URL
+
+logger = logging.getLogger(__name__)
+
+# Arquivo JSON opcional com datasets adicionais (lista de objetos com os campos de DatasetCatalogo)
+ARQUIVO_CATALOGO = os.getenv("CATALOGO_DATASETS_ARQUIVO")
+ID_PADRAO = "sb_publications"
+URL_API_OSDR = os.getenv("OSDR_API_URL", "https://visualization.osdr.nasa.gov/biodata/api/v2")
+# Quantos datasets (marcados como populares e depois os mais usados) o prefetcher mantém aquecidos
+MAX_DATASETS_PREFETCH = int(os.getenv("PREFETCH_MAX_DATASETS", "5"))
+INTERVALO_PREFETCH = float(os.getenv("PREFETCH_INTERVALO_SEGUNDOS", "300"))
+
+
+@dataclass
+class DatasetCatalogo:
+    """Uma fonte CSV do catálogo"""
+    id: str
+    nome: str
+    url: str
+    descricao: str = ""
+    fonte: str = ""
+    palavras_chave: List[str] = field(default_factory=list)
+    popular: bool = False
+    # CSV que só cresce por linhas acrescentadas (ex.: telemetria): usa a análise incremental
+    incremental: bool = False
+
+
+DATASETS_PADRAO = [
+    DatasetCatalogo(
+        id=ID_PADRAO,
+        nome="SB Publications (PMC)",
+        url=GITHUB_CSV_URL,
+        descricao="Publicações de biociência espacial da NASA com links para o PubMed Central",
+        fonte="GitHub jgalazka/SB_publications",
+        palavras_chave=["publicação", "publicações", "artigo", "artigos", "paper", "pmc", "pubmed",
+                        "biociência", "bioscience", "título", "literatura"],
+        popular=True,
+    ),
+    # Metadados de amostras do OSDR (API de dados biológicos; CSV é o formato padrão das consultas)
+    DatasetCatalogo(
+        id="osdr_osd48_amostras",
+        nome="OSDR OSD-48 Rodent Research-1",
+        url=f"{URL_API_OSDR}/query/metadata/?id.accession=OSD-48&format=csv",
+        descricao="Amostras do estudo OSD-48 (GLDS-48): fígado de camundongos da missão Rodent Research-1",
+        fonte="NASA OSDR / GeneLab",
+        palavras_chave=["osd-48", "glds-48", "rodent research", "rr-1", "fígado", "liver", "transcriptoma"],
+    ),
+    DatasetCatalogo(
+        id="osdr_camundongos_amostras",
+        nome="OSDR Amostras de Camundongos",
+        url=f"{URL_API_OSDR}/query/metadata/?study.characteristics.organism=Mus%20musculus&format=csv",
+        descricao="Amostras de todos os estudos do OSDR com Mus musculus",
+        fonte="NASA OSDR / GeneLab",
+        palavras_chave=["camundongo", "camundongos", "mouse", "mice", "mus musculus", "roedor", "roedores"],
+    ),
+    DatasetCatalogo(
+        id="osdr_arabidopsis_amostras",
+        nome="OSDR Amostras de Arabidopsis",
+        url=f"{URL_API_OSDR}/query/metadata/?study.characteristics.organism=Arabidopsis%20thaliana&format=csv",
+        descricao="Amostras de todos os estudos do OSDR com Arabidopsis thaliana",
+        fonte="NASA OSDR / GeneLab",
+        palavras_chave=["arabidopsis", "planta", "plantas", "plant", "plants", "botânica"],
+    ),
+]
+
+
+def _normalizar(texto: str) -> str:
+    # Minúsculas e sem acentos, para 'publicacao' casar com 'publicação'
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+class CatalogoDatasets:
+    """
+    Registro de datasets com seleção por palavras-chave e contagem de uso.
+    """
+
+    def __init__(self, datasets: Optional[List[DatasetCatalogo]] = None, id_padrao: str = ID_PADRAO):
+        self._lock = threading.Lock()
+        self._datasets: Dict[str, DatasetCatalogo] = {}
+        self._usos: Counter = Counter()
+        self.id_padrao = id_padrao
+        for dataset in datasets or []:
+            self.registrar(dataset)
+
+    def registrar(self, dataset: DatasetCatalogo):
+        with self._lock:
+            self._datasets[dataset.id] = dataset
+
+    def carregar_arquivo(self, caminho: str) -> int:
+        """
+        Registra os datasets de um arquivo JSON (lista de objetos com id, nome, url
+        e, opcionalmente, descricao, fonte, palavras_chave, popular e incremental).
+
+        Returns:
+            Número de datasets registrados.
+        """
+        with open(caminho, encoding="utf-8") as f:
+            entradas = json.load(f)
+        for entrada in entradas:
+            self.registrar(DatasetCatalogo(**entrada))
+        logger.info("Catálogo: %d datasets carregados de %s", len(entradas), caminho)
+        return len(entradas)
+
+    def obter(self, id_dataset: str) -> Optional[DatasetCatalogo]:
+        return self._datasets.get(id_dataset)
+
+    def listar(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(asdict(d), usos=self._usos[d.id]) for d in self._datasets.values()]
+
+    @staticmethod
+    def pontuar(consulta: str, dataset: DatasetCatalogo) -> float:
+        """
+        Relevância de um dataset para a consulta: cada palavra-chave presente
+        vale 1 e cada palavra do nome presente vale 0,5.
+        """
+        texto = _normalizar(consulta)
+        pontos = sum(1.0 for palavra in dataset.palavras_chave if _normalizar(palavra) in texto)
+        pontos += sum(0.5 for palavra in _normalizar(dataset.nome).split() if len(palavra) > 3 and palavra in texto)
+        return pontos
+
+    def selecionar(self, consulta: str, max_datasets: int = 1, registrar_uso: bool = True) -> List[DatasetCatalogo]:
+        """
+        Seleciona os datasets mais relevantes para a consulta e registra o uso.
+        Sem nenhum dataset relevante, usa o dataset padrão.
+
+        Args:
+            consulta: Texto da consulta.
+            max_datasets: Número máximo de datasets retornados.
+            registrar_uso: Conta a seleção na popularidade dos datasets.
+
+        Returns:
+            Lista de datasets, do mais para o menos relevante.
+        """
+        with self._lock:
+            candidatos = list(self._datasets.values())
+        pontuados = sorted(((self.pontuar(consulta, d), d) for d in candidatos), key=lambda p: p[0], reverse=True)
+        selecionados = [d for pontos, d in pontuados if pontos > 0][:max_datasets]
+        if not selecionados and self.id_padrao in self._datasets:
+            selecionados = [self._datasets[self.id_padrao]]
+        if registrar_uso:
+            with self._lock:
+                for dataset in selecionados:
+                    self._usos[dataset.id] += 1
+        return selecionados
+
+    def populares(self, n: int = MAX_DATASETS_PREFETCH) -> List[DatasetCatalogo]:
+        """
+        Datasets marcados como populares seguidos dos mais usados, até n.
+        """
+        with self._lock:
+            ordem = [d for d in self._datasets.values() if d.popular]
+            ordem += [self._datasets[i] for i, _ in self._usos.most_common() if i in self._datasets]
+        vistos, unicos = set(), []
+        for dataset in ordem:
+            if dataset.id not in vistos:
+                vistos.add(dataset.id)
+                unicos.append(dataset)
+        return unicos[:n]
+
+
+def catalogo_padrao() -> CatalogoDatasets:
+    """
+    Catálogo com os datasets embutidos e os de CATALOGO_DATASETS_ARQUIVO, se definido.
+    """
+    catalogo = CatalogoDatasets(DATASETS_PADRAO)
+    if ARQUIVO_CATALOGO:
+        try:
+            catalogo.carregar_arquivo(ARQUIVO_CATALOGO)
+        except (OSError, ValueError, TypeError) as e:
+            logger.error("Não foi possível carregar o catálogo de %s: %s", ARQUIVO_CATALOGO, e)
+    return catalogo
+
+
+class PrefetcherDatasets:
+    """
+    Mantém a cópia local dos datasets populares válida em segundo plano, para
+    que as consultas usem o arquivo local em vez de baixá-lo durante a requisição.
+    """
+
+    def __init__(self, catalogo: CatalogoDatasets, agent_csv, intervalo: float = INTERVALO_PREFETCH,
+                 max_datasets: int = MAX_DATASETS_PREFETCH):
+        self.catalogo = catalogo
+        self.agent_csv = agent_csv
+        self.intervalo = intervalo
+        self.max_datasets = max_datasets
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def aquecer(self) -> Dict[str, str]:
+        """
+        Baixa ou revalida agora os datasets populares.
+
+        Returns:
+            Dicionário id do dataset -> 'ok' ou a mensagem de erro.
+        """
+        estado = {}
+        for dataset in self.catalogo.populares(self.max_datasets):
+            try:
+                # Sempre revalida (max_idade=0): é isto que mantém a cópia local dentro da validade.
+                # Uma falha aqui é reportada, e não mascarada pela cópia antiga
+                self.agent_csv.download_csv(dataset.url, self.agent_csv.nome_arquivo_local(dataset.url), max_idade=0,
+                                            permitir_desatualizado=False)
+                estado[dataset.id] = "ok"
+            except Exception as e:
+                logger.warning("Prefetch do dataset %s falhou: %s", dataset.id, e)
+                estado[dataset.id] = str(e)
+        return estado
+
+    def _executar(self, aquecer_agora: bool):
+        if not aquecer_agora:
+            self._parar.wait(self.intervalo)
+        while not self._parar.is_set():
+            self.aquecer()
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self, aquecer_agora: bool = True) -> "PrefetcherDatasets":
+        """
+        Inicia a thread de revalidação periódica. Com aquecer_agora=False, a
+        primeira revalidação espera um intervalo (o chamador já aqueceu).
+        """
+        self._thread = threading.Thread(target=self._executar, args=(aquecer_agora,), name="prefetch-datasets",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def encerrar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Coalescência de requisições (single-flight)
+Chamadas concorrentes com a mesma chave compartilham uma única execução
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _ChamadaEmVoo:
+    """Estado de uma execução em andamento para uma chave."""
+
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado: Any = None
+        self.excecao: Optional[BaseException] = None
+        self.aguardando = 0
+
+
+class SingleFlight:
+    """
+    Garante que, para uma mesma chave, apenas uma execução esteja em voo por vez.
+    As chamadas que chegam enquanto ela está em andamento esperam e recebem o
+    mesmo resultado (ou a mesma exceção). Nada é guardado após a conclusão:
+    isto não é um cache, apenas deduplicação de trabalho simultâneo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_voo: Dict[Hashable, _ChamadaEmVoo] = {}
+
+    def executar(self, chave: Hashable, funcao: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Executa funcao(*args, **kwargs) ou aguarda a execução já em voo para a chave.
+
+        Args:
+            chave: Identificador da computação (ex.: consulta normalizada, URL).
+            funcao: Função a ser executada pela chamada líder.
+
+        Returns:
+            Tupla (resultado, compartilhado), onde compartilhado indica que o
+            resultado veio de uma execução iniciada por outra chamada.
+        """
+        with self._lock:
+            chamada = self._em_voo.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_voo[chave] = _ChamadaEmVoo()
+            else:
+                chamada.aguardando += 1
+
+        if not lider:
+            chamada.concluida.wait()
+            if chamada.excecao is not None:
+                raise chamada.excecao
+            return chamada.resultado, True
+
+        try:
+            chamada.resultado = funcao(*args, **kwargs)
+            return chamada.resultado, False
+        except BaseException as e:
+            chamada.excecao = e
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+            chamada.concluida.set()
+
+    def em_voo(self) -> int:
+        """Número de chaves com execução em andamento."""
+        with self._lock:
+            return len(self._em_voo)
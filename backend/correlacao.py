@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Análise entre colunas
+Matrizes de correlação de Pearson/Spearman em blocos de colunas, pares mais
+correlacionados e ranking de informação mútua para colunas categóricas
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Colunas por bloco: cada par de blocos custa alguns GEMMs (linhas x bloco)^T (linhas x bloco)
+TAMANHO_BLOCO = 256
+# Colunas categóricas com mais valores distintos que isto (ex.: títulos, IDs) ficam fora da informação mútua
+LIMITE_CATEGORIAS_MI = 200
+# Limites da informação mútua: linhas amostradas e colunas avaliadas
+MAX_LINHAS_MI = 10_000
+MAX_COLUNAS_CATEGORICAS_MI = 20
+MAX_COLUNAS_NUMERICAS_MI = 100
+# Faixas de quantis usadas para discretizar as colunas numéricas na informação mútua
+FAIXAS_MI = 10
+# Matrizes completas só são devolvidas até este número de colunas (acima disso, apenas os rankings)
+MAX_COLUNAS_MATRIZ = 100
+
+
+def _colunas_numericas(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.columns
+            if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+
+
+def _colunas_categoricas(df: pd.DataFrame) -> List[str]:
+    categoricas = []
+    for coluna in df.columns:
+        serie = df[coluna]
+        if not (pd.api.types.is_bool_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype)
+                or pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+            continue
+        distintos = serie.nunique(dropna=True)
+        if 1 < distintos <= LIMITE_CATEGORIAS_MI:
+            categoricas.append(coluna)
+    return categoricas
+
+
+def _matriz_pearson_blocos(valores: np.ndarray, tamanho_bloco: int = TAMANHO_BLOCO) -> np.ndarray:
+    """
+    Correlação de Pearson entre as colunas de uma matriz (linhas x colunas).
+
+    Sem NaN, cada bloco de colunas é padronizado uma vez e cada par de blocos é
+    um único produto de matrizes. Com NaN, a correlação usa as linhas completas
+    de cada par (como o pandas), obtida de somas por máscara também em GEMMs.
+    """
+    n_linhas, n_colunas = valores.shape
+    resultado = np.full((n_colunas, n_colunas), np.nan)
+    mascara = ~np.isnan(valores)
+    # Centralizar pela média da coluna reduz o cancelamento numérico nas somas
+    with np.errstate(invalid="ignore"):
+        centrados = valores - np.nanmean(valores, axis=0)
+    centrados[~mascara] = 0.0
+    sem_nan = bool(mascara.all())
+
+    if sem_nan:
+        normas = np.sqrt((centrados * centrados).sum(axis=0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            padronizados = centrados / normas
+
+    blocos = [slice(i, min(i + tamanho_bloco, n_colunas)) for i in range(0, n_colunas, tamanho_bloco)]
+    for i, a in enumerate(blocos):
+        for b in blocos[i:]:
+            if sem_nan:
+                r = padronizados[:, a].T @ padronizados[:, b]
+            else:
+                xa, xb = centrados[:, a], centrados[:, b]
+                ma, mb = mascara[:, a].astype(np.float64), mascara[:, b].astype(np.float64)
+                n = ma.T @ mb
+                soma_a, soma_b = xa.T @ mb, ma.T @ xb
+                soma_ab = xa.T @ xb
+                quad_a, quad_b = (xa * xa).T @ mb, ma.T @ (xb * xb)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    cov = n * soma_ab - soma_a * soma_b
+                    var_a = n * quad_a - soma_a * soma_a
+                    var_b = n * quad_b - soma_b * soma_b
+                    r = cov / np.sqrt(var_a * var_b)
+                r[n < 2] = np.nan
+            r = np.clip(r, -1.0, 1.0)
+            resultado[a, b] = r
+            resultado[b, a] = r.T
+    # A diagonal é 1 para colunas com variância (NaN para constantes, como no pandas)
+    diagonal = np.diag(resultado).copy()
+    np.fill_diagonal(resultado, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return resultado
+
+
+def matriz_correlacao(df: pd.DataFrame, metodo: str = "pearson", tamanho_bloco: int = TAMANHO_BLOCO) -> pd.DataFrame:
+    """
+    Matriz de correlação das colunas numéricas, calculada em blocos de colunas.
+
+    Args:
+        df: DataFrame do pandas.
+        metodo: 'pearson' ou 'spearman'. Spearman é Pearson sobre os postos
+            (empates recebem o posto médio); os postos são calculados por coluna,
+            então com NaN em linhas diferentes o resultado é uma aproximação do
+            df.corr(method='spearman').
+        tamanho_bloco: Colunas por bloco.
+
+    Returns:
+        DataFrame colunas x colunas com as correlações.
+    """
+    colunas = _colunas_numericas(df)
+    if metodo == "spearman":
+        valores = df[colunas].rank(method="average").to_numpy(dtype=np.float64, na_value=np.nan)
+    elif metodo == "pearson":
+        valores = df[colunas].to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        raise ValueError(f"Método de correlação '{metodo}' inválido. Escolha entre 'pearson', 'spearman'.")
+    return pd.DataFrame(_matriz_pearson_blocos(valores, tamanho_bloco), index=colunas, columns=colunas)
+
+
+def pares_mais_correlacionados(matriz: pd.DataFrame, k: int = 10) -> List[Dict[str, Any]]:
+    """
+    Os k pares de colunas distintas com maior correlação em valor absoluto.
+    """
+    valores = matriz.to_numpy()
+    linhas, colunas = np.triu_indices(len(valores), k=1)
+    correlacoes = valores[linhas, colunas]
+    validos = ~np.isnan(correlacoes)
+    linhas, colunas, correlacoes = linhas[validos], colunas[validos], correlacoes[validos]
+    if len(correlacoes) > k:
+        selecionados = np.argpartition(-np.abs(correlacoes), k)[:k]
+    else:
+        selecionados = np.arange(len(correlacoes))
+    selecionados = selecionados[np.argsort(-np.abs(correlacoes[selecionados]))]
+    nomes = matriz.columns
+    return [
+        {"coluna_a": nomes[linhas[i]], "coluna_b": nomes[colunas[i]], "correlacao": float(correlacoes[i])}
+        for i in selecionados
+    ]
+
+
+def _discretizar(valores: np.ndarray, faixas: int = FAIXAS_MI) -> np.ndarray:
+    """
+    Códigos de faixas de quantis por coluna; NaN recebe um código próprio.
+    """
+    quantis = np.linspace(0, 1, faixas + 1)[1:-1]
+    with np.errstate(invalid="ignore"):
+        limites = np.nanquantile(valores, quantis, axis=0)
+    codigos = np.empty(valores.shape, dtype=np.int64)
+    for j in range(valores.shape[1]):
+        codigos[:, j] = np.searchsorted(limites[:, j], valores[:, j], side="right")
+    codigos[np.isnan(valores)] = faixas
+    return codigos
+
+
+def _informacao_mutua_discreta(caracteristicas: np.ndarray, alvo: np.ndarray) -> np.ndarray:
+    """
+    Informação mútua (nats) entre cada coluna de códigos e o alvo, o mesmo valor
+    de sklearn.metrics.mutual_info_score / mutual_info_classif(discrete_features=True).
+    As tabelas de contingência de todas as colunas saem de um único bincount,
+    em vez de uma matriz esparsa por par.
+    """
+    n, m = caracteristicas.shape
+    _, alvo = np.unique(alvo, return_inverse=True)
+    k_alvo = int(alvo.max()) + 1
+    k_caract = int(caracteristicas.max()) + 1
+    deslocamento = np.arange(m, dtype=np.int64) * (k_caract * k_alvo)
+    indices = (caracteristicas * k_alvo + alvo[:, None] + deslocamento).ravel()
+    conjunta = np.bincount(indices, minlength=m * k_caract * k_alvo).reshape(m, k_caract, k_alvo) / n
+    marginal_x = conjunta.sum(axis=2, keepdims=True)
+    marginal_y = conjunta.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        termos = conjunta * np.log(conjunta / (marginal_x * marginal_y))
+    return np.clip(np.nansum(termos, axis=(1, 2)), 0.0, None)
+
+
+def ranking_informacao_mutua(df: pd.DataFrame, k: int = 10, semente: int = 0) -> List[Dict[str, Any]]:
+    """
+    Ranking de dependência envolvendo colunas categóricas.
+
+    Para cada categórica, mede a informação mútua discreta (em nats) com as
+    demais categóricas e com as numéricas discretizadas em faixas de quantis,
+    todos os pares na mesma escala. Usa uma amostra de até MAX_LINHAS_MI linhas.
+
+    Returns:
+        Lista dos k pares mais dependentes, do maior para o menor.
+    """
+    categoricas = _colunas_categoricas(df)[:MAX_COLUNAS_CATEGORICAS_MI]
+    if not categoricas:
+        return []
+    if len(df) > MAX_LINHAS_MI:
+        df = df.sample(MAX_LINHAS_MI, random_state=semente)
+
+    # NaN das categóricas também recebe um código próprio (o último)
+    codigos_categoricos = np.column_stack([pd.factorize(df[c], use_na_sentinel=True)[0] for c in categoricas])
+    codigos_categoricos[codigos_categoricos < 0] = codigos_categoricos.max() + 1
+    numericas = _colunas_numericas(df)[:MAX_COLUNAS_NUMERICAS_MI]
+    if numericas:
+        codigos_numericos = _discretizar(df[numericas].to_numpy(dtype=np.float64, na_value=np.nan))
+    else:
+        codigos_numericos = np.empty((len(df), 0), dtype=np.int64)
+
+    pares = []
+    for i, a in enumerate(categoricas):
+        outras = categoricas[i + 1:]
+        caracteristicas = np.hstack([codigos_categoricos[:, i + 1:], codigos_numericos])
+        if caracteristicas.shape[1] == 0:
+            continue
+        informacao = _informacao_mutua_discreta(caracteristicas, codigos_categoricos[:, i])
+        for j, b in enumerate(outras + numericas):
+            pares.append({
+                "coluna_a": a, "coluna_b": b,
+                "tipo": "categorica-categorica" if j < len(outras) else "categorica-numerica",
+                "informacao_mutua": float(informacao[j]),
+            })
+
+    pares.sort(key=lambda par: par["informacao_mutua"], reverse=True)
+    return pares[:k]
+
+
+def analisar_correlacoes(df: pd.DataFrame, metodos: Optional[List[str]] = None, k: int = 10,
+                         informacao_mutua: bool = True) -> Dict[str, Any]:
+    """
+    Estágio de análise entre colunas do AgentCSV.
+
+    Args:
+        df: DataFrame do pandas.
+        metodos: Métodos de correlação (padrão: pearson e spearman).
+        k: Número de pares nos rankings.
+        informacao_mutua: Inclui o ranking de informação mútua das categóricas.
+
+    Returns:
+        Dicionário com as matrizes ('pearson', 'spearman') no formato de
+        df.corr().to_dict() (None acima de MAX_COLUNAS_MATRIZ colunas),
+        'pares_mais_correlacionados' por método e 'informacao_mutua'.
+    """
+    metodos = metodos or ["pearson", "spearman"]
+    resultado: Dict[str, Any] = {"pares_mais_correlacionados": {}}
+    for metodo in metodos:
+        matriz = matriz_correlacao(df, metodo)
+        resultado[metodo] = matriz.to_dict() if len(matriz) <= MAX_COLUNAS_MATRIZ else None
+        resultado["pares_mais_correlacionados"][metodo] = pares_mais_correlacionados(matriz, k)
+    if informacao_mutua:
+        resultado["informacao_mutua"] = ranking_informacao_mutua(df, k)
+    return resultado
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Gerenciador de downloads
+Sessão HTTP compartilhada com pool de conexões, revalidação condicional
+(If-None-Match / If-Modified-Since), retomada via Range e escrita atômica
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from instrumentacao import medir
+from resiliencia import PrazoEsgotado, disjuntor_para, limitar_timeout, verificar_prazo
+
+logger = logging.getLogger(__name__)
+
+SUFIXO_PARCIAL = ".part"
+SUFIXO_META = ".meta.json"
+
+
+@dataclass
+class ResultadoDownload:
+    """Resultado de um download (ou revalidação) de arquivo remoto"""
+    caminho: str
+    modificado: bool
+    bytes_transferidos: int
+    status_http: int  # 0 quando a cópia local estava dentro da validade e nada foi pedido
+
+
+def _ler_meta(caminho_meta: str) -> Dict[str, Any]:
+    try:
+        with open(caminho_meta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_meta(caminho_meta: str, meta: Dict[str, Any]):
+    temporario = f"{caminho_meta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temporario, caminho_meta)
+
+
+def _remover(caminho: str):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+class GerenciadorDownloads:
+    """
+    Gerenciador de downloads com uma requests.Session compartilhada.
+
+    - Conexões reutilizadas via pool (keep-alive) e retentativas para 502/503/504.
+    - Timeouts de conexão e de leitura configuráveis.
+    - Arquivo escrito em '<destino>.part' com buffer grande e renomeado
+      atomicamente ao final; um '.part' deixado por uma falha é retomado
+      com Range/If-Range na próxima chamada.
+    - ETag e Last-Modified ficam em '<destino>.meta.json'; se o arquivo
+      local existir, a próxima chamada é uma revalidação condicional e
+      um 304 custa apenas uma ida e volta.
+    - Com max_idade, uma cópia local validada há menos de max_idade segundos
+      é usada sem nenhuma requisição.
+    - Os timeouts são limitados pelo prazo da consulta atual (ver resiliencia),
+      verificado também entre blocos; cada host tem um disjuntor que recusa
+      chamadas na hora depois de falhas seguidas (timeouts, conexão, 5xx).
+    """
+
+    def __init__(
+        self,
+        timeout_conexao: Optional[float] = None,
+        timeout_leitura: Optional[float] = None,
+        tamanho_bloco: Optional[int] = None,
+        tamanho_pool: int = 10,
+        retentativas: int = 2,
+    ):
+        self.timeout_conexao = timeout_conexao if timeout_conexao is not None else float(os.getenv("DOWNLOAD_TIMEOUT_CONEXAO", "5"))
+        self.timeout_leitura = timeout_leitura if timeout_leitura is not None else float(os.getenv("DOWNLOAD_TIMEOUT_LEITURA", "30"))
+        self.tamanho_bloco = tamanho_bloco or int(os.getenv("DOWNLOAD_BLOCO_BYTES", str(1024 * 1024)))
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=tamanho_pool,
+            pool_maxsize=tamanho_pool,
+            max_retries=Retry(
+                total=retentativas,
+                backoff_factor=0.5,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(["GET", "HEAD"]),
+            ),
+        )
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+        # Sem compressão de transporte: os offsets de Range precisam bater com os bytes gravados
+        self.sessao.headers["Accept-Encoding"] = "identity"
+
+    @property
+    def timeout(self):
+        return (limitar_timeout(self.timeout_conexao), limitar_timeout(self.timeout_leitura))
+
+    @staticmethod
+    def _falha_do_host(erro: BaseException) -> bool:
+        # Respostas 4xx dizem respeito ao recurso pedido, não à saúde do host
+        if isinstance(erro, requests.exceptions.HTTPError) and erro.response is not None:
+            return erro.response.status_code >= 500
+        return isinstance(erro, (requests.exceptions.RequestException, PrazoEsgotado))
+
+    def baixar(self, url: str, destino: str, max_idade: Optional[float] = None) -> ResultadoDownload:
+        """
+        Baixa a URL para o caminho de destino, revalidando ou retomando quando possível.
+
+        Args:
+            url: URL do arquivo remoto.
+            destino: Caminho local final do arquivo.
+            max_idade: Segundos desde a última validação em que a cópia local é
+                usada sem consultar o servidor (opcional).
+
+        Returns:
+            ResultadoDownload com o caminho e se o conteúdo local mudou.
+
+        Raises:
+            requests.exceptions.RequestException: Se houver um erro no download.
+            resiliencia.PrazoEsgotado: Se o prazo da consulta terminar antes do fim.
+            resiliencia.CircuitoAberto: Se o disjuntor do host estiver aberto.
+        """
+        parcial = destino + SUFIXO_PARCIAL
+        meta_destino = _ler_meta(destino + SUFIXO_META)
+        meta_parcial = _ler_meta(parcial + SUFIXO_META)
+
+        if max_idade and os.path.exists(destino) and meta_destino.get("url") == url and \
+                time.time() - meta_destino.get("validado_em", 0) < max_idade:
+            return ResultadoDownload(destino, False, 0, 0)
+
+        while True:
+            cabecalhos = {}
+            offset = 0
+            if os.path.exists(parcial) and meta_parcial.get("url") == url and \
+                    (meta_parcial.get("etag") or meta_parcial.get("last_modified")):
+                # Retomar um download interrompido, desde que o recurso não tenha mudado
+                offset = os.path.getsize(parcial)
+                cabecalhos["Range"] = f"bytes={offset}-"
+                cabecalhos["If-Range"] = meta_parcial.get("etag") or meta_parcial["last_modified"]
+            elif os.path.exists(destino) and meta_destino.get("url") == url:
+                if meta_destino.get("etag"):
+                    cabecalhos["If-None-Match"] = meta_destino["etag"]
+                if meta_destino.get("last_modified"):
+                    cabecalhos["If-Modified-Since"] = meta_destino["last_modified"]
+
+            verificar_prazo(f"o download de {url}")
+            with medir("download", url=url, condicional="If-None-Match" in cabecalhos or "If-Modified-Since" in cabecalhos,
+                       retomada=offset > 0), disjuntor_para(url).proteger(self._falha_do_host):
+                with self.sessao.get(url, headers=cabecalhos, stream=True, timeout=self.timeout) as resposta:
+                    if resposta.status_code == 304:
+                        logger.info("Arquivo remoto inalterado (304): %s", url)
+                        _gravar_meta(destino + SUFIXO_META, dict(meta_destino, validado_em=time.time()))
+                        return ResultadoDownload(destino, False, 0, 304)
+                    if resposta.status_code == 416 and offset:
+                        # O parcial já contém o arquivo inteiro (ou é inválido): recomeçar na próxima
+                        # volta, já fora do disjuntor (num disjuntor meio aberto, uma chamada aninhada
+                        # seria recusada enquanto esta, a de teste, ainda está em andamento)
+                        _remover(parcial)
+                        _remover(parcial + SUFIXO_META)
+                        continue
+                    resposta.raise_for_status()
+
+                    meta = {
+                        "url": url,
+                        "etag": resposta.headers.get("ETag"),
+                        "last_modified": resposta.headers.get("Last-Modified"),
+                    }
+                    if resposta.status_code == 206 and offset:
+                        modo = "ab"
+                        logger.info("Retomando download de %s a partir do byte %d", url, offset)
+                    else:
+                        modo, offset = "wb", 0
+                        _gravar_meta(parcial + SUFIXO_META, meta)
+
+                    transferidos = 0
+                    with open(parcial, modo, buffering=self.tamanho_bloco) as f:
+                        for bloco in resposta.iter_content(chunk_size=self.tamanho_bloco):
+                            f.write(bloco)
+                            transferidos += len(bloco)
+                            # O timeout de leitura vale por bloco; o prazo limita o download inteiro
+                            # (o parcial fica para ser retomado na próxima chamada)
+                            verificar_prazo(f"o download de {url}")
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                meta["tamanho"] = offset + transferidos
+                meta["validado_em"] = time.time()
+                os.replace(parcial, destino)
+                _gravar_meta(destino + SUFIXO_META, meta)
+                _remover(parcial + SUFIXO_META)
+                return ResultadoDownload(destino, True, transferidos, resposta.status_code)
+
+
+# Instância compartilhada (pool de conexões único por processo)
+gerenciador_downloads = GerenciadorDownloads()
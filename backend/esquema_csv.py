@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Carregamento tipado de CSVs
+Infere o esquema (categóricas, inteiros/floats reduzidos, datas) uma vez por
+dataset, persiste ao lado do arquivo e reutiliza com dtype/usecols/pyarrow
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    MOTOR_LEITURA = "pyarrow"
+except ImportError:
+    MOTOR_LEITURA = "c"
+
+SUFIXO_ESQUEMA = ".esquema.json"
+# 2: floats só são reduzidos a float32 sem perda (esquemas da versão 1 são inferidos de novo)
+VERSAO_ESQUEMA = 2
+
+# Uma coluna de texto vira 'category' se tiver no máximo este número de valores distintos...
+LIMITE_CATEGORIAS = 10_000
+# ...e se os distintos forem no máximo esta fração dos valores não nulos
+FRACAO_CATEGORIAS = 0.5
+# Tamanho da amostra usada para detectar colunas de data
+AMOSTRA_DATAS = 1_000
+
+_PADRAO_DATA_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+_TIPOS_SEGUROS = {"int8": "int64", "int16": "int64", "int32": "int64", "float32": "float64"}
+
+_lock = threading.Lock()
+
+
+def _impressao_digital(filepath: str) -> Dict[str, int]:
+    estado = os.stat(filepath)
+    return {"tamanho": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+
+
+def _eh_texto(serie: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def _cabe_em_float32(serie: pd.Series) -> bool:
+    """
+    Se todos os valores voltam idênticos depois de convertidos para float32 (o
+    downcast do pandas aceita arredondamentos, ex.: -12.3456789 -> -12.34567928).
+    """
+    valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(over="ignore"):
+        reduzidos = valores.astype(np.float32).astype(np.float64)
+    return bool(np.array_equal(reduzidos, valores, equal_nan=True))
+
+
+def inferir_esquema(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Infere os tipos compactos de cada coluna de um DataFrame carregado com os tipos padrão.
+
+    Returns:
+        Dicionário com 'tipos' (coluna -> dtype) e 'datas' (colunas de data ISO 8601).
+        Colunas de texto de alta cardinalidade não recebem tipo.
+    """
+    tipos: Dict[str, str] = {}
+    datas: List[str] = []
+    for coluna in df.columns:
+        serie = df[coluna]
+        if pd.api.types.is_bool_dtype(serie):
+            tipos[coluna] = "bool"
+        elif pd.api.types.is_integer_dtype(serie):
+            tipos[coluna] = pd.to_numeric(serie, downcast="integer").dtype.name
+        elif pd.api.types.is_float_dtype(serie):
+            tipos[coluna] = "float32" if _cabe_em_float32(serie) else "float64"
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            tipos[coluna] = "category"
+        elif _eh_texto(serie):
+            nao_nulos = serie.dropna()
+            if nao_nulos.empty:
+                continue
+            amostra = nao_nulos.iloc[:AMOSTRA_DATAS].astype(str)
+            if amostra.str.match(_PADRAO_DATA_ISO).mean() >= 0.95:
+                datas.append(coluna)
+                continue
+            distintos = nao_nulos.nunique()
+            if distintos <= LIMITE_CATEGORIAS and distintos <= FRACAO_CATEGORIAS * len(nao_nulos):
+                tipos[coluna] = "category"
+    return {"tipos": tipos, "datas": datas}
+
+
+def aplicar_esquema(df: pd.DataFrame, esquema: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Converte em memória um DataFrame para os tipos do esquema.
+    """
+    for coluna, tipo in esquema["tipos"].items():
+        if coluna in df.columns and df[coluna].dtype.name != tipo:
+            df[coluna] = df[coluna].astype(tipo)
+    for coluna in esquema["datas"]:
+        if coluna in df.columns and not pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce", format="ISO8601")
+    return df
+
+
+def ler_esquema(filepath: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(filepath + SUFIXO_ESQUEMA, encoding="utf-8") as f:
+            esquema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return esquema if esquema.get("versao") == VERSAO_ESQUEMA else None
+
+
+def salvar_esquema(filepath: str, esquema: Dict[str, Any]):
+    esquema = dict(esquema, versao=VERSAO_ESQUEMA, impressao=_impressao_digital(filepath))
+    temporario = f"{filepath}{SUFIXO_ESQUEMA}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(esquema, f, ensure_ascii=False)
+    os.replace(temporario, filepath + SUFIXO_ESQUEMA)
+
+
+def remover_esquema(filepath: str):
+    try:
+        os.remove(filepath + SUFIXO_ESQUEMA)
+    except FileNotFoundError:
+        pass
+
+
+def _parametros_leitura(esquema: Dict[str, Any], colunas: Optional[List[str]], seguro: bool) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Monta dtype/parse_dates para o read_csv. No modo seguro (arquivo mudou desde a
+    inferência), inteiros e floats reduzidos são lidos com 64 bits: o read_csv não
+    acusa estouro de inteiros estreitos, ele apenas trunca os valores.
+    """
+    selecionadas = set(colunas) if colunas else None
+    dtype = {}
+    for coluna, tipo in esquema["tipos"].items():
+        if selecionadas is not None and coluna not in selecionadas:
+            continue
+        dtype[coluna] = _TIPOS_SEGUROS.get(tipo, tipo) if seguro else tipo
+    datas = [c for c in esquema["datas"] if selecionadas is None or c in selecionadas]
+    return dtype, datas
+
+
+def carregar_csv_tipado(filepath: str, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Carrega um CSV com tipos compactos.
+
+    Na primeira carga de um arquivo o CSV é lido com os tipos padrão, o esquema é
+    inferido e salvo em '<arquivo>.esquema.json'. Nas cargas seguintes o esquema é
+    passado ao read_csv (dtype, parse_dates, usecols e motor pyarrow quando
+    disponível), evitando a inferência de tipos e reduzindo a memória residente.
+
+    Args:
+        filepath: Caminho para o arquivo CSV.
+        colunas: Subconjunto de colunas a carregar (opcional).
+
+    Returns:
+        DataFrame do pandas com os tipos do esquema.
+    """
+    esquema = ler_esquema(filepath)
+    if esquema is None:
+        df = pd.read_csv(filepath)
+        esquema = inferir_esquema(df)
+        df = aplicar_esquema(df, esquema)
+        with _lock:
+            salvar_esquema(filepath, esquema)
+        logger.info("Esquema inferido para %s: %d colunas tipadas, %d de data",
+                    filepath, len(esquema["tipos"]), len(esquema["datas"]))
+        return df[colunas] if colunas else df
+
+    mesmo_arquivo = esquema.get("impressao") == _impressao_digital(filepath)
+    dtype, datas = _parametros_leitura(esquema, colunas, seguro=not mesmo_arquivo)
+    try:
+        df = pd.read_csv(filepath, usecols=colunas, dtype=dtype, parse_dates=datas or None, engine=MOTOR_LEITURA)
+    except (ValueError, TypeError) as e:
+        logger.warning("Esquema salvo não é compatível com %s (%s); inferindo novamente.", filepath, e)
+        remover_esquema(filepath)
+        return carregar_csv_tipado(filepath, colunas)
+
+    if not mesmo_arquivo and colunas is None:
+        # O arquivo mudou: reduzir os tipos novamente com base no conteúdo atual
+        esquema = inferir_esquema(df)
+        df = aplicar_esquema(df, esquema)
+        with _lock:
+            salvar_esquema(filepath, esquema)
+    return df
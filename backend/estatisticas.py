@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Motor de estatísticas descritivas
+Calcula em uma passada fundida por bloco de colunas (NumPy) o equivalente a
+df.describe(include='all'), df.isnull().sum() e df.duplicated().sum()
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+PERCENTIS = (0.25, 0.5, 0.75)
+ROTULOS_PERCENTIS = ("25%", "50%", "75%")
+
+# Mesmas linhas (e ordem) que o describe() do pandas produz por tipo de coluna
+ESTATISTICAS_NUMERICAS = ["count", "mean", "std", "min", *ROTULOS_PERCENTIS, "max"]
+ESTATISTICAS_CATEGORICAS = ["count", "unique", "top", "freq"]
+ESTATISTICAS_DATAS = ["count", "mean", "min", *ROTULOS_PERCENTIS, "max"]
+
+# Número aproximado de células float64 por bloco de colunas numéricas (~256 MB)
+CELULAS_POR_BLOCO = 32_000_000
+
+
+def _eh_numerica(serie: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+
+def _escalar(valor: Any) -> Any:
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _estatisticas_bloco_numerico(df: pd.DataFrame, colunas: List[str]) -> Dict[str, Tuple[Dict[str, Any], int]]:
+    """
+    Estatísticas de um bloco de colunas numéricas em uma matriz (colunas x linhas).
+    Uma única ordenação por coluna fornece mínimo, máximo e percentis; média,
+    desvio padrão e nulos saem da mesma matriz.
+    """
+    n = len(df)
+    if n == 0:
+        vazio = {nome: np.nan for nome in ESTATISTICAS_NUMERICAS}
+        return {coluna: (dict(vazio, count=0.0), 0) for coluna in colunas}
+
+    bloco = np.empty((len(colunas), n), dtype=np.float64)
+    for j, coluna in enumerate(colunas):
+        bloco[j] = df[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    nulos = np.isnan(bloco)
+    contagens = n - nulos.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        somas = np.where(nulos, 0.0, bloco).sum(axis=1)
+        medias = somas / contagens
+        desvios = np.where(nulos, 0.0, bloco - medias[:, None])
+        variancias = (desvios * desvios).sum(axis=1) / (contagens - 1)
+    del desvios
+
+    ordenado = np.sort(bloco, axis=1)  # NaN vão para o final de cada linha
+    linhas = np.arange(len(colunas))
+    validas = contagens > 0
+    ultimo = np.maximum(contagens - 1, 0)
+
+    def percentil(q: float) -> np.ndarray:
+        posicao = q * ultimo
+        baixo = np.floor(posicao).astype(np.int64)
+        alto = np.ceil(posicao).astype(np.int64)
+        inferior = ordenado[linhas, baixo]
+        superior = ordenado[linhas, alto]
+        return np.where(validas, inferior + (superior - inferior) * (posicao - baixo), np.nan)
+
+    minimos = np.where(validas, ordenado[linhas, 0], np.nan)
+    maximos = np.where(validas, ordenado[linhas, ultimo], np.nan)
+    percentis = [percentil(q) for q in PERCENTIS]
+    desvios_padrao = np.where(contagens > 1, np.sqrt(variancias), np.nan)
+
+    resultado = {}
+    for j, coluna in enumerate(colunas):
+        estat = {
+            "count": float(contagens[j]),
+            "mean": float(medias[j]) if validas[j] else np.nan,
+            "std": float(desvios_padrao[j]),
+            "min": float(minimos[j]),
+        }
+        for rotulo, valores in zip(ROTULOS_PERCENTIS, percentis):
+            estat[rotulo] = float(valores[j])
+        estat["max"] = float(maximos[j])
+        resultado[coluna] = (estat, int(nulos[j].sum()))
+    return resultado
+
+
+def _estatisticas_categoricas(serie: pd.Series) -> Tuple[Dict[str, Any], int]:
+    """
+    count/unique/top/freq de uma coluna de texto, categórica ou booleana
+    a partir de uma única fatoração (tabela hash).
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    validos = codigos[codigos >= 0]
+    nulos = len(codigos) - len(validos)
+    if len(validos) == 0:
+        return {"count": 0, "unique": 0, "top": np.nan, "freq": np.nan}, nulos
+    frequencias = np.bincount(validos, minlength=len(unicos))
+    indice_top = int(frequencias.argmax())
+    return {
+        "count": int(len(validos)),
+        "unique": int(len(unicos)),
+        "top": _escalar(unicos[indice_top]),
+        "freq": int(frequencias[indice_top]),
+    }, nulos
+
+
+def _estatisticas_datas(serie: pd.Series) -> Tuple[Dict[str, Any], int]:
+    descricao = serie.describe()
+    estat = {nome: _escalar(descricao[nome]) for nome in ESTATISTICAS_DATAS if nome in descricao.index}
+    estat["count"] = int(estat["count"])
+    return estat, int(serie.isna().sum())
+
+
+def _processar_particao(df: pd.DataFrame, colunas: List[str]) -> Dict[str, Tuple[List[str], Dict[str, Any], int]]:
+    numericas = [c for c in colunas if _eh_numerica(df[c])]
+    resultado = {}
+    if numericas:
+        tamanho_bloco = max(1, CELULAS_POR_BLOCO // max(len(df), 1))
+        for inicio in range(0, len(numericas), tamanho_bloco):
+            parte = numericas[inicio:inicio + tamanho_bloco]
+            for coluna, (estat, nulos) in _estatisticas_bloco_numerico(df, parte).items():
+                resultado[coluna] = (ESTATISTICAS_NUMERICAS, estat, nulos)
+    for coluna in colunas:
+        if coluna in resultado:
+            continue
+        serie = df[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            estat, nulos = _estatisticas_datas(serie)
+            resultado[coluna] = (ESTATISTICAS_DATAS, estat, nulos)
+        else:
+            estat, nulos = _estatisticas_categoricas(serie)
+            resultado[coluna] = (ESTATISTICAS_CATEGORICAS, estat, nulos)
+    return resultado
+
+
+def _ordem_estatisticas(listas: List[List[str]]) -> List[str]:
+    # Mesma regra do describe(include='all'): une as listas ordenadas por tamanho
+    nomes: List[str] = []
+    for lista in sorted(listas, key=len):
+        for nome in lista:
+            if nome not in nomes:
+                nomes.append(nome)
+    return nomes
+
+
+def contar_linhas_duplicadas(df: pd.DataFrame) -> int:
+    """
+    Conta linhas duplicadas via hash de 64 bits por linha (equivalente a
+    df.duplicated().sum(), exceto por colisões de hash, desprezíveis na prática).
+    """
+    if df.empty:
+        return 0
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return int(len(hashes) - len(np.unique(hashes)))
+
+
+def analisar(df: pd.DataFrame, n_jobs: int = 1) -> Dict[str, Any]:
+    """
+    Produz o mesmo dicionário de AgentCSV.analisar_dados em uma passada fundida.
+
+    Args:
+        df: DataFrame do pandas.
+        n_jobs: Número de threads para particionar as colunas (-1 = todos os núcleos).
+            As operações NumPy liberam o GIL, então partições rodam em paralelo.
+
+    Returns:
+        Dicionário com colunas, tipos_dados, estatisticas_descritivas,
+        valores_ausentes e linhas_duplicadas.
+    """
+    colunas = df.columns.tolist()
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(1, min(n_jobs, len(colunas)))
+
+    particoes = [colunas[i::n_jobs] for i in range(n_jobs)]
+    por_coluna: Dict[str, Tuple[List[str], Dict[str, Any], int]] = {}
+    if n_jobs == 1:
+        por_coluna.update(_processar_particao(df, colunas))
+        duplicadas = contar_linhas_duplicadas(df)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs + 1) as executor:
+            futuro_duplicadas = executor.submit(contar_linhas_duplicadas, df)
+            for parcial in executor.map(lambda p: _processar_particao(df, p), particoes):
+                por_coluna.update(parcial)
+            duplicadas = futuro_duplicadas.result()
+
+    nomes = _ordem_estatisticas([por_coluna[c][0] for c in colunas])
+    estatisticas = {
+        coluna: {nome: por_coluna[coluna][1].get(nome, np.nan) for nome in nomes}
+        for coluna in colunas
+    }
+    return {
+        "colunas": colunas,
+        "tipos_dados": df.dtypes.astype(str).to_dict(),
+        "estatisticas_descritivas": estatisticas,
+        "valores_ausentes": {coluna: por_coluna[coluna][2] for coluna in colunas},
+        "linhas_duplicadas": duplicadas,
+    }
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Facetas da literatura
+Índices pré-calculados (listas ordenadas de publicações por valor) de ano,
+periódico, organismo e tema, para contar e filtrar qualquer conjunto de
+resultados por interseção
+"""
+
+import logging
+import re
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Facetas lidas de colunas do CSV de publicações (a primeira coluna presente de cada uma)
+COLUNAS_FACETAS = {
+    "ano": ("Year", "year", "Publication Year", "Ano"),
+    "periodico": ("Journal", "journal", "Source", "Periodico"),
+    "organismo": ("Organism", "organism", "Organismo"),
+}
+# Sem coluna de organismo, ele é reconhecido no título/abstract por estes termos
+ORGANISMOS = {
+    "camundongo": ("mouse", "mice", "murine"),
+    "rato": ("rat", "rats"),
+    "humano": ("human", "humans", "astronaut", "astronauts"),
+    "arabidopsis": ("arabidopsis",),
+    "drosophila": ("drosophila",),
+    "c_elegans": ("c. elegans", "caenorhabditis"),
+    "levedura": ("yeast", "saccharomyces"),
+    "bacteria": ("bacteria", "bacterial", "e. coli", "bacillus"),
+    "peixe": ("zebrafish", "medaka"),
+}
+NOMES_FACETAS = {"ano": "Ano", "periodico": "Periódico", "organismo": "Organismo", "tema": "Tema"}
+# Valores por faceta devolvidos em contar() (os mais frequentes)
+MAX_VALORES_FACETA = 20
+SEM_VALOR = "desconhecido"
+
+
+def _padrao_organismos() -> Dict[str, "re.Pattern"]:
+    return {
+        organismo: re.compile(r"\b(?:" + "|".join(re.escape(t) for t in termos) + r")\b")
+        for organismo, termos in ORGANISMOS.items()
+    }
+
+
+def identificar_organismos(texto: str, padroes: Optional[Dict[str, "re.Pattern"]] = None) -> List[str]:
+    texto = texto.lower()
+    padroes = padroes or _padrao_organismos()
+    return [organismo for organismo, padrao in padroes.items() if padrao.search(texto)]
+
+
+def _valor_coluna(valor: Any, faceta: str) -> List[str]:
+    if pd.isna(valor) or str(valor).strip() == "":
+        return []
+    if faceta == "ano":
+        # '2014-05-01', 2014.0 -> '2014'
+        ano = re.search(r"\d{4}", str(valor))
+        return [ano.group(0)] if ano else []
+    return [str(valor).strip()]
+
+
+class IndiceFacetas:
+    """
+    Para cada faceta, as publicações de cada valor como um array ordenado de
+    posições no corpus (uma publicação pode ter vários valores, como temas).
+
+    As listas de uma faceta ficam concatenadas em um único array, então a
+    contagem sobre um conjunto de resultados é uma única operação vetorizada:
+    marcar os resultados em uma máscara e somar a máscara por trecho
+    (np.add.reduceat). O filtro é a interseção com as listas dos valores pedidos.
+    """
+
+    def __init__(self, valores_por_faceta: Dict[str, Sequence[List[str]]], n_documentos: int):
+        self.n_documentos = n_documentos
+        self._valores: Dict[str, List[str]] = {}
+        self._posicoes: Dict[str, Dict[str, int]] = {}
+        self._documentos: Dict[str, np.ndarray] = {}
+        self._inicios: Dict[str, np.ndarray] = {}
+        for faceta, por_documento in valores_por_faceta.items():
+            listas: Dict[str, List[int]] = {}
+            for documento, valores in enumerate(por_documento):
+                for valor in valores or [SEM_VALOR]:
+                    listas.setdefault(valor, []).append(documento)
+            valores = sorted(listas)
+            self._valores[faceta] = valores
+            self._posicoes[faceta] = {valor: i for i, valor in enumerate(valores)}
+            # Documentos em ordem crescente dentro de cada valor (foram inseridos em ordem)
+            self._documentos[faceta] = np.fromiter(
+                (d for v in valores for d in listas[v]), dtype=np.int64, count=sum(len(listas[v]) for v in valores)
+            )
+            tamanhos = np.array([len(listas[v]) for v in valores], dtype=np.int64)
+            self._inicios[faceta] = np.concatenate(([0], np.cumsum(tamanhos)[:-1])) if len(valores) else tamanhos
+        logger.info("Índice de facetas: %d publicações, %s", n_documentos,
+                    ", ".join(f"{f} ({len(v)} valores)" for f, v in self._valores.items()))
+
+    @classmethod
+    def do_corpus(cls, df: pd.DataFrame, textos: Sequence[str],
+                  temas: Optional[Sequence[List[str]]] = None) -> "IndiceFacetas":
+        """
+        Facetas das publicações: colunas de COLUNAS_FACETAS presentes no CSV,
+        organismos reconhecidos no texto (se não houver coluna) e temas
+        pré-calculados (ver topicos).
+
+        Args:
+            df: Publicações.
+            textos: Texto pesquisável de cada publicação, na ordem de df.
+            temas: Temas de cada publicação, na ordem de df.
+        """
+        valores: Dict[str, Sequence[List[str]]] = {}
+        for faceta, candidatas in COLUNAS_FACETAS.items():
+            coluna = next((c for c in candidatas if c in df.columns), None)
+            if coluna is not None:
+                valores[faceta] = [_valor_coluna(v, faceta) for v in df[coluna]]
+        if "organismo" not in valores:
+            padroes = _padrao_organismos()
+            valores["organismo"] = [identificar_organismos(texto, padroes) for texto in textos]
+        if temas is not None:
+            valores["tema"] = temas
+        return cls(valores, len(df))
+
+    @property
+    def facetas(self) -> List[str]:
+        return list(self._valores)
+
+    def _mascara(self, documentos: Sequence[int]) -> np.ndarray:
+        mascara = np.zeros(self.n_documentos, dtype=np.int64)
+        mascara[np.asarray(documentos, dtype=np.int64)] = 1
+        return mascara
+
+    def contar(self, documentos: Sequence[int], max_valores: int = MAX_VALORES_FACETA) -> Dict[str, Dict[str, int]]:
+        """
+        Número de publicações do conjunto por valor de cada faceta.
+
+        Args:
+            documentos: Posições das publicações no corpus (ex.: resultado de uma busca).
+            max_valores: Máximo de valores por faceta (os mais frequentes; 0 = todos).
+
+        Returns:
+            {faceta: {valor: contagem}}, em ordem decrescente de contagem, sem valores zerados.
+        """
+        contagens: Dict[str, Dict[str, int]] = {}
+        if not len(documentos):
+            return {faceta: {} for faceta in self._valores}
+        mascara = self._mascara(documentos)
+        for faceta, valores in self._valores.items():
+            if not valores:
+                contagens[faceta] = {}
+                continue
+            por_valor = np.add.reduceat(mascara[self._documentos[faceta]], self._inicios[faceta])
+            ordem = [i for i in np.argsort(-por_valor, kind="stable") if por_valor[i] > 0]
+            if max_valores:
+                ordem = ordem[:max_valores]
+            contagens[faceta] = {valores[i]: int(por_valor[i]) for i in ordem}
+        return contagens
+
+    def publicacoes(self, faceta: str, valor: str) -> np.ndarray:
+        """
+        Posições (ordenadas) das publicações com o valor na faceta.
+        """
+        indice = self._posicoes.get(faceta, {}).get(valor)
+        if indice is None:
+            return np.empty(0, dtype=np.int64)
+        inicio = self._inicios[faceta][indice]
+        fim = self._inicios[faceta][indice + 1] if indice + 1 < len(self._valores[faceta]) else len(self._documentos[faceta])
+        return self._documentos[faceta][inicio:fim]
+
+    def filtrar(self, documentos: Sequence[int], filtros: Dict[str, str]) -> List[int]:
+        """
+        Publicações do conjunto com todos os valores pedidos, na ordem original.
+
+        Args:
+            documentos: Posições das publicações no corpus (ex.: em ordem de relevância).
+            filtros: {faceta: valor}; facetas desconhecidas não filtram nada.
+
+        Returns:
+            Subconjunto de documentos.
+        """
+        documentos = np.asarray(documentos, dtype=np.int64)
+        for faceta, valor in filtros.items():
+            if faceta in self._valores:
+                documentos = documentos[np.isin(documentos, self.publicacoes(faceta, valor), assume_unique=True)]
+        return documentos.tolist()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "publicacoes": self.n_documentos,
+            "facetas": {faceta: len(valores) for faceta, valores in self._valores.items()},
+        }
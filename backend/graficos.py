@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Gráficos agregados
+Primeiro agrega os dados com NumPy (faixas de histograma, quartis, top-k,
+binagem 2D, KDE sobre subamostra) e depois desenha apenas o agregado, de modo
+que o tempo de renderização não depende do número de linhas.
+Cada gráfico gera uma miniatura compacta; a imagem completa (e o SVG) é
+desenhada sob demanda a partir da especificação salva
+"""
+
+import base64
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from scipy.stats import gaussian_kde
+
+BINS_HISTOGRAMA = 50
+BINS_DISPERSAO = 200
+TOP_K_BARRAS = 20
+# A KDE é ajustada sobre no máximo esta quantidade de pontos...
+MAX_PONTOS_KDE = 5_000
+# ...e avaliada nesta quantidade de pontos da grade
+PONTOS_GRADE_KDE = 200
+# Outliers desenhados no box plot (o total vai no rótulo)
+MAX_OUTLIERS_BOXPLOT = 500
+ROTULO_OUTROS = "Outros"
+
+# Saídas: miniatura (webp ou png), SVG opcional e miniatura embutida (data URI) até um tamanho
+FORMATO_MINIATURA = os.getenv("GRAFICOS_FORMATO_MINIATURA", "webp")
+TAMANHO_MINIATURA = (5, 3)
+DPI_MINIATURA = 64
+GERAR_SVG = os.getenv("GRAFICOS_SVG", "0") == "1"
+# 0 desativa a miniatura embutida
+LIMITE_BYTES_INLINE = int(os.getenv("GRAFICOS_LIMITE_BYTES_INLINE", "0"))
+# Com 0, a imagem completa é desenhada junto com a miniatura
+COMPLETO_SOB_DEMANDA = os.getenv("GRAFICOS_COMPLETO_SOB_DEMANDA", "1") == "1"
+URL_BASE_VISUALIZACOES = os.getenv("VISUALIZACOES_URL_BASE", "/api/visualizacoes")
+SUFIXO_ESPEC = ".espec.json"
+EXTENSOES_IMAGEM = {".png", ".webp", ".svg"}
+TIPOS_MIME = {".png": "image/png", ".webp": "image/webp", ".svg": "image/svg+xml"}
+
+
+def _valores_numericos(serie: pd.Series) -> np.ndarray:
+    valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    return valores[~np.isnan(valores)]
+
+
+def _subamostra(valores: np.ndarray, tamanho: int, semente: int = 0) -> np.ndarray:
+    if len(valores) <= tamanho:
+        return valores
+    return np.random.default_rng(semente).choice(valores, size=tamanho, replace=False)
+
+
+def especificar_histograma(serie: pd.Series, bins: int = BINS_HISTOGRAMA, kde: bool = True) -> Dict[str, Any]:
+    """
+    Faixas e contagens do histograma (uma passada) e a curva KDE em escala de
+    contagens, ajustada sobre uma subamostra.
+    """
+    valores = _valores_numericos(serie)
+    contagens, bordas = np.histogram(valores, bins=bins)
+    espec = {
+        "tipo": "histograma",
+        "titulo": f"Distribuição de {serie.name}",
+        "rotulo_x": str(serie.name),
+        "rotulo_y": "Frequência",
+        "bordas": bordas,
+        "contagens": contagens,
+        "total": int(len(valores)),
+    }
+    amostra = _subamostra(valores, MAX_PONTOS_KDE)
+    if kde and len(amostra) > 1 and np.ptp(amostra) > 0:
+        grade = np.linspace(bordas[0], bordas[-1], PONTOS_GRADE_KDE)
+        largura = bordas[1] - bordas[0]
+        espec["kde_x"] = grade
+        espec["kde_y"] = gaussian_kde(amostra)(grade) * len(valores) * largura
+    return espec
+
+
+def especificar_barras(serie: pd.Series, top_k: int = TOP_K_BARRAS) -> Dict[str, Any]:
+    """
+    Contagens das top_k categorias mais frequentes; as demais somadas em "Outros".
+    """
+    frequencias = serie.value_counts()
+    rotulos = [str(r) for r in frequencias.index[:top_k]]
+    contagens = frequencias.to_numpy()[:top_k].tolist()
+    restante = int(frequencias.to_numpy()[top_k:].sum())
+    if restante:
+        rotulos.append(f"{ROTULO_OUTROS} ({len(frequencias) - top_k})")
+        contagens.append(restante)
+    return {
+        "tipo": "barras",
+        "titulo": f"Contagem de {serie.name}",
+        "rotulo_x": str(serie.name),
+        "rotulo_y": "Contagem",
+        "rotulos": rotulos,
+        "contagens": contagens,
+    }
+
+
+def especificar_boxplot(serie: pd.Series) -> Dict[str, Any]:
+    """
+    Quartis, bigodes de Tukey (1,5 IQR) e uma amostra dos outliers.
+    """
+    valores = _valores_numericos(serie)
+    if len(valores) == 0:
+        raise ValueError(f"Coluna '{serie.name}' não tem valores numéricos para o box plot.")
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+    outliers = valores[(valores < q1 - 1.5 * iqr) | (valores > q3 + 1.5 * iqr)]
+    return {
+        "tipo": "boxplot",
+        "titulo": f"Box Plot de {serie.name}",
+        "rotulo_y": str(serie.name),
+        "q1": float(q1),
+        "mediana": float(mediana),
+        "q3": float(q3),
+        "bigode_inferior": float(dentro.min()),
+        "bigode_superior": float(dentro.max()),
+        "outliers": _subamostra(outliers, MAX_OUTLIERS_BOXPLOT),
+        "total_outliers": int(len(outliers)),
+    }
+
+
+def especificar_dispersao(y: pd.Series, x: Optional[pd.Series] = None, bins: int = BINS_DISPERSAO) -> Dict[str, Any]:
+    """
+    Dispersão como densidade de pontos em uma grade 2D (estilo datashader).
+    Sem x, usa a posição da linha no eixo x.
+    """
+    valores_y = y.to_numpy(dtype=np.float64, na_value=np.nan)
+    if x is None:
+        valores_x = np.arange(len(valores_y), dtype=np.float64)
+    else:
+        valores_x = x.to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = ~(np.isnan(valores_x) | np.isnan(valores_y))
+    contagens, bordas_x, bordas_y = np.histogram2d(valores_x[validos], valores_y[validos], bins=bins)
+    return {
+        "tipo": "dispersao",
+        "titulo": f"Scatter Plot de {y.name}" + (f" x {x.name}" if x is not None else ""),
+        "rotulo_x": str(x.name) if x is not None else "Índice",
+        "rotulo_y": str(y.name),
+        "bordas_x": bordas_x,
+        "bordas_y": bordas_y,
+        "contagens": contagens,
+        "total": int(validos.sum()),
+    }
+
+
+def especificar(df: pd.DataFrame, coluna: str, tipo: str, coluna_y: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Agrega os dados para um gráfico do AgentCSV.gerar_visualizacao.
+
+    Args:
+        df: DataFrame do pandas.
+        coluna: Coluna a visualizar.
+        tipo: 'hist', 'box' ou 'scatter'.
+        coluna_y: Segunda coluna do 'scatter' (padrão: o índice).
+
+    Returns:
+        Especificação do gráfico (apenas agregados, pronta para renderizar).
+
+    Raises:
+        ValueError: Se o tipo não for adequado à coluna ou for inválido.
+    """
+    serie = df[coluna]
+    numerica = pd.api.types.is_numeric_dtype(serie)
+    if tipo == "hist":
+        return especificar_histograma(serie) if numerica else especificar_barras(serie)
+    if tipo == "box":
+        if not numerica:
+            raise ValueError(f"Box plot não é adequado para coluna não numérica '{coluna}'.")
+        return especificar_boxplot(serie)
+    if tipo == "scatter":
+        if not numerica or (coluna_y is not None and not pd.api.types.is_numeric_dtype(df[coluna_y])):
+            raise ValueError(f"Scatter plot não é adequado para coluna não numérica '{coluna}'.")
+        return especificar_dispersao(serie, df[coluna_y] if coluna_y is not None else None)
+    raise ValueError(f"Tipo de plotagem '{tipo}' inválido. Escolha entre 'hist', 'box', 'scatter'.")
+
+
+def renderizar(espec: Dict[str, Any], caminho: str, figsize=(10, 6), dpi: int = 100) -> str:
+    """
+    Desenha uma especificação com a API orientada a objetos do matplotlib
+    (Figure própria, sem o estado global do pyplot, seguro entre threads).
+
+    Returns:
+        O caminho do arquivo salvo (o formato vem da extensão).
+    """
+    figura = Figure(figsize=figsize)
+    eixo = figura.subplots()
+    tipo = espec["tipo"]
+
+    if tipo == "histograma":
+        bordas = espec["bordas"]
+        eixo.stairs(espec["contagens"], bordas, fill=True, alpha=0.6)
+        if "kde_x" in espec:
+            eixo.plot(espec["kde_x"], espec["kde_y"])
+    elif tipo == "barras":
+        posicoes = np.arange(len(espec["rotulos"]))
+        eixo.bar(posicoes, espec["contagens"])
+        eixo.set_xticks(posicoes, espec["rotulos"], rotation=90)
+    elif tipo == "boxplot":
+        eixo.bxp([{
+            "med": espec["mediana"], "q1": espec["q1"], "q3": espec["q3"],
+            "whislo": espec["bigode_inferior"], "whishi": espec["bigode_superior"],
+            "fliers": espec["outliers"], "label": f"outliers: {espec['total_outliers']}",
+        }])
+    elif tipo == "dispersao":
+        contagens = np.ma.masked_equal(np.asarray(espec["contagens"]).T, 0)
+        if contagens.count():
+            malha = eixo.pcolormesh(espec["bordas_x"], espec["bordas_y"], contagens,
+                                    norm=LogNorm(vmin=1, vmax=max(contagens.max(), 1)), cmap="viridis",
+                                    rasterized=True)  # no SVG, a grade vira uma imagem embutida
+            figura.colorbar(malha, ax=eixo, label="Pontos")
+    else:
+        raise ValueError(f"Especificação de gráfico desconhecida: '{tipo}'.")
+
+    eixo.set_title(espec["titulo"])
+    if "rotulo_x" in espec:
+        eixo.set_xlabel(espec["rotulo_x"])
+    eixo.set_ylabel(espec["rotulo_y"])
+    figura.tight_layout()
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    # Escrita atômica: a imagem pode ser pedida por várias requisições ao mesmo tempo
+    base, extensao = os.path.splitext(caminho)
+    temporario = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp{extensao}"
+    figura.savefig(temporario, dpi=dpi, format=extensao.lstrip("."))
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def caminho_miniatura(caminho: str) -> str:
+    return f"{os.path.splitext(caminho)[0]}.miniatura.{FORMATO_MINIATURA}"
+
+
+def caminho_svg(caminho: str) -> str:
+    return f"{os.path.splitext(caminho)[0]}.svg"
+
+
+def _caminho_especificacao(caminho: str) -> str:
+    # A miniatura, o SVG e a imagem completa compartilham a especificação
+    base = os.path.splitext(caminho)[0]
+    if base.endswith(".miniatura"):
+        base = base[:-len(".miniatura")]
+    return base + SUFIXO_ESPEC
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"Valor não serializável na especificação: {type(valor).__name__}")
+
+
+def _salvar_especificacao(espec: Dict[str, Any], caminho: str):
+    # Escrita atômica: garantir_arquivo pode ler a especificação durante uma regeração
+    destino = _caminho_especificacao(caminho)
+    temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(espec, f, default=_valor_json)
+    os.replace(temporario, destino)
+
+
+def salvar_graficos(espec: Dict[str, Any], caminho: str) -> str:
+    """
+    Salva as saídas de um gráfico cuja imagem completa fica em 'caminho'.
+
+    A miniatura é desenhada na hora e a especificação é salva ao lado; a imagem
+    completa e o SVG são desenhados agora ou sob demanda (garantir_arquivo),
+    conforme COMPLETO_SOB_DEMANDA e GERAR_SVG.
+
+    Returns:
+        O caminho da imagem completa.
+    """
+    renderizar(espec, caminho_miniatura(caminho), figsize=TAMANHO_MINIATURA, dpi=DPI_MINIATURA)
+    _salvar_especificacao(espec, caminho)
+    # Uma imagem completa anterior com o mesmo nome não corresponde mais à especificação
+    for anterior in (caminho, caminho_svg(caminho)):
+        if os.path.exists(anterior):
+            os.remove(anterior)
+    if not COMPLETO_SOB_DEMANDA:
+        renderizar(espec, caminho)
+        if GERAR_SVG:
+            renderizar(espec, caminho_svg(caminho))
+    return caminho
+
+
+def salvar_miniatura_de_imagem(caminho: str) -> str:
+    """
+    Miniatura reduzida de uma imagem já desenhada (gráficos do modo exato).
+    """
+    from PIL import Image
+
+    # Uma especificação de um gráfico agregado anterior com o mesmo nome não vale mais
+    if os.path.exists(_caminho_especificacao(caminho)):
+        os.remove(_caminho_especificacao(caminho))
+    with Image.open(caminho) as imagem:
+        largura, altura = TAMANHO_MINIATURA[0] * DPI_MINIATURA, TAMANHO_MINIATURA[1] * DPI_MINIATURA
+        imagem.thumbnail((largura, altura))
+        imagem.save(caminho_miniatura(caminho))
+    return caminho_miniatura(caminho)
+
+
+def garantir_arquivo(caminho: str) -> bool:
+    """
+    Garante que a imagem exista, desenhando-a a partir da especificação salva
+    se for uma imagem completa ou SVG ainda não gerados.
+
+    Returns:
+        True se o arquivo existe (ou foi gerado).
+    """
+    if os.path.exists(caminho):
+        return True
+    try:
+        with open(_caminho_especificacao(caminho), encoding="utf-8") as f:
+            espec = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    if os.path.splitext(caminho)[0].endswith(".miniatura"):
+        renderizar(espec, caminho, figsize=TAMANHO_MINIATURA, dpi=DPI_MINIATURA)
+    else:
+        renderizar(espec, caminho)
+    return True
+
+
+def descrever(caminho: str, raiz: Optional[str] = None) -> Dict[str, Any]:
+    """
+    URLs de um gráfico para o painel: miniatura, imagem completa, SVG (se
+    configurado) e a miniatura embutida como data URI (se couber no limite).
+    Com raiz, as URLs usam o caminho relativo a ela (gráficos em subdiretórios).
+    """
+    def url(arquivo: str) -> str:
+        relativo = os.path.relpath(arquivo, raiz) if raiz else os.path.basename(arquivo)
+        # Nomes de coluna viram parte do arquivo: espaços, '#', '(' etc. precisam ser codificados
+        # (senão quebram o link Markdown do painel ou cortam o caminho da requisição)
+        return f"{URL_BASE_VISUALIZACOES}/{quote(relativo.replace(os.sep, '/'))}"
+
+    miniatura = caminho_miniatura(caminho)
+    descricao = {
+        "nome": os.path.basename(caminho),
+        "miniatura": url(miniatura),
+        "completo": url(caminho),
+    }
+    if GERAR_SVG:
+        descricao["svg"] = url(caminho_svg(caminho))
+    if LIMITE_BYTES_INLINE and os.path.exists(miniatura) and os.path.getsize(miniatura) <= LIMITE_BYTES_INLINE:
+        with open(miniatura, "rb") as f:
+            conteudo = base64.b64encode(f.read()).decode("ascii")
+        descricao["inline"] = f"data:{TIPOS_MIME[os.path.splitext(miniatura)[1]]};base64,{conteudo}"
+    return descricao
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Grafo de conhecimento
+Liga publicações, temas, hipóteses, missões e datasets extraídos pelos agentes,
+com um backend local em memória (listas de adjacência) e um backend Neo4j
+"""
+
+import logging
+import os
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from agent_literatura import TEMAS_LITERATURA, identificar_temas, extrair_hipoteses
+
+logger = logging.getLogger(__name__)
+
+# 'local' (em memória, padrão) ou 'neo4j' (usa NEO4J_URI/NEO4J_USER/NEO4J_PASSWORD de app/config.py)
+BACKEND_PADRAO = os.getenv("GRAFO_BACKEND", "local")
+# Linhas por comando UNWIND nas escritas em lote do Neo4j
+TAMANHO_LOTE_NEO4J = int(os.getenv("NEO4J_TAMANHO_LOTE", "1000"))
+TAMANHO_POOL_NEO4J = int(os.getenv("NEO4J_TAMANHO_POOL", "50"))
+
+# Rótulos dos nós e tipos de relação (validados, pois o Cypher não parametriza rótulos)
+PUBLICACAO, TEMA, HIPOTESE, MISSAO, DATASET = "Publicacao", "Tema", "Hipotese", "Missao", "Dataset"
+ROTULOS = (PUBLICACAO, TEMA, HIPOTESE, MISSAO, DATASET)
+SOBRE = "SOBRE"                    # Publicacao -> Tema
+PROPOE = "PROPOE"                  # Publicacao -> Hipotese
+RELEVANTE_PARA = "RELEVANTE_PARA"  # Tema -> Missao
+CONSTA_EM = "CONSTA_EM"            # Publicacao -> Dataset
+RELACOES = (SOBRE, PROPOE, RELEVANTE_PARA, CONSTA_EM)
+
+# Missões reconhecidas nas consultas e nos resultados do Agent Missões
+MISSOES = {
+    "marte": {"nome": "Missões a Marte", "palavras": ("marte", "mars", "marciana", "marciano")},
+    "lua": {"nome": "Missões lunares", "palavras": ("lua", "lunar", "moon")},
+}
+# Relevância conhecida de antemão; o Agent Missões acrescenta outras (temas citados nos riscos e recomendações)
+RELEVANCIA_BASE = [
+    ("radiacao_espacial", "marte"), ("radiacao_espacial", "lua"),
+    ("microgravidade", "marte"), ("microgravidade", "lua"),
+    ("biologia_espacial", "marte"), ("exploracao_marte", "marte"),
+]
+
+
+def _normalizar(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def identificar_missoes(texto: str) -> List[str]:
+    """
+    Missões de MISSOES mencionadas no texto (sem distinção de acentos).
+    """
+    texto = _normalizar(texto)
+    return [missao for missao, info in MISSOES.items() if any(p in texto for p in info["palavras"])]
+
+
+def _validar(rotulos: Iterable[str] = (), relacoes: Iterable[str] = ()):
+    for rotulo in rotulos:
+        if rotulo not in ROTULOS:
+            raise ValueError(f"Rótulo de nó '{rotulo}' inválido. Escolha entre {', '.join(ROTULOS)}.")
+    for relacao in relacoes:
+        if relacao not in RELACOES:
+            raise ValueError(f"Tipo de relação '{relacao}' inválido. Escolha entre {', '.join(RELACOES)}.")
+
+
+class GrafoLocal:
+    """
+    Grafo em memória para execução local e testes.
+
+    Cada nó recebe um índice inteiro; (rótulo, chave) -> índice é um dicionário,
+    e cada relação guarda listas de adjacência de saída e de entrada, de modo
+    que um percurso custa o número de vizinhos visitados, não o tamanho do grafo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._indices: Dict[Tuple[str, str], int] = {}
+        self._nos: List[Dict[str, Any]] = []
+        self._rotulos: List[str] = []
+        self._por_rotulo: Dict[str, List[int]] = defaultdict(list)
+        self._saida: Dict[str, Dict[int, Set[int]]] = {r: defaultdict(set) for r in RELACOES}
+        self._entrada: Dict[str, Dict[int, Set[int]]] = {r: defaultdict(set) for r in RELACOES}
+
+    def mesclar_nos(self, rotulo: str, linhas: List[Dict[str, Any]]):
+        """
+        Cria ou atualiza (MERGE) nós pela chave; as demais propriedades são sobrescritas.
+        """
+        _validar(rotulos=[rotulo])
+        with self._lock:
+            for linha in linhas:
+                indice = self._indices.get((rotulo, linha["chave"]))
+                if indice is None:
+                    self._indices[(rotulo, linha["chave"])] = len(self._nos)
+                    self._por_rotulo[rotulo].append(len(self._nos))
+                    self._nos.append(dict(linha))
+                    self._rotulos.append(rotulo)
+                else:
+                    self._nos[indice].update(linha)
+
+    def mesclar_arestas(self, relacao: str, rotulo_origem: str, rotulo_destino: str, pares: List[Tuple[str, str]]):
+        """
+        Cria (MERGE) arestas entre nós existentes; pares com nó ausente são ignorados.
+        """
+        _validar(rotulos=[rotulo_origem, rotulo_destino], relacoes=[relacao])
+        with self._lock:
+            for origem, destino in pares:
+                a = self._indices.get((rotulo_origem, origem))
+                b = self._indices.get((rotulo_destino, destino))
+                if a is not None and b is not None:
+                    self._saida[relacao][a].add(b)
+                    self._entrada[relacao][b].add(a)
+
+    def vizinhos(self, rotulo: str, chave: str, relacao: str, direcao: str = "saida") -> List[Dict[str, Any]]:
+        _validar(rotulos=[rotulo], relacoes=[relacao])
+        adjacencia = self._saida[relacao] if direcao == "saida" else self._entrada[relacao]
+        with self._lock:
+            indice = self._indices.get((rotulo, chave))
+            if indice is None:
+                return []
+            return [dict(self._nos[v]) for v in adjacencia.get(indice, ())]
+
+    def publicacoes_relevantes(self, missao: str, tema: Optional[str] = None, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Percurso Missao <-RELEVANTE_PARA- Tema <-SOBRE- Publicacao.
+        """
+        with self._lock:
+            indice_missao = self._indices.get((MISSAO, missao))
+            if indice_missao is None:
+                return []
+            temas_por_publicacao: Dict[int, List[str]] = {}
+            for t in sorted(self._entrada[RELEVANTE_PARA].get(indice_missao, ())):
+                chave_tema = self._nos[t]["chave"]
+                if tema is not None and chave_tema != tema:
+                    continue
+                for p in sorted(self._entrada[SOBRE].get(t, ())):
+                    temas_por_publicacao.setdefault(p, []).append(chave_tema)
+            return [dict(self._nos[p], temas=temas) for p, temas in list(temas_por_publicacao.items())[:limite]]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "local",
+                "nos": {rotulo: len(self._por_rotulo[rotulo]) for rotulo in ROTULOS},
+                "arestas": {r: sum(len(v) for v in self._saida[r].values()) for r in RELACOES},
+            }
+
+    def fechar(self):
+        pass
+
+
+class GrafoNeo4j:
+    """
+    Grafo no Neo4j. O driver mantém um pool de conexões compartilhado entre as
+    threads; as escritas são lotes de UNWIND + MERGE (uma transação por lote,
+    em vez de um comando por nó) e cada rótulo tem restrição de unicidade na
+    chave, o que cria o índice usado pelos MATCH dos percursos.
+    """
+
+    def __init__(self, uri: str, usuario: str, senha: str, tamanho_pool: int = TAMANHO_POOL_NEO4J,
+                 tamanho_lote: int = TAMANHO_LOTE_NEO4J):
+        from neo4j import GraphDatabase
+
+        self._driver = GraphDatabase.driver(uri, auth=(usuario, senha), max_connection_pool_size=tamanho_pool)
+        self._driver.verify_connectivity()
+        self.tamanho_lote = tamanho_lote
+        with self._driver.session() as sessao:
+            for rotulo in ROTULOS:
+                sessao.run(f"CREATE CONSTRAINT {rotulo.lower()}_chave IF NOT EXISTS "
+                           f"FOR (n:{rotulo}) REQUIRE n.chave IS UNIQUE")
+
+    def _escrever_em_lotes(self, comando: str, linhas: List[Any]):
+        with self._driver.session() as sessao:
+            for inicio in range(0, len(linhas), self.tamanho_lote):
+                lote = linhas[inicio:inicio + self.tamanho_lote]
+                sessao.execute_write(lambda tx: tx.run(comando, linhas=lote).consume())
+
+    def mesclar_nos(self, rotulo: str, linhas: List[Dict[str, Any]]):
+        _validar(rotulos=[rotulo])
+        self._escrever_em_lotes(
+            f"UNWIND $linhas AS linha MERGE (n:{rotulo} {{chave: linha.chave}}) SET n += linha", linhas
+        )
+
+    def mesclar_arestas(self, relacao: str, rotulo_origem: str, rotulo_destino: str, pares: List[Tuple[str, str]]):
+        _validar(rotulos=[rotulo_origem, rotulo_destino], relacoes=[relacao])
+        self._escrever_em_lotes(
+            f"UNWIND $linhas AS par MATCH (a:{rotulo_origem} {{chave: par[0]}}) "
+            f"MATCH (b:{rotulo_destino} {{chave: par[1]}}) MERGE (a)-[:{relacao}]->(b)",
+            [list(par) for par in pares],
+        )
+
+    def vizinhos(self, rotulo: str, chave: str, relacao: str, direcao: str = "saida") -> List[Dict[str, Any]]:
+        _validar(rotulos=[rotulo], relacoes=[relacao])
+        padrao = f"-[:{relacao}]->" if direcao == "saida" else f"<-[:{relacao}]-"
+        registros, _, _ = self._driver.execute_query(
+            f"MATCH (n:{rotulo} {{chave: $chave}}){padrao}(v) RETURN properties(v) AS v", chave=chave
+        )
+        return [registro["v"] for registro in registros]
+
+    def publicacoes_relevantes(self, missao: str, tema: Optional[str] = None, limite: int = 20) -> List[Dict[str, Any]]:
+        registros, _, _ = self._driver.execute_query(
+            f"MATCH (m:{MISSAO} {{chave: $missao}})<-[:{RELEVANTE_PARA}]-(t:{TEMA})<-[:{SOBRE}]-(p:{PUBLICACAO}) "
+            "WHERE $tema IS NULL OR t.chave = $tema "
+            "RETURN properties(p) AS p, collect(t.chave) AS temas LIMIT $limite",
+            missao=missao, tema=tema, limite=limite,
+        )
+        return [dict(registro["p"], temas=registro["temas"]) for registro in registros]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        nos = {}
+        for rotulo in ROTULOS:
+            registros, _, _ = self._driver.execute_query(f"MATCH (n:{rotulo}) RETURN count(n) AS n")
+            nos[rotulo] = registros[0]["n"]
+        arestas = {}
+        for relacao in RELACOES:
+            registros, _, _ = self._driver.execute_query(f"MATCH ()-[r:{relacao}]->() RETURN count(r) AS n")
+            arestas[relacao] = registros[0]["n"]
+        return {"backend": "neo4j", "nos": nos, "arestas": arestas}
+
+    def fechar(self):
+        self._driver.close()
+
+
+class GrafoConhecimento:
+    """
+    Extrai entidades e relações dos resultados dos agentes para o grafo e
+    responde às consultas que cruzam agentes (ex.: publicações sobre radiação
+    relevantes para missões lunares) como percursos no grafo.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else GrafoLocal()
+        self.backend.mesclar_nos(TEMA, [{"chave": tema, "nome": tema.replace("_", " ").title()} for tema in TEMAS_LITERATURA])
+        self.backend.mesclar_nos(MISSAO, [{"chave": missao, "nome": info["nome"]} for missao, info in MISSOES.items()])
+        self.backend.mesclar_arestas(RELEVANTE_PARA, TEMA, MISSAO, RELEVANCIA_BASE)
+
+    def registrar_datasets(self, datasets: List[Dict[str, Any]]):
+        self.backend.mesclar_nos(DATASET, [
+            {"chave": d["id"], "nome": d["nome"], "url": d["url"], "fonte": d.get("fonte", "")} for d in datasets
+        ])
+
+    def indexar_publicacoes(self, df: pd.DataFrame, id_dataset: Optional[str] = None,
+                            temas: Optional[List[List[str]]] = None) -> int:
+        """
+        Indexa em lote as publicações de um DataFrame com colunas Title e Link.
+
+        Args:
+            df: Publicações.
+            id_dataset: Dataset do catálogo de onde vieram (relação CONSTA_EM).
+            temas: Temas pré-calculados de cada linha (ver topicos); sem eles,
+                os temas vêm das palavras-chave do título.
+
+        Returns:
+            Número de publicações indexadas.
+        """
+        if df.empty or "Title" not in df.columns:
+            return 0
+        links = df["Link"] if "Link" in df.columns else df["Title"]
+        artigos = [{"titulo": str(t), "link": str(l)} for t, l in zip(df["Title"], links)]
+        if temas is not None:
+            for artigo, temas_artigo in zip(artigos, temas):
+                artigo["temas"] = temas_artigo
+        artigos = [a for a, t in zip(artigos, df["Title"]) if pd.notna(t)]
+        self._registrar_artigos(artigos, id_dataset)
+        return len(artigos)
+
+    def registrar_literatura(self, resultado: Dict[str, Any]):
+        """
+        Publicações, temas e hipóteses de um resultado do Agent Literatura.
+        """
+        self._registrar_artigos(resultado.get("resultados_busca", []))
+
+    def _registrar_artigos(self, artigos: List[Dict[str, str]], id_dataset: Optional[str] = None):
+        publicacoes, sobre, hipoteses, propoe, consta = [], [], [], [], []
+        for artigo in artigos:
+            chave = artigo.get("link") or artigo["titulo"]
+            publicacoes.append({"chave": chave, "titulo": artigo["titulo"], "link": artigo.get("link", "")})
+            abstract = artigo.get("abstract", "")
+            temas = artigo["temas"] if "temas" in artigo else identificar_temas(artigo["titulo"] + " " + abstract)
+            sobre += [(chave, tema) for tema in temas]
+            for hipotese in extrair_hipoteses(abstract):
+                hipoteses.append({"chave": _normalizar(hipotese), "texto": hipotese})
+                propoe.append((chave, _normalizar(hipotese)))
+            if id_dataset:
+                consta.append((chave, id_dataset))
+        self.backend.mesclar_nos(PUBLICACAO, publicacoes)
+        # Temas dos tópicos do corpus, além dos de referência criados no construtor
+        novos = sorted({tema for _, tema in sobre} - set(TEMAS_LITERATURA))
+        self.backend.mesclar_nos(TEMA, [{"chave": tema, "nome": tema.replace("_", " ").title()} for tema in novos])
+        self.backend.mesclar_nos(HIPOTESE, hipoteses)
+        self.backend.mesclar_arestas(SOBRE, PUBLICACAO, TEMA, sobre)
+        self.backend.mesclar_arestas(PROPOE, PUBLICACAO, HIPOTESE, propoe)
+        self.backend.mesclar_arestas(CONSTA_EM, PUBLICACAO, DATASET, consta)
+
+    def registrar_missoes(self, resultado: Dict[str, Any]):
+        """
+        Liga às missões da consulta os temas citados nos riscos, recomendações
+        e tecnologias de um resultado do Agent Missões.
+        """
+        missoes = identificar_missoes(resultado.get("consulta_original", ""))
+        textos = (resultado.get("analise_riscos_oportunidades", {}).get("riscos", [])
+                  + resultado.get("recomendacoes_investimento", [])
+                  + resultado.get("tecnologias_promissoras", []))
+        temas = {tema for texto in textos for tema in identificar_temas(texto)}
+        self.backend.mesclar_arestas(RELEVANTE_PARA, TEMA, MISSAO, [(t, m) for t in sorted(temas) for m in missoes])
+
+    def conexoes(self, consulta: str, limite: int = 10) -> List[Dict[str, Any]]:
+        """
+        Publicações relevantes para as missões citadas na consulta, restritas
+        aos temas citados (se houver).
+
+        Returns:
+            Lista de {"missao", "tema", "publicacoes"} por missão e tema.
+        """
+        temas = identificar_temas(consulta) or [None]
+        return [
+            {"missao": missao, "tema": tema, "publicacoes": self.backend.publicacoes_relevantes(missao, tema, limite)}
+            for missao in identificar_missoes(consulta) for tema in temas
+        ]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return self.backend.estatisticas()
+
+    def fechar(self):
+        self.backend.fechar()
+
+
+def grafo_padrao() -> GrafoConhecimento:
+    """
+    Grafo com o backend de GRAFO_BACKEND. Se o Neo4j não estiver configurado ou
+    acessível, usa o grafo local.
+    """
+    if BACKEND_PADRAO == "neo4j":
+        from app.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+
+        if NEO4J_URI:
+            try:
+                return GrafoConhecimento(GrafoNeo4j(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD))
+            except Exception as e:
+                logger.error("Não foi possível conectar ao Neo4j em %s: %s. Usando o grafo local.", NEO4J_URI, e)
+        else:
+            logger.warning("GRAFO_BACKEND=neo4j, mas NEO4J_URI não está definido. Usando o grafo local.")
+    return GrafoConhecimento(GrafoLocal())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Instrumentação do sistema multi-agente
+Rastreamento por requisição, tempos por estágio e métricas no formato Prometheus
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+logger = logging.getLogger("instrumentacao")
+
+# Limites superiores (em segundos) dos buckets dos histogramas de latência
+BUCKETS_LATENCIA: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+_trace_atual: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_atual", default=None)
+_span_atual: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_atual", default=None)
+
+
+class HistogramaLatencia:
+    """Histograma cumulativo de latências de um estágio"""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_LATENCIA):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+        self.erros = 0
+
+    def observar(self, duracao: float, erro: bool = False):
+        for i, limite in enumerate(self.buckets):
+            if duracao <= limite:
+                self.contagens[i] += 1
+                break
+        self.soma += duracao
+        self.total += 1
+        if erro:
+            self.erros += 1
+
+    def cumulativo(self) -> List[int]:
+        acumulado = []
+        parcial = 0
+        for contagem in self.contagens:
+            parcial += contagem
+            acumulado.append(parcial)
+        return acumulado
+
+
+class RegistroMetricas:
+    """
+    Registro de histogramas de latência por estágio do pipeline.
+    Seguro para uso concorrente entre threads de requisição.
+    """
+
+    def __init__(self, prefixo: str = "nasa_agentes"):
+        self.prefixo = prefixo
+        self._histogramas: Dict[str, HistogramaLatencia] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, estagio: str, duracao: float, erro: bool = False):
+        with self._lock:
+            histograma = self._histogramas.get(estagio)
+            if histograma is None:
+                histograma = self._histogramas[estagio] = HistogramaLatencia()
+            histograma.observar(duracao, erro)
+
+    def resumo(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna contagem, soma e média de latência por estágio.
+        """
+        with self._lock:
+            return {
+                estagio: {
+                    "total": h.total,
+                    "erros": h.erros,
+                    "soma_segundos": h.soma,
+                    "media_segundos": h.soma / h.total if h.total else 0.0,
+                }
+                for estagio, h in self._histogramas.items()
+            }
+
+    def exportar_prometheus(self) -> str:
+        """
+        Exporta os histogramas no formato de texto do Prometheus (versão 0.0.4).
+        """
+        nome = f"{self.prefixo}_estagio_duracao_segundos"
+        nome_erros = f"{self.prefixo}_estagio_erros_total"
+        linhas = [
+            f"# HELP {nome} Latência por estágio do pipeline multi-agente.",
+            f"# TYPE {nome} histogram",
+        ]
+        with self._lock:
+            itens = sorted(self._histogramas.items())
+            for estagio, h in itens:
+                for limite, acumulado in zip(h.buckets, h.cumulativo()):
+                    linhas.append(f'{nome}_bucket{{estagio="{estagio}",le="{limite}"}} {acumulado}')
+                linhas.append(f'{nome}_bucket{{estagio="{estagio}",le="+Inf"}} {h.total}')
+                linhas.append(f'{nome}_sum{{estagio="{estagio}"}} {h.soma}')
+                linhas.append(f'{nome}_count{{estagio="{estagio}"}} {h.total}')
+            linhas.append(f"# HELP {nome_erros} Spans encerrados com exceção por estágio.")
+            linhas.append(f"# TYPE {nome_erros} counter")
+            for estagio, h in itens:
+                linhas.append(f'{nome_erros}{{estagio="{estagio}"}} {h.erros}')
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas.clear()
+
+
+# Registro global usado pelos agentes e pelo servidor
+metricas = RegistroMetricas()
+
+
+def _novo_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def trace_atual() -> Optional[str]:
+    """Retorna o identificador do trace ativo no contexto atual, se houver."""
+    return _trace_atual.get()
+
+
+@contextmanager
+def iniciar_trace(nome: str, **atributos) -> Iterator[str]:
+    """
+    Abre um trace para uma requisição. Se já houver um trace ativo no contexto,
+    ele é reaproveitado e apenas um novo span é aberto.
+
+    Args:
+        nome: Nome do estágio raiz (ex.: 'processar_consulta').
+        **atributos: Atributos adicionais registrados no log estruturado.
+
+    Yields:
+        Identificador do trace.
+    """
+    if _trace_atual.get() is not None:
+        with medir(nome, **atributos):
+            yield _trace_atual.get()
+        return
+
+    token = _trace_atual.set(_novo_id())
+    try:
+        with medir(nome, **atributos):
+            yield _trace_atual.get()
+    finally:
+        _trace_atual.reset(token)
+
+
+@contextmanager
+def medir(estagio: str, **atributos) -> Iterator[None]:
+    """
+    Mede a duração de um estágio, alimenta o histograma correspondente
+    e emite um log estruturado (JSON) com o span.
+
+    Args:
+        estagio: Nome do estágio (ex.: 'download', 'read_csv', 'plot').
+        **atributos: Atributos adicionais do span (coluna, agente, url...).
+    """
+    span_id = _novo_id()
+    span_pai = _span_atual.get()
+    token = _span_atual.set(span_id)
+    inicio = time.perf_counter()
+    erro: Optional[BaseException] = None
+    try:
+        yield
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        _span_atual.reset(token)
+        metricas.observar(estagio, duracao, erro is not None)
+        if logger.isEnabledFor(logging.INFO):
+            registro = {
+                "trace_id": _trace_atual.get(),
+                "span_id": span_id,
+                "span_pai": span_pai,
+                "estagio": estagio,
+                "duracao_ms": round(duracao * 1000, 3),
+                "status": "erro" if erro is not None else "ok",
+            }
+            if erro is not None:
+                registro["erro"] = repr(erro)
+            if atributos:
+                registro["atributos"] = atributos
+            logger.info("span %s", estagio, extra={"campos": registro})
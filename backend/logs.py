@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Subsistema de logs do sistema multi-agente
+Logs estruturados (JSON) escritos por uma thread em segundo plano
+"""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Optional
+
+# Atributos padrão de um LogRecord, que não devem ser repetidos como campos extras
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "campos"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON.
+    Campos estruturados podem ser passados via extra={"campos": {...}}.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        campos = getattr(record, "campos", None)
+        if campos:
+            registro.update(campos)
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith("_"):
+                registro[chave] = valor
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+class HandlerFila(logging.handlers.QueueHandler):
+    """
+    QueueHandler que mantém a exceção no registro enfileirado.
+
+    O prepare() padrão formata o registro na thread de quem chamou e descarta
+    exc_info, então o FormatadorJSON nunca veria a exceção. Aqui só a mensagem
+    é resolvida no produtor (os argumentos podem mudar depois); exc_info e
+    stack_info seguem até o formatador, na thread do QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+
+def configurar_logs(nivel: Optional[str] = None, formato: Optional[str] = None) -> logging.handlers.QueueListener:
+    """
+    Configura o logger raiz para escrever através de uma fila.
+    Os produtores (threads de requisição) apenas resolvem a mensagem e
+    enfileiram o registro (ver HandlerFila); a formatação, inclusive do
+    traceback, e a escrita em stdout ocorrem na thread do QueueListener.
+    Chamadas repetidas são idempotentes.
+
+    Args:
+        nivel: Nível mínimo de log (padrão: variável LOG_LEVEL ou 'INFO').
+        formato: 'json' (padrão, variável LOG_FORMAT) ou 'texto'.
+
+    Returns:
+        O QueueListener em execução.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        nivel = (nivel or os.getenv("LOG_LEVEL", "INFO")).upper()
+        formato = (formato or os.getenv("LOG_FORMAT", "json")).lower()
+
+        destino = logging.StreamHandler(sys.stdout)
+        if formato == "texto":
+            destino.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        else:
+            destino.setFormatter(FormatadorJSON())
+
+        fila: queue.SimpleQueue = queue.SimpleQueue()
+        raiz = logging.getLogger()
+        for handler in list(raiz.handlers):
+            raiz.removeHandler(handler)
+        raiz.addHandler(HandlerFila(fila))
+        raiz.setLevel(nivel)
+
+        _listener = logging.handlers.QueueListener(fila, destino, respect_handler_level=True)
+        _listener.start()
+        atexit.register(encerrar_logs)
+        return _listener
+
+
+def encerrar_logs():
+    """Esvazia a fila e encerra a thread de escrita."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
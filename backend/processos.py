@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Pools de processos
+Contexto de multiprocessing usado pelos pools de processos (busca fragmentada
+da literatura e agentes com a política PROCESSO)
+"""
+
+import multiprocessing
+import os
+from multiprocessing.context import BaseContext
+
+# Método de início dos processos dos pools. forkserver (padrão) e spawn criam
+# cada processo a partir de um interpretador limpo; fork copiaria o servidor
+# com as threads (logs, prefetcher, requisições) e os locks que elas seguram
+METODO_INICIO = os.getenv("PROCESSOS_METODO_INICIO", "forkserver")
+# Módulos importados uma vez no servidor do forkserver e herdados, já
+# carregados, por todos os processos criados por ele
+MODULOS_PRECARREGADOS = ["numpy", "pandas", "busca_fragmentada", "registro_agentes",
+                         "agent_csv", "agent_literatura", "agent_missoes"]
+
+
+def contexto_processos() -> BaseContext:
+    """
+    Contexto para os ProcessPoolExecutor do sistema.
+
+    Os processos não herdam o estado do processo principal: o que eles usam
+    (memória compartilhada do índice, agentes) é carregado pelo initializer do
+    pool. Com forkserver ou spawn, o script principal é importado nos
+    processos como __mp_main__, então ele não deve criar agentes nem iniciar
+    threads nesse caso (ver servidor_api).
+    """
+    contexto = multiprocessing.get_context(METODO_INICIO)
+    if METODO_INICIO == "forkserver":
+        # Só vale antes de o servidor do forkserver iniciar (no primeiro pool criado)
+        contexto.set_forkserver_preload(MODULOS_PRECARREGADOS)
+    return contexto
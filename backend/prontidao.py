@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Aquecimento e prontidão
+Pré-carrega datasets, prepara o matplotlib e executa consultas de aquecimento
+em cada agente até a latência estabilizar, informando a prontidão por componente
+e repetindo o aquecimento dos componentes que falharam
+"""
+
+import datetime
+import io
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional
+
+from instrumentacao import medir
+
+logger = logging.getLogger(__name__)
+
+# Consultas de aquecimento executadas por agente (até a latência estabilizar)
+MIN_RODADAS = int(os.getenv("PRONTIDAO_MIN_RODADAS", "2"))
+MAX_RODADAS = int(os.getenv("PRONTIDAO_MAX_RODADAS", "5"))
+# Latência estável: a última rodada difere da anterior em no máximo esta fração
+TOLERANCIA_ESTABILIDADE = float(os.getenv("PRONTIDAO_TOLERANCIA", "0.5"))
+# Espera antes de repetir o aquecimento dos componentes com erro (dobra a cada nova falha, até o máximo)
+ESPERA_RETENTATIVA = float(os.getenv("PRONTIDAO_RETENTATIVA_SEGUNDOS", "5"))
+ESPERA_RETENTATIVA_MAXIMA = float(os.getenv("PRONTIDAO_RETENTATIVA_MAX_SEGUNDOS", "300"))
+
+PENDENTE, AQUECENDO, PRONTO, ERRO = "pendente", "aquecendo", "pronto", "erro"
+
+
+@dataclass
+class EstadoComponente:
+    """Situação do aquecimento de um componente (agente, datasets ou gráficos)"""
+    estado: str = PENDENTE
+    latencias_ms: List[float] = field(default_factory=list)
+    duracao_ms: Optional[float] = None
+    mensagem: str = ""
+    tentativas: int = 0
+
+
+def preparar_matplotlib():
+    """
+    Desenha e salva uma figura com texto, nos formatos usados pelos gráficos,
+    para que o cache de fontes e os backends de imagem já estejam carregados
+    na primeira consulta.
+    """
+    from matplotlib.figure import Figure
+
+    import graficos
+
+    fig = Figure(figsize=graficos.TAMANHO_MINIATURA, dpi=graficos.DPI_MINIATURA)
+    ax = fig.subplots()
+    ax.hist([0.0, 1.0, 1.0, 2.0], bins=3)
+    ax.set_title("Aquecimento")
+    ax.set_xlabel("x")
+    fig.tight_layout()
+    for formato in ("png", graficos.FORMATO_MINIATURA):
+        fig.savefig(io.BytesIO(), format=formato)
+
+
+class AquecedorAgentes:
+    """
+    Executa a fase de aquecimento em segundo plano e guarda a prontidão de
+    cada componente. O servidor fica pronto (ver pronto()) quando todos os
+    componentes terminaram sem erro; até lá, /api/ready responde 503.
+
+    Um componente com erro (ex.: host do dataset fora do ar na partida) é
+    aquecido de novo, com espera crescente, até ficar pronto: uma falha
+    transitória não deixa o servidor fora do balanceador para sempre.
+    """
+
+    def __init__(self, agent_geral, prefetcher=None, consultas: Optional[Dict[str, str]] = None):
+        self.agent_geral = agent_geral
+        self.prefetcher = prefetcher
+        # Por padrão, a consulta representativa de cada agente registrado
+        self.consultas = consultas or {
+            str(agente.tipo): agente.consulta_aquecimento
+            for agente in agent_geral.registro.agentes() if agente.consulta_aquecimento
+        }
+        self._lock = threading.Lock()
+        self._componentes: Dict[str, EstadoComponente] = {
+            nome: EstadoComponente() for nome in ["datasets", "graficos", "grafo"] + list(self.consultas)
+        }
+        self._inicio = time.monotonic()
+        self.concluido_em: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+
+    def _atualizar(self, nome: str, **campos):
+        with self._lock:
+            for campo, valor in campos.items():
+                setattr(self._componentes[nome], campo, valor)
+
+    def _etapa(self, nome: str, funcao):
+        with self._lock:
+            componente = self._componentes[nome]
+            componente.estado = AQUECENDO
+            componente.tentativas += 1
+        inicio = time.perf_counter()
+        try:
+            with medir("aquecimento", componente=nome):
+                mensagem = funcao() or ""
+            self._atualizar(nome, estado=PRONTO, mensagem=mensagem)
+        except Exception as e:
+            logger.error("Aquecimento de %s falhou: %s", nome, e)
+            self._atualizar(nome, estado=ERRO, mensagem=str(e))
+        finally:
+            self._atualizar(nome, duracao_ms=round((time.perf_counter() - inicio) * 1000, 3))
+
+    def _aquecer_datasets(self) -> str:
+        if self.prefetcher is None:
+            return "prefetch desativado"
+        falhas = {d: e for d, e in self.prefetcher.aquecer().items() if e != "ok"}
+        if falhas:
+            raise RuntimeError(f"falha ao baixar {', '.join(sorted(falhas))}")
+        return ""
+
+    def _aquecer_grafo(self) -> str:
+        nos = self.agent_geral.grafo.estatisticas()["nos"]
+        return f"{sum(nos.values())} nós"
+
+    def _aquecer_agente(self, nome: str):
+        """
+        Executa a consulta de aquecimento do agente até a latência de duas
+        rodadas consecutivas ficar dentro da tolerância (ou até MAX_RODADAS),
+        depois de preparar o pool e os recursos do agente no registro.
+        """
+        self.agent_geral.registro.aquecer(nome)
+        consulta = self.agent_geral._adaptar_consulta_para_agente(self.consultas[nome], nome)
+        latencias = []
+        for rodada in range(MAX_RODADAS):
+            inicio = time.perf_counter()
+            # O aquecimento não conta como uso (não altera os datasets populares do prefetcher)
+            resultado = self.agent_geral._executar_agente(nome, consulta, registrar_uso=False)
+            latencias.append(round((time.perf_counter() - inicio) * 1000, 3))
+            self._atualizar(nome, latencias_ms=list(latencias))
+            if not resultado.sucesso or resultado.dados.get("status") == "erro":
+                raise RuntimeError(resultado.dados.get("mensagem") or resultado.mensagem)
+            if rodada + 1 >= MIN_RODADAS and \
+                    abs(latencias[-1] - latencias[-2]) <= TOLERANCIA_ESTABILIDADE * max(latencias[-2], 1.0):
+                return f"latência estável após {rodada + 1} rodadas"
+        return f"latência não estabilizou em {MAX_RODADAS} rodadas"
+
+    def _etapas(self) -> Dict[str, Any]:
+        # Os datasets vêm antes dos agentes, para que a consulta do Agent CSV use a cópia local
+        etapas = {"datasets": self._aquecer_datasets, "graficos": preparar_matplotlib, "grafo": self._aquecer_grafo}
+        for nome in self.consultas:
+            etapas[nome] = lambda nome=nome: self._aquecer_agente(nome)
+        return etapas
+
+    def _com_erro(self) -> List[str]:
+        with self._lock:
+            return [nome for nome, c in self._componentes.items() if c.estado == ERRO]
+
+    def aquecer(self):
+        """
+        Executa todas as etapas (datasets, matplotlib, grafo e cada agente) e
+        depois repete as que falharam, com espera crescente entre as rodadas,
+        até todas ficarem prontas ou o aquecedor ser encerrado.
+        """
+        logger.info("Aquecimento iniciado.")
+        etapas = self._etapas()
+        for nome, funcao in etapas.items():
+            self._etapa(nome, funcao)
+        self.concluido_em = datetime.datetime.now().isoformat()
+        logger.info("Aquecimento concluído em %.1f s; pronto=%s", time.monotonic() - self._inicio, self.pronto())
+        # Depois da primeira carga, o prefetcher só revalida periodicamente
+        if self.prefetcher is not None:
+            self.prefetcher.iniciar(aquecer_agora=False)
+
+        espera = ESPERA_RETENTATIVA
+        while self._com_erro() and not self._parar.wait(espera):
+            falhos = self._com_erro()
+            logger.info("Repetindo o aquecimento de %s.", ", ".join(falhos))
+            for nome in falhos:
+                self._etapa(nome, etapas[nome])
+            espera = min(espera * 2, ESPERA_RETENTATIVA_MAXIMA)
+        if self.pronto():
+            logger.info("Todos os componentes prontos após %.1f s.", time.monotonic() - self._inicio)
+
+    def iniciar(self) -> "AquecedorAgentes":
+        self._thread = threading.Thread(target=self.aquecer, name="aquecimento", daemon=True)
+        self._thread.start()
+        return self
+
+    def encerrar(self):
+        """Interrompe as novas tentativas de aquecimento."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def pronto(self) -> bool:
+        with self._lock:
+            return all(c.estado == PRONTO for c in self._componentes.values())
+
+    def estado(self) -> Dict[str, Any]:
+        """
+        Prontidão geral e por componente, para /api/ready.
+        """
+        with self._lock:
+            componentes = {nome: asdict(c) for nome, c in self._componentes.items()}
+        return {
+            "pronto": all(c["estado"] == PRONTO for c in componentes.values()),
+            "componentes": componentes,
+            "segundos_desde_inicio": round(time.monotonic() - self._inicio, 3),
+            "concluido_em": self.concluido_em,
+        }
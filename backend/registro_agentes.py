@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Registro de agentes
+Interface dos agentes especializados e registro usado pelo Agent Geral para
+rotear e acionar cada um conforme sua política de execução (pool de threads
+ou de processos, concorrência, tempo limite e cache)
+"""
+
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as TempoEsgotado
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Dict, Any, List, Optional, Tuple
+
+from instrumentacao import medir
+from processos import contexto_processos
+from resiliencia import coletar_avisos, limitar_timeout, prazo_absoluto, prazo_atual
+
+logger = logging.getLogger(__name__)
+
+
+class AgentType(str, Enum):
+    """
+    Agentes embutidos. Agentes registrados depois podem usar qualquer texto como
+    tipo; como AgentType é um str, os dois se comparam e se indexam igualmente.
+    """
+    CSV = "csv"
+    LITERATURA = "literatura"
+    MISSOES = "missoes"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+@dataclass
+class ResultadoAgente:
+    """
+    Representa o resultado de um agente especializado
+    O campo 'dados' pode conter um dicionário com os resultados da análise,
+    incluindo caminhos para visualizações geradas. 'avisos' descreve uma
+    degradação do resultado (ex.: dados de uma cópia desatualizada).
+    """
+    agente_tipo: str
+    dados: Dict[str, Any]
+    sucesso: bool
+    mensagem: str
+    avisos: List[str] = field(default_factory=list)
+
+    @property
+    def degradado(self) -> bool:
+        return bool(self.avisos)
+
+
+THREAD, PROCESSO = "thread", "processo"
+
+
+@dataclass(frozen=True)
+class PoliticaExecucao:
+    """
+    Como o registro aciona um agente.
+
+    pool: THREAD (pool de threads do agente) ou PROCESSO (pool de processos do
+        agente, em que cada processo cria o seu agente com criar(); isola
+        agentes pesados em CPU dos demais).
+    max_concorrencia: Execuções simultâneas do agente (tamanho do pool); as
+        demais esperam na fila do pool.
+    timeout: Segundos até desistir de uma execução, contando a espera na fila
+        (None = sem limite); o prazo da consulta (ver resiliencia), se menor,
+        prevalece. A execução abandonada continua até terminar, mas as
+        operações de rede dela respeitam o mesmo prazo.
+    cache: Se painéis com resultados deste agente podem ir para o cache de respostas.
+    """
+    pool: str = THREAD
+    max_concorrencia: int = 4
+    timeout: Optional[float] = None
+    cache: bool = True
+
+    def do_ambiente(self, tipo: str) -> "PoliticaExecucao":
+        """
+        Esta política com os valores de AGENTE_<TIPO>_POOL, _CONCORRENCIA,
+        _TIMEOUT (0 = sem limite) e _CACHE (0/1), se definidos.
+        """
+        prefixo = f"AGENTE_{str(tipo).upper()}_"
+        timeout = os.getenv(prefixo + "TIMEOUT")
+        cache = os.getenv(prefixo + "CACHE")
+        return replace(
+            self,
+            pool=os.getenv(prefixo + "POOL", self.pool),
+            max_concorrencia=int(os.getenv(prefixo + "CONCORRENCIA", str(self.max_concorrencia))),
+            timeout=(float(timeout) or None) if timeout is not None else self.timeout,
+            cache=cache == "1" if cache is not None else self.cache,
+        )
+
+
+class AgenteEspecializado:
+    """
+    Interface de um agente no registro (route_score, run e warmup:
+    pontuar_rota, executar e aquecer).
+
+    Subclasses definem tipo, nome e executar; o roteamento padrão conta as
+    palavras_chave presentes na consulta.
+    """
+    tipo: str = ""
+    nome: str = ""
+    # Nome curto nas mensagens de erro (ex.: "Agent CSV")
+    rotulo: str = ""
+    mensagem_sucesso: str = ""
+    prefixo_consulta: str = ""
+    palavras_chave: Tuple[str, ...] = ()
+    # Consulta representativa executada na fase de aquecimento (ver prontidao)
+    consulta_aquecimento: str = ""
+    politica: PoliticaExecucao = PoliticaExecucao()
+
+    def pontuar_rota(self, consulta: str) -> float:
+        """
+        Relevância do agente para a consulta; 0 = não acionar.
+        """
+        texto = consulta.lower()
+        return float(sum(1 for palavra in self.palavras_chave if palavra in texto))
+
+    def adaptar_consulta(self, consulta: str) -> str:
+        return self.prefixo_consulta + consulta
+
+    def executar(self, consulta_adaptada: str, registrar_uso: bool = True) -> Dict[str, Any]:
+        """
+        Processa a consulta adaptada e devolve os dados do resultado. Com a
+        política PROCESSO, roda em um processo filho: argumentos e retorno
+        precisam ser serializáveis.
+
+        Args:
+            consulta_adaptada: Consulta já adaptada para o agente.
+            registrar_uso: Conta a execução nas estatísticas de uso dos dados
+                (False nas consultas de aquecimento).
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def criar(cls) -> "AgenteEspecializado":
+        """
+        Cria o agente e as suas dependências. Necessário para a política
+        PROCESSO: cada processo do pool cria o seu agente (os processos não
+        herdam o agente do processo principal).
+        """
+        raise NotImplementedError(f"{cls.__name__} não implementa criar(), necessário para o pool de processos.")
+
+    def aquecer(self):
+        """
+        Prepara recursos antes das consultas de aquecimento (opcional).
+        """
+
+    def chave_lote(self, consulta_adaptada: str) -> str:
+        """
+        Consultas de um lote com a mesma chave compartilham uma execução.
+        """
+        return " ".join(consulta_adaptada.lower().split())
+
+    def versao_dados(self, consulta: str) -> str:
+        """
+        Versão dos dados de que a resposta à consulta depende (invalida o cache
+        de respostas quando muda); vazio se não depender de dados mutáveis.
+        """
+        return ""
+
+
+class AgenteCSVRegistrado(AgenteEspecializado):
+    tipo = AgentType.CSV
+    nome = "Agent Especialista em CSV (Data Analyst)"
+    rotulo = "Agent CSV"
+    mensagem_sucesso = "Análise CSV concluída."
+    prefixo_consulta = "Analise os dados CSV relacionados a: "
+    palavras_chave = (
+        'dados', 'csv', 'estatística', 'análise', 'gráfico', 'tabela',
+        'tendência', 'padrão', 'números', 'dataset', 'planilha',
+        'visualização', 'correlação', 'média', 'distribuição'
+    )
+    consulta_aquecimento = "Análise estatística dos dados"
+    politica = PoliticaExecucao(max_concorrencia=4)
+
+    def __init__(self, agent_csv, catalogo):
+        self.agent_csv = agent_csv
+        self.catalogo = catalogo
+
+    @classmethod
+    def criar(cls) -> "AgenteCSVRegistrado":
+        from agent_csv import AgentCSV
+        from catalogo_datasets import catalogo_padrao
+        return cls(AgentCSV(), catalogo_padrao())
+
+    def executar(self, consulta_adaptada: str, registrar_uso: bool = True) -> Dict[str, Any]:
+        dataset = self.catalogo.selecionar(consulta_adaptada, registrar_uso=registrar_uso)[0]
+        with medir("agente_csv", dataset=dataset.id):
+            csv_result = self.agent_csv.processar_consulta_csv(
+                consulta_texto=consulta_adaptada,
+                csv_url=dataset.url,
+                incremental=True if dataset.incremental else None
+            )
+        if csv_result.get("status") == "erro":
+            # Falha na obtenção ou análise do dataset é falha do agente (e não um resultado vazio)
+            raise RuntimeError(csv_result.get("mensagem"))
+        csv_result["dataset"] = {"id": dataset.id, "nome": dataset.nome, "fonte": dataset.fonte}
+        return csv_result
+
+    def chave_lote(self, consulta_adaptada: str) -> str:
+        # O resultado depende apenas do dataset escolhido e do modo (completo ou prévia)
+        dataset = self.catalogo.selecionar(consulta_adaptada, registrar_uso=False)[0]
+        return f"{dataset.url}|previa={self.agent_csv.eh_consulta_previa(consulta_adaptada)}"
+
+    def versao_dados(self, consulta: str) -> str:
+        datasets = self.catalogo.selecionar(self.adaptar_consulta(consulta), registrar_uso=False)
+        if not datasets:
+            return ""
+        return f"{datasets[0].id}:{self.agent_csv.versao_dataset(datasets[0].url)}"
+
+
+class AgenteLiteraturaRegistrado(AgenteEspecializado):
+    tipo = AgentType.LITERATURA
+    nome = "Agent Especialista em Literatura (Research Analyst)"
+    rotulo = "Agent Literatura"
+    mensagem_sucesso = "Pesquisa de literatura concluída."
+    prefixo_consulta = "Busque na literatura científica informações sobre: "
+    palavras_chave = (
+        'artigo', 'pesquisa', 'literatura', 'paper', 'estudo',
+        'publicação', 'abstract', 'conclusão', 'hipótese',
+        'consenso', 'lacuna', 'conhecimento', 'científico',
+        'revista', 'autor', 'citação'
+    )
+    consulta_aquecimento = "Artigos sobre microgravidade e radiação"
+    politica = PoliticaExecucao(max_concorrencia=8)
+
+    def __init__(self, agent_literatura):
+        self.agent_literatura = agent_literatura
+
+    @classmethod
+    def criar(cls) -> "AgenteLiteraturaRegistrado":
+        from agent_literatura import AgentLiteratura
+        return cls(AgentLiteratura())
+
+    def executar(self, consulta_adaptada: str, registrar_uso: bool = True) -> Dict[str, Any]:
+        with medir("agente_literatura"):
+            return self.agent_literatura.processar_consulta_literatura(consulta_adaptada)
+
+
+class AgenteMissoesRegistrado(AgenteEspecializado):
+    tipo = AgentType.MISSOES
+    nome = "Agent Especialista em Missões (Mission Planner)"
+    rotulo = "Agent Missões"
+    mensagem_sucesso = "Planejamento de missões concluído."
+    prefixo_consulta = "Forneça insights de planejamento de missões para: "
+    palavras_chave = (
+        'missão', 'planejamento', 'risco', 'oportunidade',
+        'investimento', 'tecnologia', 'lunar', 'marciano',
+        'espacial', 'nasa', 'exploração', 'foguete',
+        'satélite', 'astronauta', 'rover'
+    )
+    consulta_aquecimento = "Riscos de uma missão lunar"
+    politica = PoliticaExecucao(max_concorrencia=8)
+
+    def __init__(self, agent_missoes):
+        self.agent_missoes = agent_missoes
+
+    @classmethod
+    def criar(cls) -> "AgenteMissoesRegistrado":
+        from agent_missoes import AgentMissoes
+        return cls(AgentMissoes())
+
+    def executar(self, consulta_adaptada: str, registrar_uso: bool = True) -> Dict[str, Any]:
+        with medir("agente_missoes"):
+            return self.agent_missoes.processar_consulta_missoes(consulta_adaptada)
+
+
+def _executar_coletando(agente: AgenteEspecializado, consulta_adaptada: str,
+                        registrar_uso: bool = True) -> Tuple[Dict[str, Any], List[str]]:
+    with coletar_avisos() as avisos:
+        dados = agente.executar(consulta_adaptada, registrar_uso=registrar_uso)
+    return dados, avisos
+
+
+# Agentes com política PROCESSO, criados em cada processo do pool (ver _iniciar_pool)
+_agentes_em_processos: Dict[str, AgenteEspecializado] = {}
+
+
+def _iniciar_pool(tipo: str, classe: type) -> None:
+    """
+    Initializer dos processos de um pool de agente: cria o agente uma vez por processo.
+    """
+    _agentes_em_processos[tipo] = classe.criar()
+    _agentes_em_processos[tipo].aquecer()
+
+
+def _executar_em_processo(tipo: str, consulta_adaptada: str, prazo: Optional[float],
+                          registrar_uso: bool = True) -> Tuple[Dict[str, Any], List[str]]:
+    # O contexto não atravessa processos: o prazo chega como argumento
+    with prazo_absoluto(prazo):
+        return _executar_coletando(_agentes_em_processos[tipo], consulta_adaptada, registrar_uso)
+
+
+def _iniciar_processo() -> None:
+    return None
+
+
+class RegistroAgentes:
+    """
+    Agentes especializados disponíveis, na ordem de registro, com um pool de
+    execução próprio por agente: um agente lento ou pesado ocupa apenas o
+    seu pool e não atrasa os demais.
+    """
+
+    def __init__(self):
+        self._agentes: Dict[str, AgenteEspecializado] = {}
+        self._politicas: Dict[str, PoliticaExecucao] = {}
+        self._pools: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, agente: AgenteEspecializado, politica: Optional[PoliticaExecucao] = None) -> AgenteEspecializado:
+        """
+        Registra (ou substitui) o agente do seu tipo.
+
+        Args:
+            agente: Agente a registrar.
+            politica: Política de execução (padrão: a do agente); variáveis
+                AGENTE_<TIPO>_* sobrepõem os valores.
+        """
+        politica = (politica or agente.politica).do_ambiente(agente.tipo)
+        if politica.pool not in (THREAD, PROCESSO):
+            raise ValueError(f"Pool de execução inválido para o agente {agente.tipo}: {politica.pool}")
+        if politica.pool == PROCESSO and type(agente).criar.__func__ is AgenteEspecializado.criar.__func__:
+            raise ValueError(f"O agente {agente.tipo} precisa implementar criar() para usar o pool de processos.")
+        with self._lock:
+            self._agentes[agente.tipo] = agente
+            self._politicas[agente.tipo] = politica
+            pool = self._pools.pop(agente.tipo, None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+        return agente
+
+    def obter(self, tipo: str) -> AgenteEspecializado:
+        try:
+            return self._agentes[tipo]
+        except KeyError:
+            raise ValueError(f"Tipo de agente desconhecido: {tipo}")
+
+    def politica(self, tipo: str) -> PoliticaExecucao:
+        return self._politicas[tipo]
+
+    def agentes(self) -> List[AgenteEspecializado]:
+        return list(self._agentes.values())
+
+    def tipos(self) -> List[str]:
+        return list(self._agentes)
+
+    def rotear(self, consulta: str) -> List[str]:
+        """
+        Tipos dos agentes com pontuação positiva para a consulta, na ordem de
+        registro; se nenhum pontuar, todos.
+        """
+        tipos = [tipo for tipo, agente in self._agentes.items() if agente.pontuar_rota(consulta) > 0]
+        return tipos or self.tipos()
+
+    def _pool(self, tipo: str) -> Executor:
+        with self._lock:
+            pool = self._pools.get(tipo)
+            if pool is None:
+                politica = self._politicas[tipo]
+                if politica.pool == PROCESSO:
+                    # Os processos não herdam o agente (nem as threads do servidor): cada um cria o seu
+                    pool = ProcessPoolExecutor(max_workers=politica.max_concorrencia, mp_context=contexto_processos(),
+                                               initializer=_iniciar_pool, initargs=(tipo, type(self._agentes[tipo])))
+                else:
+                    pool = ThreadPoolExecutor(max_workers=politica.max_concorrencia, thread_name_prefix=f"agente-{tipo}")
+                self._pools[tipo] = pool
+            return pool
+
+    def _submeter(self, tipo: str, consulta_adaptada: str, registrar_uso: bool = True) -> Future:
+        agente = self.obter(tipo)
+        logger.info("Agent Geral: Acionando %s com consulta: %s", agente.rotulo or tipo, consulta_adaptada)
+        if self._politicas[tipo].pool == PROCESSO:
+            return self._pool(tipo).submit(_executar_em_processo, tipo, consulta_adaptada, prazo_atual(),
+                                           registrar_uso)
+        # A cópia do contexto leva o trace e o prazo da consulta para a thread do pool
+        return self._pool(tipo).submit(contextvars.copy_context().run, _executar_coletando, agente,
+                                       consulta_adaptada, registrar_uso)
+
+    def _aguardar(self, tipo: str, futuro: Future) -> ResultadoAgente:
+        agente = self._agentes[tipo]
+        nome = agente.rotulo or tipo
+        politica = self._politicas[tipo]
+        timeout = limitar_timeout(politica.timeout)
+        try:
+            dados, avisos = futuro.result(timeout=timeout)
+            return ResultadoAgente(agente_tipo=tipo, dados=dados, sucesso=True,
+                                   mensagem=agente.mensagem_sucesso, avisos=avisos)
+        except TempoEsgotado:
+            futuro.cancel()
+            if politica.timeout is not None and timeout == politica.timeout:
+                mensagem = f"Tempo limite de {politica.timeout:g} s excedido pelo {nome}."
+            else:
+                mensagem = f"Prazo da consulta esgotado antes da resposta do {nome}."
+            logger.warning(mensagem)
+            return ResultadoAgente(agente_tipo=tipo, dados={}, sucesso=False, mensagem=mensagem)
+        except Exception as e:
+            return ResultadoAgente(agente_tipo=tipo, dados={}, sucesso=False, mensagem=f"Erro ao executar {nome}: {e}")
+
+    def executar(self, tipo: str, consulta_adaptada: str, registrar_uso: bool = True) -> ResultadoAgente:
+        """
+        Aciona o agente no seu pool e encapsula o resultado (ou o erro, inclusive
+        o tempo limite ou o prazo da consulta excedidos).
+
+        Args:
+            tipo: Tipo do agente a ser acionado
+            consulta_adaptada: Consulta já adaptada para o agente
+            registrar_uso: Conta a execução nas estatísticas de uso dos dados
+
+        Returns:
+            ResultadoAgente com os dados ou a mensagem de erro
+        """
+        return self.executar_varios([(tipo, consulta_adaptada)], registrar_uso=registrar_uso)[0]
+
+    def executar_varios(self, pedidos: List[Tuple[str, str]], registrar_uso: bool = True) -> List[ResultadoAgente]:
+        """
+        Aciona vários agentes ao mesmo tempo (cada um no seu pool) e espera
+        todos, cada um até o seu tempo limite ou o prazo da consulta.
+
+        Args:
+            pedidos: Pares (tipo do agente, consulta adaptada).
+            registrar_uso: Conta as execuções nas estatísticas de uso dos dados.
+
+        Returns:
+            ResultadoAgente de cada pedido, na mesma ordem.
+        """
+        futuros = []
+        for tipo, consulta_adaptada in pedidos:
+            try:
+                futuros.append(self._submeter(tipo, consulta_adaptada, registrar_uso))
+            except Exception as e:
+                futuros.append(e)
+        resultados = []
+        for (tipo, _), futuro in zip(pedidos, futuros):
+            if isinstance(futuro, Exception):
+                nome = self._agentes[tipo].rotulo if tipo in self._agentes else tipo
+                resultados.append(ResultadoAgente(agente_tipo=tipo, dados={}, sucesso=False,
+                                                  mensagem=f"Erro ao executar {nome or tipo}: {futuro}"))
+            else:
+                resultados.append(self._aguardar(tipo, futuro))
+        return resultados
+
+    def aquecer(self, tipo: str):
+        """
+        Cria o pool do agente (com processos, já os inicia) e executa o aquecer() do agente.
+        """
+        pool = self._pool(tipo)
+        if self._politicas[tipo].pool == PROCESSO:
+            for futuro in [pool.submit(_iniciar_processo) for _ in range(self._politicas[tipo].max_concorrencia)]:
+                futuro.result()
+        self._agentes[tipo].aquecer()
+
+    def fechar(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Resiliência
+Prazos por consulta propagados aos agentes (via contextvars), disjuntores
+(circuit breakers) por host remoto e avisos de degradação coletados durante
+a execução de um agente
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Prazo total de uma consulta (todos os agentes); 0 desativa
+PRAZO_CONSULTA_PADRAO = float(os.getenv("CONSULTA_PRAZO_SEGUNDOS", "30"))
+# Falhas consecutivas que abrem o disjuntor de um host
+FALHAS_PARA_ABRIR = int(os.getenv("DISJUNTOR_FALHAS", "3"))
+# Segundos com o disjuntor aberto antes de deixar passar uma chamada de teste
+TEMPO_RECUPERACAO = float(os.getenv("DISJUNTOR_RECUPERACAO_SEGUNDOS", "30"))
+
+FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio_aberto"
+
+
+class PrazoEsgotado(TimeoutError):
+    """O prazo da consulta terminou antes da operação."""
+
+
+class CircuitoAberto(RuntimeError):
+    """O disjuntor do recurso está aberto: a chamada foi recusada sem ser feita."""
+
+
+# Instante (time.monotonic) em que o prazo da consulta atual termina
+_prazo: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("prazo", default=None)
+# Avisos de degradação da execução de agente atual
+_avisos: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("avisos", default=None)
+
+
+@contextmanager
+def definir_prazo(segundos: Optional[float] = PRAZO_CONSULTA_PADRAO) -> Iterator[Optional[float]]:
+    """
+    Define o prazo das operações executadas no bloco (e nas threads que
+    copiarem o contexto). Um prazo já definido e mais curto prevalece.
+
+    Args:
+        segundos: Duração do prazo; None ou 0 não define prazo.
+
+    Yields:
+        O instante final do prazo em vigor (ou None).
+    """
+    atual = _prazo.get()
+    fim = time.monotonic() + segundos if segundos else None
+    if atual is not None and (fim is None or atual < fim):
+        fim = atual
+    token = _prazo.set(fim)
+    try:
+        yield fim
+    finally:
+        _prazo.reset(token)
+
+
+@contextmanager
+def prazo_absoluto(fim: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Restaura um prazo recebido de outro processo (instante de time.monotonic,
+    que é o mesmo relógio em todos os processos da máquina).
+    """
+    token = _prazo.set(fim)
+    try:
+        yield fim
+    finally:
+        _prazo.reset(token)
+
+
+def prazo_atual() -> Optional[float]:
+    return _prazo.get()
+
+
+def tempo_restante() -> Optional[float]:
+    """Segundos até o fim do prazo atual (None = sem prazo; nunca negativo)."""
+    fim = _prazo.get()
+    return None if fim is None else max(0.0, fim - time.monotonic())
+
+
+def verificar_prazo(operacao: str = "operação"):
+    """
+    Raises:
+        PrazoEsgotado: Se o prazo atual já terminou.
+    """
+    if tempo_restante() == 0.0:
+        raise PrazoEsgotado(f"Prazo da consulta esgotado antes de concluir {operacao}.")
+
+
+def limitar_timeout(timeout: Optional[float]) -> Optional[float]:
+    """O menor entre o timeout e o tempo restante do prazo (None = sem limite)."""
+    restante = tempo_restante()
+    if restante is None:
+        return timeout
+    return restante if timeout is None else min(timeout, restante)
+
+
+@contextmanager
+def coletar_avisos() -> Iterator[List[str]]:
+    """
+    Coleta, durante o bloco, os avisos de degradação registrados com
+    registrar_aviso (ex.: dataset servido de uma cópia local desatualizada).
+    """
+    avisos: List[str] = []
+    token = _avisos.set(avisos)
+    try:
+        yield avisos
+    finally:
+        _avisos.reset(token)
+
+
+def registrar_aviso(aviso: str):
+    """Registra um aviso de degradação na execução atual (sem coleta ativa, só o log)."""
+    logger.warning(aviso)
+    repassar_avisos([aviso])
+
+
+def repassar_avisos(avisos: List[str]):
+    """
+    Acrescenta à execução atual avisos já registrados em outra coleta (ex.: os
+    da execução compartilhada por chamadas coalescidas), sem repetir o log.
+    """
+    atuais = _avisos.get()
+    if atuais is None:
+        return
+    for aviso in avisos:
+        if aviso not in atuais:
+            atuais.append(aviso)
+
+
+class Disjuntor:
+    """
+    Disjuntor (circuit breaker) de um recurso remoto.
+
+    Depois de falhas_para_abrir falhas consecutivas, abre: as chamadas são
+    recusadas na hora (CircuitoAberto), sem esperar pelo recurso lento ou
+    fora do ar. Passado tempo_recuperacao, fica meio aberto e deixa passar
+    uma única chamada de teste: se ela funcionar o disjuntor fecha, senão
+    volta a abrir.
+    """
+
+    def __init__(self, nome: str, falhas_para_abrir: int = FALHAS_PARA_ABRIR,
+                 tempo_recuperacao: float = TEMPO_RECUPERACAO):
+        self.nome = nome
+        self.falhas_para_abrir = falhas_para_abrir
+        self.tempo_recuperacao = tempo_recuperacao
+        self._lock = threading.Lock()
+        self._estado = FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._contadores = {"chamadas": 0, "falhas": 0, "recusadas": 0, "aberturas": 0}
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            return self._estado
+
+    def _permitir(self):
+        with self._lock:
+            if self._estado == ABERTO and time.monotonic() - self._aberto_em >= self.tempo_recuperacao:
+                self._estado = MEIO_ABERTO
+            if self._estado == ABERTO or (self._estado == MEIO_ABERTO and self._teste_em_andamento):
+                self._contadores["recusadas"] += 1
+                restante = max(0.0, self.tempo_recuperacao - (time.monotonic() - self._aberto_em))
+                raise CircuitoAberto(f"Disjuntor de {self.nome} aberto (nova tentativa em {restante:.0f} s).")
+            if self._estado == MEIO_ABERTO:
+                self._teste_em_andamento = True
+            self._contadores["chamadas"] += 1
+
+    def _registrar(self, sucesso: bool):
+        with self._lock:
+            self._teste_em_andamento = False
+            if sucesso:
+                self._estado, self._falhas = FECHADO, 0
+                return
+            self._falhas += 1
+            self._contadores["falhas"] += 1
+            if self._estado == MEIO_ABERTO or self._falhas >= self.falhas_para_abrir:
+                if self._estado != ABERTO:
+                    self._contadores["aberturas"] += 1
+                    logger.warning("Disjuntor de %s aberto após %d falhas.", self.nome, self._falhas)
+                self._estado, self._aberto_em = ABERTO, time.monotonic()
+
+    @contextmanager
+    def proteger(self, eh_falha: Callable[[BaseException], bool] = lambda e: True) -> Iterator[None]:
+        """
+        Executa o bloco sob o disjuntor.
+
+        Args:
+            eh_falha: Diz se uma exceção do bloco indica falha do recurso (ex.:
+                um 404 não indica; um timeout ou um 503 indicam).
+
+        Raises:
+            CircuitoAberto: Se o disjuntor estiver aberto.
+        """
+        self._permitir()
+        try:
+            yield
+        except BaseException as e:
+            self._registrar(not eh_falha(e))
+            raise
+        self._registrar(True)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"estado": self._estado, "falhas_consecutivas": self._falhas, **self._contadores}
+
+
+_disjuntores: Dict[str, Disjuntor] = {}
+_lock_disjuntores = threading.Lock()
+
+
+def disjuntor_para(url: str) -> Disjuntor:
+    """Disjuntor do host da URL (compartilhado por todas as URLs do host)."""
+    host = urlparse(url).netloc or url
+    with _lock_disjuntores:
+        disjuntor = _disjuntores.get(host)
+        if disjuntor is None:
+            disjuntor = _disjuntores[host] = Disjuntor(host)
+        return disjuntor
+
+
+def estatisticas_disjuntores() -> Dict[str, Dict[str, Any]]:
+    with _lock_disjuntores:
+        disjuntores = dict(_disjuntores)
+    return {host: disjuntor.estatisticas() for host, disjuntor in disjuntores.items()}
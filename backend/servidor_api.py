@@ -3,16 +3,50 @@
 Servidor API Flask para integração com o sistema multi-agente
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, render_template_string, send_from_directory
 from flask_cors import CORS
+from werkzeug.security import safe_join
 import json
+import logging
+import os
 from agent_geral import AgentGeral
+from catalogo_datasets import PrefetcherDatasets
+import graficos
+from instrumentacao import iniciar_trace, metricas
+from logs import configurar_logs
+from prontidao import AquecedorAgentes
+from resiliencia import estatisticas_disjuntores
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)  # Permitir CORS para desenvolvimento
 
-# Instanciar o Agent Geral
-agent_geral = AgentGeral()
+# Os processos dos pools (busca fragmentada, agentes com a política PROCESSO)
+# importam o script principal como __mp_main__: só o processo do servidor
+# cria o Agent Geral e inicia as threads (ver processos.contexto_processos)
+if __name__ != "__mp_main__":
+    # Logs estruturados escritos em segundo plano (nível via LOG_LEVEL)
+    configurar_logs()
+
+    # Instanciar o Agent Geral
+    agent_geral = AgentGeral()
+
+    # Mantém os datasets populares do catálogo baixados e válidos em segundo plano
+    prefetcher = None
+    if os.getenv("PREFETCH_DATASETS", "1") == "1":
+        prefetcher = PrefetcherDatasets(agent_geral.catalogo, agent_geral.agent_csv)
+
+    # Aquecimento em segundo plano (datasets, matplotlib, consultas de aquecimento);
+    # /api/ready responde 503 até terminar. O aquecedor inicia o prefetcher ao final.
+    aquecedor = AquecedorAgentes(agent_geral, prefetcher).iniciar()
+
+# Número máximo de consultas aceitas por chamada de /api/processar-lote
+TAMANHO_MAXIMO_LOTE = 100
+
+# Cache-Control das visualizações (os nomes são reaproveitados entre análises, então
+# o cache é curto e revalidado por ETag/Last-Modified)
+MAX_AGE_VISUALIZACOES = int(os.getenv("VISUALIZACOES_MAX_AGE", "300"))
 
 @app.route('/')
 def home():
@@ -49,16 +83,62 @@ def home():
                 <pre>Painel dinâmico em formato Markdown com resultados dos agentes</pre>
             </div>
             
+            <div class="endpoint">
+                <h3><span class="method">POST</span> /api/processar-lote</h3>
+                <p>Processa várias consultas de uma vez, compartilhando o carregamento de datasets entre elas.</p>
+                <h4>Corpo da Requisição:</h4>
+                <pre>{
+  "consultas": ["Quais artigos sobre microgravidade?", "Quais os riscos de uma missão para Marte?"]
+}</pre>
+                <h4>Resposta:</h4>
+                <pre>{"resultados": [{"id_consulta": "...", "consulta": "...", "painel": "..."}], "total": 2}</pre>
+            </div>
+            
             <div class="endpoint">
                 <h3><span class="method">GET</span> /api/status</h3>
                 <p>Verifica o status da API e dos agentes disponíveis.</p>
             </div>
             
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/ready</h3>
+                <p>Prontidão por agente e componente após o aquecimento (datasets, matplotlib, grafo e consultas de aquecimento até a latência estabilizar). Responde 503 até tudo estar pronto; use-o nas verificações do balanceador de carga.</p>
+            </div>
+            
             <div class="endpoint">
                 <h3><span class="method">GET</span> /api/agentes</h3>
                 <p>Lista todos os agentes especializados disponíveis.</p>
             </div>
             
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/cache</h3>
+                <p>Estatísticas do cache de respostas (acertos, falhas, taxa de acerto, tamanho). <code>DELETE</code> esvazia o cache.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/datasets</h3>
+                <p>Lista o catálogo de datasets CSV disponíveis para o Agent CSV, com metadados e número de usos.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/grafo?consulta=...</h3>
+                <p>Estatísticas do grafo de conhecimento (publicações, temas, hipóteses, missões e datasets) e, com <code>consulta</code>, as publicações relevantes para as missões e temas citados.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/facetas?consulta=...&amp;organismo=...</h3>
+                <p>Contagens por faceta (ano, periódico, organismo e tema) das publicações que contêm <code>consulta</code> (todas, se omitida), filtradas pelos demais parâmetros (ex.: <code>tema=microgravidade</code>), e as mais relevantes.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/visualizacoes/&lt;nome&gt;</h3>
+                <p>Imagens dos gráficos do Agent CSV: miniaturas (.miniatura.webp), imagem completa (.png) e SVG, gerados sob demanda e servidos com cabeçalhos de cache.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3><span class="method">GET</span> /api/metrics</h3>
+                <p>Histogramas de latência por estágio do pipeline (formato de texto Prometheus).</p>
+            </div>
+            
             <h2>Agentes Especializados</h2>
             <ul>
                 <li><strong>Agent CSV (Data Analyst):</strong> Processamento de arquivos CSV da NASA, análise estatística e visualizações</li>
@@ -93,12 +173,40 @@ def processar_consulta():
             return jsonify({'erro': 'Consulta vazia'}), 400
         
         # Processar consulta através do Agent Geral
-        resultado = agent_geral.processar_consulta(consulta_texto)
+        with iniciar_trace("api_processar_consulta") as trace_id:
+            resultado = agent_geral.processar_consulta(consulta_texto)
+        
+        return resultado, 200, {'Content-Type': 'text/plain; charset=utf-8', 'X-Trace-Id': trace_id}
+        
+    except Exception as e:
+        logger.exception("Erro ao processar consulta: %s", e)
+        return jsonify({'erro': f'Erro interno do servidor: {str(e)}'}), 500
+
+@app.route('/api/processar-lote', methods=['POST'])
+def processar_lote():
+    """Endpoint para processar várias consultas em uma única chamada"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('consultas'), list):
+            return jsonify({'erro': 'Lista de consultas não fornecida'}), 400
+        
+        consultas = [c.strip() for c in data['consultas'] if isinstance(c, str) and c.strip()]
         
-        return resultado, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+        if not consultas:
+            return jsonify({'erro': 'Lote sem consultas válidas'}), 400
+        if len(consultas) > TAMANHO_MAXIMO_LOTE:
+            return jsonify({'erro': f'Lote excede o máximo de {TAMANHO_MAXIMO_LOTE} consultas'}), 400
+        
+        with iniciar_trace("api_processar_lote") as trace_id:
+            resultados = agent_geral.processar_lote(consultas)
+        
+        response = jsonify({'resultados': resultados, 'total': len(resultados)})
+        response.headers['X-Trace-Id'] = trace_id
+        return response
         
     except Exception as e:
-        print(f"Erro ao processar consulta: {e}")
+        logger.exception("Erro ao processar lote: %s", e)
         return jsonify({'erro': f'Erro interno do servidor: {str(e)}'}), 500
 
 @app.route('/api/status', methods=['GET'])
@@ -108,9 +216,26 @@ def status():
         'status': 'online',
         'versao': '1.0.0',
         'agentes_disponiveis': len(agent_geral.agentes_disponiveis),
-        'historico_consultas': len(agent_geral.historico_consultas)
+        'historico_consultas': len(agent_geral.historico_consultas),
+        'cache_respostas': agent_geral.cache_respostas.estatisticas(),
+        'armazenamento': agent_geral.agent_csv.armazenamento.estatisticas(),
+        'disjuntores': estatisticas_disjuntores()
     })
 
+@app.route('/api/ready', methods=['GET'])
+def prontidao():
+    """Endpoint de prontidão: 200 quando o aquecimento de todos os componentes terminou, 503 antes disso"""
+    estado = aquecedor.estado()
+    return jsonify(estado), 200 if estado['pronto'] else 503
+
+@app.route('/api/cache', methods=['GET', 'DELETE'])
+def cache_respostas():
+    """Endpoint para consultar (GET) ou esvaziar (DELETE) o cache de respostas"""
+    if request.method == 'DELETE':
+        removidas = agent_geral.cache_respostas.limpar()
+        return jsonify({'removidas': removidas})
+    return jsonify(agent_geral.cache_respostas.estatisticas())
+
 @app.route('/api/agentes', methods=['GET'])
 def listar_agentes():
     """Endpoint para listar agentes disponíveis"""
@@ -118,7 +243,7 @@ def listar_agentes():
     
     for agente_tipo, descricao in agent_geral.agentes_disponiveis.items():
         agentes_info.append({
-            'tipo': agente_tipo.value,
+            'tipo': str(agente_tipo),
             'nome': descricao,
             'status': 'ativo'
         })
@@ -128,6 +253,58 @@ def listar_agentes():
         'total': len(agentes_info)
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def exportar_metricas():
+    """Endpoint de métricas no formato de texto do Prometheus"""
+    return metricas.exportar_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/api/datasets', methods=['GET'])
+def listar_datasets():
+    """Endpoint para listar o catálogo de datasets"""
+    datasets = agent_geral.catalogo.listar()
+    return jsonify({
+        'datasets': datasets,
+        'total': len(datasets)
+    })
+
+@app.route('/api/grafo', methods=['GET'])
+def consultar_grafo():
+    """Endpoint com o tamanho do grafo de conhecimento e, com ?consulta=, as publicações ligadas às missões e temas citados"""
+    consulta = request.args.get('consulta', '')
+    resposta = {'estatisticas': agent_geral.grafo.estatisticas()}
+    if consulta:
+        resposta['conexoes'] = agent_geral.grafo.conexoes(consulta)
+    return jsonify(resposta)
+
+@app.route('/api/facetas', methods=['GET'])
+def consultar_facetas():
+    """Endpoint com as contagens por faceta das publicações que contêm ?consulta=, filtradas pelos demais parâmetros"""
+    agent_literatura = agent_geral.agent_literatura
+    filtros = {f: v for f, v in request.args.items() if f in agent_literatura.facetas.facetas}
+    return jsonify(agent_literatura.consultar_facetas(request.args.get('consulta', ''), filtros))
+
+@app.route('/api/visualizacoes/<path:nome>', methods=['GET'])
+def obter_visualizacao(nome):
+    """Endpoint para servir as imagens dos gráficos (miniatura, completa ou SVG)"""
+    armazenamento = agent_geral.agent_csv.armazenamento
+    diretorio = armazenamento.raiz
+    caminho = safe_join(diretorio, nome)
+    if caminho is None or os.path.splitext(nome)[1] not in graficos.EXTENSOES_IMAGEM:
+        return jsonify({'erro': 'Visualização não encontrada'}), 404
+    try:
+        # A imagem completa e o SVG são desenhados no primeiro pedido; a leitura
+        # conta como uso para a remoção por cota (ver armazenamento)
+        with armazenamento.fixar(caminho):
+            if not graficos.garantir_arquivo(caminho):
+                return jsonify({'erro': 'Visualização não encontrada'}), 404
+    except Exception as e:
+        logger.exception("Erro ao gerar visualização %s: %s", nome, e)
+        return jsonify({'erro': 'Erro ao gerar visualização'}), 500
+    
+    response = send_from_directory(diretorio, nome, max_age=MAX_AGE_VISUALIZACOES)
+    response.cache_control.public = True
+    return response
+
 @app.route('/api/historico', methods=['GET'])
 def obter_historico():
     """Endpoint para obter histórico de consultas"""
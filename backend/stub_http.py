@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local (stub) para benchmarks e testes de carga
+Serve arquivos de um diretório no lugar do GitHub/OSDR e gera CSVs sintéticos
+"""
+
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class _HandlerStub(SimpleHTTPRequestHandler):
+    """
+    Handler silencioso com atraso opcional para simular a latência da rede.
+    Além do If-Modified-Since do SimpleHTTPRequestHandler, responde a
+    If-None-Match (ETag) e a pedidos Range de um único intervalo.
+    """
+
+    atraso = 0.0
+
+    def do_GET(self):
+        if self.atraso:
+            time.sleep(self.atraso)
+        caminho = self.translate_path(self.path)
+        if not os.path.isfile(caminho):
+            super().do_GET()
+            return
+
+        estado = os.stat(caminho)
+        etag = f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        intervalo = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if not intervalo.startswith("bytes=") or (if_range and if_range != etag):
+            self._etag_pendente = etag
+            super().do_GET()
+            return
+
+        inicio_txt, _, fim_txt = intervalo[len("bytes="):].partition("-")
+        inicio = int(inicio_txt or 0)
+        fim = int(fim_txt) if fim_txt else estado.st_size - 1
+        if inicio >= estado.st_size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{estado.st_size}")
+            self.end_headers()
+            return
+        with open(caminho, "rb") as f:
+            f.seek(inicio)
+            corpo = f.read(fim - inicio + 1)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(caminho))
+        self.send_header("Content-Range", f"bytes {inicio}-{inicio + len(corpo) - 1}/{estado.st_size}")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def end_headers(self):
+        etag = getattr(self, "_etag_pendente", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Accept-Ranges", "bytes")
+            self._etag_pendente = None
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServidorStub:
+    """
+    Servidor HTTP em thread de segundo plano que serve os arquivos de um diretório.
+
+    Uso:
+        with ServidorStub(diretorio) as stub:
+            url = stub.url("SB_publication_PMC.csv")
+    """
+
+    def __init__(self, diretorio: str, host: str = "127.0.0.1", porta: int = 0, atraso: float = 0.0):
+        self.diretorio = diretorio
+        handler = type("HandlerStub", (_HandlerStub,), {"atraso": atraso})
+        self._servidor = ThreadingHTTPServer((host, porta), functools.partial(handler, directory=diretorio))
+        self._servidor.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url_base(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def url(self, nome_arquivo: str) -> str:
+        return f"{self.url_base}/{nome_arquivo}"
+
+    def iniciar(self) -> "ServidorStub":
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="servidor-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def encerrar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self) -> "ServidorStub":
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+
+TEMAS_SINTETICOS = [
+    "microgravity", "spaceflight", "radiation", "bone loss", "muscle atrophy", "Arabidopsis",
+    "mice", "gene expression", "immune response", "plant growth", "International Space Station",
+    "Mars", "lunar", "oxidative stress", "microbiome", "cardiovascular", "stem cells", "Drosophila",
+]
+
+
+def gerar_publicacoes_sinteticas(n_titulos: int, semente: int = 42) -> pd.DataFrame:
+    """
+    Gera um corpus sintético com o mesmo esquema do SB_publication_PMC.csv (Title, Link).
+    """
+    rng = np.random.default_rng(semente)
+    temas = np.array(TEMAS_SINTETICOS)
+    a = temas[rng.integers(0, len(temas), n_titulos)]
+    b = temas[rng.integers(0, len(temas), n_titulos)]
+    titulos = [f"Effects of {x} on {y} in study {i}" for i, (x, y) in enumerate(zip(a, b))]
+    links = [f"https://www.ncbi.nlm.nih.gov/pmc/articles/PMC{1000000 + i}/" for i in range(n_titulos)]
+    return pd.DataFrame({"Title": titulos, "Link": links})
+
+
+def gerar_dataframe_sintetico(linhas: int, colunas: int, semente: int = 42) -> pd.DataFrame:
+    """
+    Gera um DataFrame sintético misto: ~70% float, ~20% int e ~10% categóricas (texto).
+    """
+    rng = np.random.default_rng(semente)
+    dados = {}
+    for i in range(colunas):
+        fracao = i % 10
+        if fracao < 7:
+            valores = rng.normal(loc=i, scale=1 + i % 5, size=linhas)
+            valores[rng.random(linhas) < 0.01] = np.nan
+            dados[f"medida_{i}"] = valores
+        elif fracao < 9:
+            dados[f"contagem_{i}"] = rng.integers(0, 1000, size=linhas)
+        else:
+            categorias = np.array([f"cat_{k}" for k in range(20)])
+            dados[f"categoria_{i}"] = categorias[rng.integers(0, len(categorias), size=linhas)]
+    return pd.DataFrame(dados)
+
+
+def escrever_csv(df: pd.DataFrame, diretorio: str, nome_arquivo: str) -> str:
+    """Escreve o DataFrame como CSV no diretório e retorna o caminho."""
+    caminho = os.path.join(diretorio, nome_arquivo)
+    df.to_csv(caminho, index=False)
+    return caminho
@@ -0,0 +1,73 @@
+"""
+Avisos de degradação em chamadas coalescidas do Agent CSV
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from agent_csv import AgentCSV
+from resiliencia import coletar_avisos
+from stub_http import ServidorStub, escrever_csv, gerar_dataframe_sintetico
+
+
+class DownloaderForaDoAr:
+    """Downloader cujo host está fora do ar: a chamada espera ser liberada e falha."""
+
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.chamadas = 0
+
+    def baixar(self, url, destino, max_idade=None):
+        self.chamadas += 1
+        self.liberar.wait(10)
+        raise requests.exceptions.ConnectionError(f"{url} fora do ar")
+
+
+@pytest.fixture
+def agent_csv(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTEFATOS_DIR", str(tmp_path / "artefatos"))
+    agent = AgentCSV()
+    agent.analise_correlacoes = False
+    return agent
+
+
+def test_chamadas_coalescidas_recebem_o_aviso_de_copia_desatualizada(agent_csv, tmp_path):
+    dados = tmp_path / "dados"
+    dados.mkdir()
+    escrever_csv(gerar_dataframe_sintetico(200, 4), str(dados), "amostras.csv")
+
+    with ServidorStub(str(dados)) as stub:
+        url = stub.url("amostras.csv")
+        # Primeira consulta com o host no ar: deixa a cópia local validada
+        assert agent_csv.processar_consulta_csv("dados", csv_url=url, previa=False, incremental=False)["status"] == "sucesso"
+
+    fora_do_ar = DownloaderForaDoAr()
+    agent_csv.downloader = fora_do_ar
+    agent_csv.validade_local = 0
+
+    def consultar():
+        with coletar_avisos() as avisos:
+            resultado = agent_csv.processar_consulta_csv("dados", csv_url=url, previa=False, incremental=False)
+        return resultado, avisos
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        lider = executor.submit(consultar)
+        # A segunda chamada chega com o download da primeira em andamento e é coalescida
+        while fora_do_ar.chamadas == 0:
+            time.sleep(0.01)
+        seguidora = executor.submit(consultar)
+        chamada = agent_csv._datasets_em_voo._em_voo[url]
+        while chamada.aguardando == 0:
+            time.sleep(0.01)
+        fora_do_ar.liberar.set()
+        resultados = [lider.result(timeout=30), seguidora.result(timeout=30)]
+
+    assert fora_do_ar.chamadas == 1
+    for resultado, avisos in resultados:
+        assert resultado["status"] == "sucesso"
+        assert len(avisos) == 1
+        assert "usando a cópia local" in avisos[0]
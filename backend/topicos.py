@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Tópicos da literatura
+Modelagem de tópicos (TF-IDF + NMF) pré-calculada sobre o corpus de
+publicações: cada publicação recebe seus temas antes das consultas, que só
+agregam os rótulos salvos
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from armazenamento import DIRETORIO_PADRAO
+
+logger = logging.getLogger(__name__)
+
+N_TOPICOS = int(os.getenv("TOPICOS_N", "12"))
+# Diretório das atribuições salvas (uma por corpus e configuração)
+DIRETORIO_TOPICOS = os.getenv("TOPICOS_DIR", os.path.join(DIRETORIO_PADRAO, "topicos"))
+# Além do dominante, a publicação recebe os tópicos com pelo menos esta fração do peso dele
+FRACAO_TOPICO_SECUNDARIO = 0.5
+# Termos de maior peso que descrevem cada tópico e, entre eles, os que o nomeiam
+TERMOS_POR_TOPICO = 10
+TERMOS_NOME = 3
+# Acima deste número de publicações, o NMF é ajustado em mini-lotes
+LIMITE_MINI_LOTE = 50000
+VERSAO_TOPICOS = 1
+
+
+@dataclass
+class TopicosCorpus:
+    """
+    Temas do corpus e a atribuição de cada publicação (na ordem do corpus).
+    """
+    assinatura: str
+    temas: Dict[str, List[str]]     # tema -> termos de maior peso dos tópicos que o compõem
+    atribuicoes: List[List[str]]    # temas de cada publicação
+
+    def contar(self, indices: Iterable[int]) -> Dict[str, int]:
+        """
+        Número de publicações por tema entre as publicações indicadas.
+        """
+        contagem: Dict[str, int] = {}
+        for indice in indices:
+            for tema in self.atribuicoes[indice]:
+                contagem[tema] = contagem.get(tema, 0) + 1
+        return contagem
+
+
+def assinatura_corpus(textos: Sequence[str], n_topicos: int, sementes: Dict[str, Tuple[str, ...]]) -> str:
+    """
+    Identifica o corpus e a configuração: muda se qualquer texto, o número de
+    tópicos ou os temas de referência mudarem.
+    """
+    resumo = hashlib.sha1(f"{VERSAO_TOPICOS}|{n_topicos}|{sorted(sementes.items())}".encode("utf-8"))
+    for texto in textos:
+        resumo.update(texto.encode("utf-8"))
+        resumo.update(b"\0")
+    return resumo.hexdigest()
+
+
+def temas_por_palavras(texto: str, sementes: Dict[str, Tuple[str, ...]]) -> List[str]:
+    texto = texto.lower()
+    return [tema for tema, palavras in sementes.items() if any(p in texto for p in palavras)]
+
+
+def nomear_topico(termos: List[str], sementes: Dict[str, Tuple[str, ...]]) -> str:
+    """
+    Tema de referência citado entre os termos principais do tópico; sem
+    nenhum, o primeiro bigrama entre eles ou as duas primeiras palavras.
+    """
+    principais = termos[:TERMOS_NOME]
+    for termo in principais:
+        for tema, palavras in sementes.items():
+            if any(termo == p or p in termo.split() for p in palavras):
+                return tema
+    bigrama = next((t for t in principais if " " in t), None)
+    palavras_nome = bigrama.split() if bigrama else list(dict.fromkeys(w for t in principais for w in t.split()))[:2]
+    return "_".join(re.sub(r"\W+", "_", w).strip("_") for w in palavras_nome)
+
+
+def calcular_topicos(textos: Sequence[str], sementes: Dict[str, Tuple[str, ...]],
+                     n_topicos: int = N_TOPICOS) -> TopicosCorpus:
+    """
+    Ajusta TF-IDF + NMF sobre os textos e atribui temas a cada publicação.
+
+    Cada tópico é nomeado por nomear_topico (tópicos com o mesmo nome formam um
+    só tema); a publicação recebe o tópico dominante, os secundários acima de
+    FRACAO_TOPICO_SECUNDARIO e os temas de referência citados literalmente.
+
+    Args:
+        textos: Texto de cada publicação (título e, se houver, abstract).
+        sementes: Temas de referência e suas palavras-chave (ex.: TEMAS_LITERATURA).
+        n_topicos: Número de tópicos do NMF.
+
+    Returns:
+        TopicosCorpus com os temas e as atribuições.
+    """
+    from sklearn.decomposition import NMF, MiniBatchNMF
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    assinatura = assinatura_corpus(textos, n_topicos, sementes)
+    atribuicoes = [temas_por_palavras(texto, sementes) for texto in textos]
+    vetorizador = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), min_df=2, max_df=0.5,
+                                  max_features=50000, sublinear_tf=True)
+    try:
+        matriz = vetorizador.fit_transform(textos)
+    except ValueError:
+        # Corpus vazio ou sem termos em comum entre publicações
+        return TopicosCorpus(assinatura, {}, atribuicoes)
+    n_topicos = min(n_topicos, matriz.shape[0], matriz.shape[1])
+    if n_topicos < 2:
+        return TopicosCorpus(assinatura, {}, atribuicoes)
+
+    if matriz.shape[0] > LIMITE_MINI_LOTE:
+        modelo = MiniBatchNMF(n_components=n_topicos, init="nndsvda", batch_size=4096, random_state=0)
+    else:
+        modelo = NMF(n_components=n_topicos, init="nndsvda", max_iter=400, random_state=0)
+    pesos = modelo.fit_transform(matriz)
+
+    vocabulario = vetorizador.get_feature_names_out()
+    nomes, temas = [], {}
+    for componente in modelo.components_:
+        termos = [str(vocabulario[i]) for i in np.argsort(componente)[::-1][:TERMOS_POR_TOPICO]]
+        nome = nomear_topico(termos, sementes)
+        nomes.append(nome)
+        temas.setdefault(nome, []).extend(t for t in termos if t not in temas.get(nome, []))
+
+    maximos = pesos.max(axis=1, keepdims=True)
+    selecionados = (pesos > 0) & (pesos >= FRACAO_TOPICO_SECUNDARIO * maximos)
+    for indice, linha in enumerate(selecionados):
+        for topico in np.flatnonzero(linha):
+            if nomes[topico] not in atribuicoes[indice]:
+                atribuicoes[indice].append(nomes[topico])
+    logger.info("Tópicos calculados: %d publicações, %d tópicos, temas: %s",
+                len(textos), n_topicos, ", ".join(sorted(temas)))
+    return TopicosCorpus(assinatura, temas, atribuicoes)
+
+
+def _caminho(diretorio: str, assinatura: str) -> str:
+    return os.path.join(diretorio, f"topicos-{assinatura[:16]}.json")
+
+
+def salvar_topicos(topicos: TopicosCorpus, diretorio: str = DIRETORIO_TOPICOS) -> str:
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = _caminho(diretorio, topicos.assinatura)
+    # Escrita atômica: leitores nunca veem uma atribuição parcial
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(asdict(topicos), f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def ler_topicos(assinatura: str, diretorio: str = DIRETORIO_TOPICOS) -> Optional[TopicosCorpus]:
+    try:
+        with open(_caminho(diretorio, assinatura), encoding="utf-8") as f:
+            topicos = TopicosCorpus(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+    return topicos if topicos.assinatura == assinatura else None
+
+
+def topicos_do_corpus(textos: Sequence[str], sementes: Dict[str, Tuple[str, ...]], n_topicos: int = N_TOPICOS,
+                      diretorio: str = DIRETORIO_TOPICOS) -> TopicosCorpus:
+    """
+    Atribuição salva para este corpus e configuração; se não houver (ou o
+    corpus mudou), calcula e salva.
+    """
+    assinatura = assinatura_corpus(textos, n_topicos, sementes)
+    topicos = ler_topicos(assinatura, diretorio)
+    if topicos is not None:
+        logger.info("Tópicos carregados de %s", _caminho(diretorio, assinatura))
+        return topicos
+    topicos = calcular_topicos(textos, sementes, n_topicos)
+    try:
+        salvar_topicos(topicos, diretorio)
+    except OSError as e:
+        logger.warning("Não foi possível salvar os tópicos em %s: %s", diretorio, e)
+    return topicos
+
+
+# Etapa offline: pré-calcula e salva os tópicos do corpus configurado
+# (SB_PUBLICATIONS_CSV_URL), para que o servidor apenas os carregue
+if __name__ == "__main__":
+    from logs import configurar_logs
+    from agent_literatura import AgentLiteratura
+
+    configurar_logs(formato="texto")
+    agent_literatura = AgentLiteratura()
+    topicos = agent_literatura.topicos
+    print(f"Tópicos salvos em {_caminho(DIRETORIO_TOPICOS, topicos.assinatura)}")
+    for tema, termos in sorted(topicos.temas.items()):
+        print(f"{tema}: {', '.join(termos[:TERMOS_POR_TOPICO])}")
+    print(json.dumps(topicos.contar(range(len(topicos.atribuicoes))), indent=2, ensure_ascii=False))